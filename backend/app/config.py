@@ -14,6 +14,14 @@ if not env_path.exists():
 # API Keys (loaded from environment variables)
 ABUSEIPDB_API_KEY = os.getenv("ABUSEIPDB_API_KEY", "")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # optional OpenAI-compatible endpoint
+
+# LLM narratives: "inline" waits for the narrative during analysis; "background" returns the
+# template narrative at once and writes the LLM narrative onto the stored report when it is ready
+NARRATIVE_MODE = os.getenv("NARRATIVE_MODE", "inline").lower()
+NARRATIVE_WORKERS = int(os.getenv("NARRATIVE_WORKERS", "4"))
+NARRATIVE_TIMEOUT = float(os.getenv("NARRATIVE_TIMEOUT", "20"))  # seconds per LLM call
+NARRATIVE_MAX_PENDING = int(os.getenv("NARRATIVE_MAX_PENDING", "1000"))
 
 # Base URLs
 ABUSEIPDB_BASE_URL = "https://api.abuseipdb.com/api/v2"
@@ -23,11 +31,70 @@ IPAPI_BASE_URL = "http://ip-api.com"
 REPORT_DB_PATH = os.getenv("REPORT_DB_PATH", str(project_root / "data" / "reports.db"))
 REPORT_RETENTION_DAYS = int(os.getenv("REPORT_RETENTION_DAYS", "7"))
 REPORT_RETENTION_LIMIT = int(os.getenv("REPORT_RETENTION_LIMIT", "1000"))
+# Retention runs in the background rather than on every insert
+RETENTION_COMPACT_INTERVAL = float(os.getenv("RETENTION_COMPACT_INTERVAL", "300"))  # seconds
+RETENTION_COMPACT_CHUNK = int(os.getenv("RETENTION_COMPACT_CHUNK", "1000"))
+REPORT_DB_POOL_SIZE = int(os.getenv("REPORT_DB_POOL_SIZE", "8"))
+REPORT_DB_CACHE_MB = int(os.getenv("REPORT_DB_CACHE_MB", "64"))
+REPORT_DB_MMAP_MB = int(os.getenv("REPORT_DB_MMAP_MB", "256"))
+# Write-behind persistence: analyses are queued and written in batched transactions
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "200"))
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.25"))  # seconds
+PERSIST_MAX_PENDING = int(os.getenv("PERSIST_MAX_PENDING", "10000"))
+# Reports fetched per page while streaming /reports/export
+REPORT_EXPORT_BATCH_SIZE = int(os.getenv("REPORT_EXPORT_BATCH_SIZE", "1000"))
+# Serialized /reports/recent and /reports/stats responses kept until the next write; 0 disables
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+# Neighbour reports a subnet or ASN needs before its mean score becomes a correlation feature
+CORRELATION_MIN_REPORTS = int(os.getenv("CORRELATION_MIN_REPORTS", "5"))
+# Hourly stats rollups outlive individual reports so the dashboard can chart longer windows
+STATS_ROLLUP_RETENTION_DAYS = int(os.getenv("STATS_ROLLUP_RETENTION_DAYS", "400"))
+# LLM narratives cached by bucketed threat profile; 0 entries disables the cache
+NARRATIVE_CACHE_DB_PATH = os.getenv("NARRATIVE_CACHE_DB_PATH", str(Path(REPORT_DB_PATH).with_name("narrative_cache.db")))
+NARRATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NARRATIVE_CACHE_MAX_ENTRIES", "5000"))
+NARRATIVE_CACHE_TTL = int(os.getenv("NARRATIVE_CACHE_TTL", str(7 * 24 * 60 * 60)))  # seconds
+NARRATIVE_COST_PER_1K_TOKENS = float(os.getenv("NARRATIVE_COST_PER_1K_TOKENS", "0.0004"))  # USD, for saved-cost metrics
 
 # Request configuration
 REQUEST_TIMEOUT = 8  # seconds
 MAX_RETRIES = 2
 
+# Shared upstream HTTP connection pool
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))  # seconds
+
+# Upstream lookup cache (per-source TTLs in seconds; 0 disables caching for that source)
+THREAT_CACHE_MAX_ENTRIES = int(os.getenv("THREAT_CACHE_MAX_ENTRIES", "10000"))
+THREAT_CACHE_DB_PATH = os.getenv("THREAT_CACHE_DB_PATH", "")  # empty keeps the cache in memory only
+CACHE_TTL_ABUSEIPDB = int(os.getenv("CACHE_TTL_ABUSEIPDB", str(60 * 60)))
+CACHE_TTL_GEOLOCATION = int(os.getenv("CACHE_TTL_GEOLOCATION", str(7 * 24 * 60 * 60)))
+
+# Client-side rate limiting (token bucket per upstream, fed by quota response headers)
+ABUSEIPDB_RATE_PER_SECOND = float(os.getenv("ABUSEIPDB_RATE_PER_SECOND", "2"))
+ABUSEIPDB_BURST = int(os.getenv("ABUSEIPDB_BURST", "10"))
+ABUSEIPDB_DAILY_QUOTA = int(os.getenv("ABUSEIPDB_DAILY_QUOTA", "1000"))
+ABUSEIPDB_INTERACTIVE_RESERVE = int(os.getenv("ABUSEIPDB_INTERACTIVE_RESERVE", "50"))
+IPAPI_RATE_PER_SECOND = float(os.getenv("IPAPI_RATE_PER_SECOND", "0.75"))  # ip-api.com allows 45 req/min
+IPAPI_BURST = int(os.getenv("IPAPI_BURST", "45"))
+INTERACTIVE_MAX_QUEUE_SECONDS = float(os.getenv("INTERACTIVE_MAX_QUEUE_SECONDS", "5"))
+BULK_MAX_QUEUE_SECONDS = float(os.getenv("BULK_MAX_QUEUE_SECONDS", "60"))
+
+# Local threat feeds: JSON manifest listing feed files (name, path, category, format)
+LOCAL_FEEDS_MANIFEST = os.getenv("LOCAL_FEEDS_MANIFEST", "")
+
+# Optional offline geolocation/ASN database (.csv, compiled .bin, or .mmdb with maxminddb installed)
+GEO_DB_PATH = os.getenv("GEO_DB_PATH", "")
+
+# Batch analysis settings
+BATCH_MAX_IPS = int(os.getenv("BATCH_MAX_IPS", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "50"))
+
+# Maximum in-flight requests per upstream source
+ABUSEIPDB_MAX_CONCURRENCY = int(os.getenv("ABUSEIPDB_MAX_CONCURRENCY", "10"))
+IPAPI_MAX_CONCURRENCY = int(os.getenv("IPAPI_MAX_CONCURRENCY", "4"))
+
 # Risk level mapping as inclusive ranges
 RISK_LEVELS = {
     "LOW": (0, 25),
@@ -49,6 +116,10 @@ THREAT_CATEGORIES = {
     "scanner": "Scanner",
 }
 
+# Declarative scoring rules (JSON, or YAML with PyYAML installed); edits are picked up without a restart
+SCORING_RULES_PATH = os.getenv("SCORING_RULES_PATH", str(Path(__file__).parent / "rules" / "default_rules.json"))
+RULES_RELOAD_INTERVAL = float(os.getenv("RULES_RELOAD_INTERVAL", "5"))  # seconds between rule file checks
+
 # High-risk countries (ISO codes)
 HIGH_RISK_COUNTRIES = ["KP", "IR", "SY", "CU"]
 
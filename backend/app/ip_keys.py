@@ -0,0 +1,77 @@
+"""IPv4/IPv6 parsing and the packed, order-preserving keys stored reports are indexed by."""
+import ipaddress
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def parse_ip(value: str) -> IPAddress:
+    """
+    Parse an IPv4 or IPv6 address. IPv4-mapped IPv6 (``::ffff:1.2.3.4``) is
+    returned as the IPv4 address; zone ids are rejected. Raises ValueError.
+    """
+    address = ipaddress.ip_address(value.strip())
+    if address.version == 6:
+        if address.scope_id is not None:
+            raise ValueError(f"Scoped IPv6 address not supported: {value!r}")
+        if address.ipv4_mapped is not None:
+            return address.ipv4_mapped
+    return address
+
+
+def normalize_ip(value: str) -> str:
+    """Canonical text form (IPv6 compressed and lower-case). Raises ValueError."""
+    return str(parse_ip(value))
+
+
+def _pack(address: IPAddress) -> bytes:
+    # The version byte keeps IPv4 and IPv6 keys in separate, non-overlapping ranges
+    return bytes((address.version,)) + address.packed
+
+
+def ip_key(value: str) -> bytes:
+    """
+    Five bytes for IPv4, seventeen for IPv6. Keys sort like the addresses they
+    encode, so every network is one contiguous key range. Raises ValueError.
+    """
+    return _pack(parse_ip(value))
+
+
+def ip_key_or_none(value: Optional[str]) -> Optional[bytes]:
+    try:
+        return ip_key(value) if value else None
+    except ValueError:
+        return None
+
+
+def network_key_range(network: str) -> Tuple[bytes, bytes]:
+    """Inclusive ``(first, last)`` keys covering a CIDR such as ``203.0.113.0/24`` or ``2001:db8::/48``."""
+    try:
+        net = ipaddress.ip_network(network.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"Invalid network {network!r}")
+    return _pack(net.network_address), _pack(net.broadcast_address)
+
+
+# Neighbourhood used for subnet correlation: the /24 of an IPv4 address, the /48 of an IPv6 address
+PREFIX_LENGTHS = {4: 24, 6: 48}
+# Leading ip_key bytes shared by every address of a prefix: the version byte plus whole prefix bytes
+PREFIX_KEY_BYTES = {version: 1 + bits // 8 for version, bits in PREFIX_LENGTHS.items()}
+
+
+@lru_cache(maxsize=65536)
+def _prefix_label(prefix_key: bytes) -> str:
+    version = prefix_key[0]
+    address = ipaddress.ip_address(prefix_key[1:].ljust(4 if version == 4 else 16, b"\0"))
+    return f"{address}/{PREFIX_LENGTHS[version]}"
+
+
+def key_prefix(key: bytes) -> str:
+    """The correlation prefix, as a CIDR such as ``203.0.113.0/24``, of a key from ``ip_key``."""
+    return _prefix_label(key[:PREFIX_KEY_BYTES[key[0]]])
+
+
+def ip_prefix(value: str) -> str:
+    """The correlation prefix of an address as a CIDR. Raises ValueError."""
+    return key_prefix(ip_key(value))
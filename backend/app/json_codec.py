@@ -0,0 +1,71 @@
+"""JSON encoding for API responses: orjson when installed, with pre-encoded fragments spliced in verbatim."""
+import json
+import re
+import uuid
+from datetime import date, datetime
+from typing import Any, List
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# orjson >= 3.9.11 splices fragments itself; older versions and the stdlib go through placeholders
+_NATIVE_FRAGMENT = getattr(orjson, "Fragment", None)
+# Random per process, so stored data cannot contain a placeholder by accident
+_PLACEHOLDER = f"__json_fragment_{uuid.uuid4().hex}_"
+_PLACEHOLDER_RE = re.compile(rb'"' + _PLACEHOLDER.encode("ascii") + rb'(\d+)"')
+
+
+class JSONFragment:
+    """Already-encoded JSON, such as a stored JSON column, written into the output as-is."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes | str) -> None:
+        self.data = data.encode("utf-8") if isinstance(data, str) else data
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, JSONFragment) and other.data == self.data
+
+    def __repr__(self) -> str:
+        return f"JSONFragment({self.data!r})"
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON. Accepts JSONFragment anywhere, plus datetimes and pydantic models."""
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode("utf-8")
+    fragments: List[bytes] = []
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, JSONFragment):
+            if _NATIVE_FRAGMENT is not None:
+                return _NATIVE_FRAGMENT(obj.data)
+            fragments.append(obj.data)
+            return f"{_PLACEHOLDER}{len(fragments) - 1}"
+        if isinstance(obj, BaseModel):
+            return obj.model_dump(mode="json")
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    if ORJSON_AVAILABLE:
+        encoded = orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        encoded = json.dumps(value, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if not fragments:
+        return encoded
+    return _PLACEHOLDER_RE.sub(lambda match: fragments[int(match.group(1))], encoded)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: ``dumps`` instead of Starlette's ``json.dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
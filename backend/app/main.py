@@ -1,51 +1,159 @@
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
 import asyncio
+import hashlib
+import ipaddress
 import json
+import time
+import uuid
 from io import BytesIO
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from app.config import (
     ABUSEIPDB_API_KEY,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_IPS,
+    CACHE_TTL_ABUSEIPDB,
+    CACHE_TTL_GEOLOCATION,
+    CORRELATION_MIN_REPORTS,
+    GEO_DB_PATH,
+    LOCAL_FEEDS_MANIFEST,
+    NARRATIVE_CACHE_DB_PATH,
+    NARRATIVE_CACHE_MAX_ENTRIES,
+    NARRATIVE_CACHE_TTL,
+    NARRATIVE_COST_PER_1K_TOKENS,
+    NARRATIVE_MAX_PENDING,
+    NARRATIVE_MODE,
+    NARRATIVE_TIMEOUT,
+    NARRATIVE_WORKERS,
     OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    PERSIST_BATCH_SIZE,
+    PERSIST_FLUSH_INTERVAL,
+    PERSIST_MAX_PENDING,
+    REPORT_DB_CACHE_MB,
+    REPORT_DB_MMAP_MB,
     REPORT_DB_PATH,
+    REPORT_DB_POOL_SIZE,
+    REPORT_EXPORT_BATCH_SIZE,
+    RESPONSE_CACHE_MAX_ENTRIES,
     REPORT_RETENTION_DAYS,
     REPORT_RETENTION_LIMIT,
+    RETENTION_COMPACT_CHUNK,
+    RETENTION_COMPACT_INTERVAL,
+    STATS_ROLLUP_RETENTION_DAYS,
+    THREAT_CACHE_DB_PATH,
+    THREAT_CACHE_MAX_ENTRIES,
 )
-from app.repository.report_repository import ReportRepository
+from app.ip_keys import ip_key, network_key_range, normalize_ip
+from app.json_codec import FastJSONResponse, dumps
+from app.repository.blacklist_repository import BlacklistRepository
+from app.repository.report_repository import ReportRepository, resolve_report_fields
+from app.services.cache import ThreatIntelCache
 from app.services.collector import ThreatIntelCollector
+from app.services.compactor import RetentionCompactor
+from app.services.feed_index import FeedIndex
+from app.services.geo_db import GeoDatabase
+from app.services.live_feed import LiveFeed
 from app.services.normalizer import DataNormalizer
 from app.services.scorer import ThreatScoringEngine
 from app.services.narrative import NarrativeGenerator
-from .models import AnalysisRequest, AnalysisResponse, NormalizedThreatReport
+from app.services.narrative_cache import NarrativeCache
+from app.services.narrative_worker import NarrativeWorkerPool
+from app.services.rate_limiter import Priority, QuotaExhaustedError
+from app.services.report_export import EXPORT_MEDIA_TYPES, stream_reports
+from app.services.response_cache import ResponseCache
+from app.services.utils import SingleFlight
+from app.services.write_behind import WriteBehindQueue
+from .models import (
+    AnalysisRequest,
+    AnalysisResponse,
+    BatchAnalysisItem,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    BlockAnalysisRequest,
+    BulkScoreResponse,
+    FeedLookupRequest,
+    NormalizedThreatReport,
+    ScoredAddress,
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await asyncio.to_thread(feed_index.reload)
+    if GEO_DB_PATH:
+        collector.geo_db = await asyncio.to_thread(GeoDatabase, GEO_DB_PATH)
+    await collector.start()
+    live_feed.start()
+    persistence.start()
+    narratives.start()
+    compactor.start()
+    try:
+        yield
+    finally:
+        live_feed.close()
+        await compactor.close()
+        await narratives.close()
+        await persistence.close()
+        await collector.close()
+        if collector.geo_db is not None:
+            collector.geo_db.close()
+        if narrative_cache is not None:
+            narrative_cache.close()
+        report_repository.close()
+
+
+app = FastAPI(
+    title="Cerberus - Threat Intelligence Correlation Engine",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
 
-app = FastAPI(title="Cerberus - Threat Intelligence Correlation Engine")
+@app.exception_handler(QuotaExhaustedError)
+async def quota_exhausted(request: Request, exc: QuotaExhaustedError) -> Response:
+    """An analysis that ran out of upstream quota answers 503 with Retry-After on every endpoint, not 500."""
+    return Response(
+        dumps({"detail": str(exc)}),
+        status_code=503,
+        media_type="application/json",
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
 
 
 class StoredReport(BaseModel):
+    # Listings may be projected with ?fields=, so everything but id and analyzed_at is optional
     id: int
-    ip_address: str
+    ip_address: str | None = None
     analyzed_at: datetime
-    threat_score: int
-    risk_level: str
-    abuse_confidence: float
-    total_reports: int
-    categories: List[str]
-    triggered_rules: List[str]
+    threat_score: int | None = None
+    risk_level: str | None = None
+    abuse_confidence: float | None = None
+    total_reports: int | None = None
+    categories: List[str] | None = None
+    triggered_rules: List[str] | None = None
     narrative: str | None = None
     country: str | None = None
     asn: str | None = None
-    raw_data: Dict[str, Any] = {}
-    occurrence_count: int
-    is_new: bool
+    # Only loaded by GET /api/v1/reports/{report_id}; listings leave it unset
+    raw_data: Dict[str, Any] | None = None
+    ruleset_version: str | None = None
+    narrative_pending: bool | None = None
+    occurrence_count: int | None = None
+    is_new: bool | None = None
 
 
 class RecentReportsResponse(BaseModel):
     reports: List[StoredReport]
+    # Pass back as ?cursor= for the next (older) page; null on the last page
+    next_cursor: str | None = None
 
 
 class TopRisk(BaseModel):
@@ -70,6 +178,27 @@ class StatsResponse(BaseModel):
     metrics: Dict[str, Any]
 
 
+class CorrelationGroup(BaseModel):
+    scope: Literal["prefix", "asn"]
+    # A CIDR for "prefix", the stored ASN/organisation name for "asn"
+    group: str
+    report_count: int
+    ip_count: int
+    # High-risk counts and the mean use base scores, without correlation-rule points
+    high_risk_ips: int
+    high_risk_reports: int
+    max_threat_score: int
+    mean_base_score: float
+    last_seen: datetime
+    categories: Dict[str, int]
+
+
+class CorrelationsResponse(BaseModel):
+    groups: List[CorrelationGroup]
+    # Only with ?ip=: the correlation features that address would be scored with
+    features: Dict[str, float] | None = None
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Cerberus Threat Intelligence Correlation Engine API"}
@@ -84,57 +213,314 @@ app.add_middleware(
 )
 
 # Initialize services with API keys from .env file (loaded via config.py)
-collector = ThreatIntelCollector(abuseipdb_key=ABUSEIPDB_API_KEY)
+intel_cache = ThreatIntelCache(
+    ttls={"abuseipdb": CACHE_TTL_ABUSEIPDB, "geolocation": CACHE_TTL_GEOLOCATION},
+    max_entries=THREAT_CACHE_MAX_ENTRIES,
+    db_path=THREAT_CACHE_DB_PATH or None,
+)
+feed_index = FeedIndex(manifest_path=LOCAL_FEEDS_MANIFEST or None)
+collector = ThreatIntelCollector(abuseipdb_key=ABUSEIPDB_API_KEY, cache=intel_cache, feed_index=feed_index)
 normalizer = DataNormalizer()
 scorer = ThreatScoringEngine()
-narrator = NarrativeGenerator(openai_key=OPENAI_API_KEY)
+narrative_cache = (
+    NarrativeCache(
+        NARRATIVE_CACHE_DB_PATH,
+        max_entries=NARRATIVE_CACHE_MAX_ENTRIES,
+        ttl=NARRATIVE_CACHE_TTL,
+        cost_per_1k_tokens=NARRATIVE_COST_PER_1K_TOKENS,
+    )
+    if OPENAI_API_KEY and NARRATIVE_CACHE_MAX_ENTRIES > 0
+    else None
+)
+narrator = NarrativeGenerator(
+    openai_key=OPENAI_API_KEY,
+    base_url=OPENAI_BASE_URL or None,
+    timeout=NARRATIVE_TIMEOUT,
+    cache=narrative_cache,
+)
 report_repository = ReportRepository(
     db_path=REPORT_DB_PATH,
     retention_days=REPORT_RETENTION_DAYS,
     retention_limit=REPORT_RETENTION_LIMIT,
+    rollup_retention_days=STATS_ROLLUP_RETENTION_DAYS,
+    pool_size=REPORT_DB_POOL_SIZE,
+    cache_mb=REPORT_DB_CACHE_MB,
+    mmap_mb=REPORT_DB_MMAP_MB,
+    correlation_min_reports=CORRELATION_MIN_REPORTS,
+)
+live_feed = LiveFeed()
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+report_repository.add_listener(live_feed.publish_threadsafe)
+persistence = WriteBehindQueue(
+    report_repository.save_many,
+    batch_size=PERSIST_BATCH_SIZE,
+    flush_interval=PERSIST_FLUSH_INTERVAL,
+    max_pending=PERSIST_MAX_PENDING,
+)
+compactor = RetentionCompactor(
+    partial(report_repository.compact, chunk_size=RETENTION_COMPACT_CHUNK),
+    interval=RETENTION_COMPACT_INTERVAL,
 )
+blacklist_repository = BlacklistRepository(db_path=REPORT_DB_PATH)
+analysis_flights = SingleFlight()
 
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "service": "Cerberus TICE", "version": "1.0.0"}
+    return {
+        "status": "healthy",
+        "service": "Cerberus TICE",
+        "version": "1.0.0",
+        "upstream_quota": collector.quota_state(),
+    }
+
+
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    return {
+        "upstream_cache": intel_cache.stats(),
+        "analysis_coalescing": analysis_flights.stats(),
+        "geo_db": collector.geo_db.stats() if collector.geo_db is not None else None,
+        "report_db_pool": report_repository.pool.stats(),
+        "persistence_queue": persistence.stats(),
+        "retention": compactor.stats(),
+        "narratives": narratives.stats(),
+        "narrative_cache": narrative_cache.stats() if narrative_cache is not None else None,
+        "live_feed": live_feed.stats(),
+        "response_cache": response_cache.stats(),
+    }
+
+
+def _split_fields(fields: str | None) -> List[str] | None:
+    return [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+
+# Distinguishes ETags across restarts, since the repository version starts again at 0
+_ETAG_INSTANCE = uuid.uuid4().hex
+
+
+def _etag(generation: int, *key: Any) -> str:
+    digest = hashlib.sha1(repr((_ETAG_INSTANCE, key)).encode()).hexdigest()[:16]
+    return f'W/"{generation}-{digest}"'
+
+
+def _client_has(request: Request, etag: str) -> bool:
+    return etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+
+
+def _etag_headers(*key: Any) -> Dict[str, str]:
+    """
+    ETag for the current report data and ``key``. Taken before the query runs,
+    so a write racing with it only costs the client an extra 200.
+    """
+    return {"ETag": _etag(report_repository.version, *key), "Cache-Control": "no-cache"}
+
+
+def _json_response(content: Any, headers: Dict[str, str] | None = None) -> Response:
+    """Encode ``content`` (models, dicts, JSONFragment) directly, skipping response_model re-validation."""
+    return Response(dumps(content), media_type="application/json", headers=headers)
+
+
+async def _cached_json(request: Request | None, key: Tuple, build: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    Serve the JSON for ``key`` from ``response_cache`` while the report data is
+    unchanged, otherwise build and cache it. Answers 304 to a matching If-None-Match.
+    """
+    started = time.perf_counter()
+    generation = report_repository.version
+    headers = {"ETag": _etag(generation, *key), "Cache-Control": "no-cache"}
+    if request is not None and _client_has(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(key, generation)
+    hit = body is not None
+    if not hit:
+        body = await build()
+        response_cache.put(key, generation, body)
+    response = Response(body, media_type="application/json", headers=headers)
+    response_cache.observe(hit, time.perf_counter() - started)
+    return response
 
 
-@app.get("/api/v1/reports/recent", response_model=RecentReportsResponse)
-async def get_recent_reports(limit: int = Query(50, ge=1, le=200)):
-    records = await asyncio.to_thread(report_repository.get_recent, limit)
-    reports = [StoredReport(**record) for record in records]
-    return RecentReportsResponse(reports=reports)
+async def _recent_reports_body(
+    limit: int = 50,
+    cursor: str | None = None,
+    ip: str | None = None,
+    risk_level: str | None = None,
+    category: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: List[str] | None = None,
+    network: str | None = None,
+) -> bytes:
+    try:
+        page = await asyncio.to_thread(
+            partial(
+                report_repository.list_reports,
+                limit=limit,
+                cursor=cursor,
+                ip_address=ip,
+                risk_level=risk_level,
+                category=category,
+                since=since,
+                until=until,
+                fields=fields,
+                fragments=True,
+                network=network,
+            )
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Repository rows already have the StoredReport shape; stored JSON columns are spliced in as-is
+    return dumps(page)
+
+
+async def _report_stats_body(hours: int = 24) -> bytes:
+    return dumps(await asyncio.to_thread(report_repository.get_stats, hours))
+
+
+@app.get("/api/v1/reports/recent", response_model=RecentReportsResponse, response_model_exclude_unset=True)
+async def get_recent_reports(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    ip: str | None = None,
+    risk_level: str | None = None,
+    category: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: str | None = None,
+    network: str | None = None,
+    request: Request = None,
+):
+    """
+    Newest reports first. Page with ``cursor`` (the previous page's
+    ``next_cursor``); ``since`` is inclusive, ``until`` exclusive; ``fields`` is
+    a comma-separated projection; ``network`` is a CIDR such as 203.0.113.0/24
+    or 2001:db8::/48.
+    """
+    params = dict(
+        limit=limit,
+        cursor=cursor,
+        ip=ip,
+        risk_level=risk_level.upper() if risk_level else None,
+        category=category,
+        since=since,
+        until=until,
+        fields=_split_fields(fields),
+        network=network,
+    )
+    key = ("recent", *(tuple(value) if isinstance(value, list) else value for value in params.values()))
+    return await _cached_json(request, key, partial(_recent_reports_body, **params))
 
 
 @app.get("/api/v1/reports/stats", response_model=StatsResponse)
-async def get_report_stats(hours: int = Query(24, ge=1, le=168)):
-    stats = await asyncio.to_thread(report_repository.get_stats, hours)
-    top_risks = [TopRisk(**risk) for risk in stats["top_risks"]]
-    volume = [VolumeBucket(**bucket) for bucket in stats["report_volume"]]
-    return StatsResponse(
-        top_risks=top_risks,
-        risk_counts=stats["risk_counts"],
-        category_counts=stats["category_counts"],
-        report_volume=volume,
-        metrics=stats["metrics"],
+async def get_report_stats(
+    hours: int = Query(24, ge=1, le=max(168, STATS_ROLLUP_RETENTION_DAYS * 24)),
+    request: Request = None,
+):
+    # The window is hour-aligned, so the same data gives the same stats until the hour turns
+    key = ("stats", hours, int(datetime.now(timezone.utc).timestamp() // 3600))
+    return await _cached_json(request, key, partial(_report_stats_body, hours))
+
+
+@app.get("/api/v1/reports/export")
+async def export_reports(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    ip: str | None = None,
+    risk_level: str | None = None,
+    category: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fields: str | None = None,
+    network: str | None = None,
+):
+    """Stream every matching stored report, newest first, as NDJSON or CSV (optionally gzipped)."""
+    try:
+        columns = resolve_report_fields(_split_fields(fields))
+        if ip is not None:
+            ip_key(ip)
+        if network is not None:
+            network_key_range(network)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    def fetch_page(cursor: Optional[str]) -> Dict[str, Any]:
+        return report_repository.list_reports(
+            limit=REPORT_EXPORT_BATCH_SIZE,
+            cursor=cursor,
+            ip_address=ip,
+            risk_level=risk_level.upper() if risk_level else None,
+            category=category,
+            since=since,
+            until=until,
+            fields=columns,
+            network=network,
+        )
+
+    filename = f"reports_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(
+        stream_reports(fetch_page, format, columns, gzip_output=gzip),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers=headers,
     )
 
 
-def _validate_ipv4(ip: str) -> bool:
+@app.get("/api/v1/reports/live")
+async def live_reports():
+    """
+    Server-Sent Events: "report" (a newly saved report and the stat deltas it
+    caused), "narrative" (a background narrative was stored), "purge"
+    (retention removed reports) and "resync" (reload; events were dropped).
+    """
+    return StreamingResponse(
+        live_feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/v1/reports/{report_id}", response_model=StoredReport)
+async def get_report(report_id: int, request: Request = None):
+    headers = _etag_headers("report", report_id)
+    if request is not None and _client_has(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    record = await asyncio.to_thread(report_repository.get_report, report_id, True)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return _json_response(record, headers)
+
+
+async def _correlations_body(scope: str | None = None, ip: str | None = None, limit: int = 20) -> bytes:
+    try:
+        result = await asyncio.to_thread(report_repository.list_correlations, scope, limit, ip)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return dumps(result)
+
+
+@app.get("/api/v1/correlations", response_model=CorrelationsResponse, response_model_exclude_unset=True)
+async def get_correlations(
+    scope: Literal["prefix", "asn"] | None = None,
+    ip: str | None = None,
+    limit: int = Query(20, ge=1, le=200),
+    request: Request = None,
+):
+    """
+    Subnet (/24, IPv6 /48) and ASN aggregates over stored reports, the groups with
+    the most high-risk addresses first. With ``ip``, the groups that address
+    belongs to and the correlation features its next analysis is scored with.
+    """
+    key = ("correlations", scope, ip, limit)
+    return await _cached_json(request, key, partial(_correlations_body, scope, ip, limit))
+
+
+def _normalize_ip(ip: str) -> Optional[str]:
+    """Canonical IPv4/IPv6 text (IPv4-mapped IPv6 becomes IPv4), or None if ``ip`` is not an address."""
     try:
-        parts = ip.split(".")
-        if len(parts) != 4:
-            return False
-        for p in parts:
-            if not p.isdigit():
-                return False
-            n = int(p)
-            if n < 0 or n > 255:
-                return False
-        return True
-    except Exception:
-        return False
+        return normalize_ip(ip)
+    except ValueError:
+        return None
 
 
 def _override_threat_score(ip: str, score: int) -> int:
@@ -143,17 +529,37 @@ def _override_threat_score(ip: str, score: int) -> int:
     return score
 
 
-async def _perform_analysis(ip: str) -> Tuple[AnalysisResponse, NormalizedThreatReport]:
-    raw_data = await collector.fetch_all(ip)
+async def _correlate(report: NormalizedThreatReport) -> NormalizedThreatReport:
+    """Attach the subnet and ASN neighbourhood of the address, from stored reports, for the scoring rules."""
+    features = await asyncio.to_thread(report_repository.correlation_features, report.ip_address, report.asn_name)
+    return report.model_copy(update=features)
+
+
+async def _perform_analysis(
+    ip: str, priority: Priority = Priority.INTERACTIVE
+) -> Tuple[AnalysisResponse, NormalizedThreatReport]:
+    raw_data = await collector.fetch_all(ip, priority=priority)
+    sources = raw_data.pop("sources", {})
     report = normalizer.normalize(raw_data, ip)
-    score, triggered = scorer.score(report)
+    report = await _correlate(report)
+    score, base_score, triggered, ruleset_version = scorer.score_with_base(report)
     score = _override_threat_score(ip, score)
+    base_score = _override_threat_score(ip, base_score)
     risk = ThreatScoringEngine.risk_level(score)
-    narrative = await narrator.generate(report, score, risk)
+    narrative_pending = NARRATIVE_MODE == "background" and narrator.llm_enabled
+    if narrative_pending:
+        # A cached LLM narrative is final; otherwise answer with the template for now
+        narrative = await narrator.cached(report, score, risk)
+        narrative_pending = narrative is None
+        if narrative_pending:
+            narrative = narrator.generate_template(report, score, risk)
+    else:
+        narrative = await narrator.generate(report, score, risk)
 
     response = AnalysisResponse(
         ip_address=ip,
         threat_score=score,
+        base_score=base_score,
         risk_level=risk,
         threat_narrative=narrative,
         threat_categories=report.threat_categories,
@@ -162,6 +568,9 @@ async def _perform_analysis(ip: str) -> Tuple[AnalysisResponse, NormalizedThreat
         triggered_rules=triggered,
         malicious_sources=report.malicious_sources,
         abuse_confidence=report.abuse_confidence,
+        ruleset_version=ruleset_version,
+        narrative_pending=narrative_pending,
+        sources=sources,
         raw_data=raw_data,
     )
 
@@ -169,48 +578,276 @@ async def _perform_analysis(ip: str) -> Tuple[AnalysisResponse, NormalizedThreat
 
 
 async def _persist_analysis(response: AnalysisResponse, report: NormalizedThreatReport) -> None:
-    await asyncio.to_thread(
-        report_repository.save_analysis,
-        ip_address=response.ip_address,
-        threat_score=response.threat_score,
-        risk_level=response.risk_level,
-        abuse_confidence=response.abuse_confidence,
-        total_reports=report.total_reports,
-        categories=response.threat_categories,
-        triggered_rules=response.triggered_rules,
-        narrative=response.threat_narrative,
-        country=report.country,
-        asn=report.asn_name,
-        raw_data=response.raw_data,
+    """Queue the analysis for the write-behind writer; waits only when the queue is full."""
+    analyzed_at = datetime.now(timezone.utc)
+    if response.narrative_pending:
+        job = {"ip_address": response.ip_address, "analyzed_at": analyzed_at, "report": report, "response": response}
+        # A full narrative queue leaves this analysis with its template narrative
+        response.narrative_pending = narratives.submit(job)
+    await persistence.submit(
+        {
+            "ip_address": response.ip_address,
+            "threat_score": response.threat_score,
+            "base_score": response.base_score,
+            "risk_level": response.risk_level,
+            "abuse_confidence": response.abuse_confidence,
+            "total_reports": report.total_reports,
+            "categories": response.threat_categories,
+            "triggered_rules": response.triggered_rules,
+            "narrative": response.threat_narrative,
+            "country": report.country,
+            "asn": report.asn_name,
+            "raw_data": response.raw_data,
+            "ruleset_version": response.ruleset_version,
+            "narrative_pending": response.narrative_pending,
+            "analyzed_at": analyzed_at,
+        }
     )
 
 
+async def _generate_narrative(job: Dict[str, Any]) -> str:
+    response = job["response"]
+    return await narrator.generate_llm(job["report"], response.threat_score, response.risk_level)
+
+
+async def _store_narrative(job: Dict[str, Any], narrative: str | None) -> None:
+    """Write a background narrative onto its stored report (or just clear the pending flag)."""
+    update = partial(report_repository.update_narrative, job["ip_address"], job["analyzed_at"], narrative)
+    if not await asyncio.to_thread(update):
+        # The report may still be waiting in the write-behind queue
+        await persistence.flush()
+        await asyncio.to_thread(update)
+
+
+narratives = NarrativeWorkerPool(
+    _generate_narrative,
+    _store_narrative,
+    workers=NARRATIVE_WORKERS,
+    timeout=NARRATIVE_TIMEOUT,
+    max_pending=NARRATIVE_MAX_PENDING,
+)
+
+
+async def _run_pipeline(ip: str, priority: Priority) -> AnalysisResponse:
+    response, report = await _perform_analysis(ip, priority=priority)
+    await _persist_analysis(response, report)
+    return response
+
+
+async def _analyze_and_persist(ip: str, priority: Priority = Priority.INTERACTIVE) -> AnalysisResponse:
+    """
+    Analyze and store ``ip``, sharing one pipeline run between concurrent callers.
+    Bulk callers join an interactive run of the same IP, but an interactive caller
+    never joins a bulk run, which may be queued behind batch work in the rate limiter.
+    """
+    if priority != Priority.INTERACTIVE and analysis_flights.in_flight((ip, Priority.INTERACTIVE)):
+        priority = Priority.INTERACTIVE
+    return await analysis_flights.do((ip, priority), _run_pipeline, ip, priority)
+
+
 @app.post("/api/v1/analyze", response_model=AnalysisResponse)
 async def analyze_ip(request: AnalysisRequest):
-    ip = request.ip_address.strip()
-    if not _validate_ipv4(ip):
+    ip = _normalize_ip(request.ip_address)
+    if ip is None:
         raise HTTPException(status_code=400, detail="Invalid IP address format")
 
-    response, report = await _perform_analysis(ip)
-    await _persist_analysis(response, report)
+    return _json_response(await _analyze_and_persist(ip))
+
+
+async def _analyze_batch(ips: List[str]) -> BatchAnalysisResponse:
+    # Normalize before deduplicating, so "::ffff:1.2.3.4" and "1.2.3.4" are analyzed once
+    unique_ips = list(dict.fromkeys(_normalize_ip(ip) or ip.strip() for ip in ips if ip and ip.strip()))
+    if len(unique_ips) > BATCH_MAX_IPS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the maximum of {BATCH_MAX_IPS} unique IP addresses",
+        )
+
+    semaphore = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+
+    async def analyze_one(ip: str) -> BatchAnalysisItem:
+        if _normalize_ip(ip) is None:
+            return BatchAnalysisItem(ip_address=ip, status="error", error="Invalid IP address format")
+        async with semaphore:
+            try:
+                response = await _analyze_and_persist(ip, priority=Priority.BULK)
+            except Exception as exc:  # noqa: BLE001
+                return BatchAnalysisItem(ip_address=ip, status="error", error=str(exc) or type(exc).__name__)
+        return BatchAnalysisItem(ip_address=ip, status="ok", result=response)
+
+    results = await asyncio.gather(*(analyze_one(ip) for ip in unique_ips))
+    succeeded = sum(1 for item in results if item.status == "ok")
+    return BatchAnalysisResponse(
+        total=len(ips),
+        unique=len(unique_ips),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=list(results),
+    )
+
+
+@app.post("/api/v1/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(request: BatchAnalysisRequest):
+    return _json_response(await _analyze_batch(request.ip_addresses))
+
+
+@app.post("/api/v1/analyze/batch/upload", response_model=BatchAnalysisResponse)
+async def analyze_batch_upload(request: Request):
+    """Analyze a newline-delimited list (or bare JSON array) of IPs sent as the raw request body."""
+    body = (await request.body()).decode("utf-8", errors="replace")
+    if body.lstrip().startswith("["):
+        try:
+            ips = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Malformed JSON array")
+        if not isinstance(ips, list) or not all(isinstance(ip, str) for ip in ips):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of IP address strings")
+    else:
+        ips = [
+            line.strip()
+            for line in body.splitlines()
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    return _json_response(await _analyze_batch(ips))
+
+
+def _score_abuseipdb_summary(ip: str, summary: Dict[str, Any]) -> ScoredAddress:
+    """Score an AbuseIPDB-only summary (bulk endpoints carry no geolocation)."""
+    report = normalizer.normalize({"abuseipdb": summary, "geolocation": {}}, ip)
+    score, triggered = scorer.score(report)
+    score = _override_threat_score(ip, score)
+    return ScoredAddress(
+        ip_address=ip,
+        threat_score=score,
+        risk_level=ThreatScoringEngine.risk_level(score),
+        abuse_confidence=report.abuse_confidence,
+        total_reports=report.total_reports,
+        threat_categories=report.threat_categories,
+        triggered_rules=triggered,
+        country_code=report.country_code,
+        last_reported_at=summary.get("last_reported_at") or None,
+    )
 
-    return response
+
+@app.post("/api/v1/analyze/block", response_model=BulkScoreResponse)
+async def analyze_block(request: BlockAnalysisRequest):
+    """Score every reported address in a CIDR from a single AbuseIPDB /check-block call."""
+    try:
+        network = ipaddress.ip_network(request.network.strip(), strict=False)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid CIDR network")
+    if network.version != 4 or network.prefixlen < 16:
+        raise HTTPException(status_code=400, detail="Only IPv4 networks of /16 or smaller are supported")
+
+    try:
+        summaries = await collector.fetch_check_block(str(network), max_age_days=request.max_age_days)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=502, detail=f"AbuseIPDB check-block failed: {exc}")
+
+    results = [_score_abuseipdb_summary(summary["ip_address"], summary) for summary in summaries]
+    results.sort(key=lambda item: item.threat_score, reverse=True)
+    return _json_response(
+        BulkScoreResponse(source="abuseipdb/check-block", network=str(network), count=len(results), results=results)
+    )
+
+
+@app.post("/api/v1/blacklist/sync")
+async def sync_blacklist(
+    confidence_minimum: int = Query(90, ge=25, le=100),
+    limit: int = Query(10000, ge=1, le=500000),
+):
+    """Pull the AbuseIPDB /blacklist feed into the local blacklist table."""
+    try:
+        entries = await collector.fetch_blacklist(confidence_minimum=confidence_minimum, limit=limit)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=502, detail=f"AbuseIPDB blacklist download failed: {exc}")
+    stored = await asyncio.to_thread(blacklist_repository.replace_all, entries)
+    return {"stored": stored, **(await asyncio.to_thread(blacklist_repository.summary))}
+
+
+@app.get("/api/v1/blacklist", response_model=BulkScoreResponse)
+async def get_blacklist(
+    min_confidence: int = Query(0, ge=0, le=100),
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """Score entries of the locally stored blacklist without any upstream calls."""
+    rows = await asyncio.to_thread(blacklist_repository.get_entries, min_confidence, limit)
+    summary = await asyncio.to_thread(blacklist_repository.summary)
+    results = [
+        _score_abuseipdb_summary(
+            row["ip_address"],
+            ThreatIntelCollector.summarize_abuseipdb(
+                {
+                    "abuseConfidenceScore": row["abuse_confidence"],
+                    "countryCode": row["country_code"],
+                    "lastReportedAt": row["last_reported_at"],
+                },
+                row,
+            ),
+        )
+        for row in rows
+    ]
+    return _json_response(
+        BulkScoreResponse(
+            source="abuseipdb/blacklist",
+            count=len(results),
+            synced_at=summary["synced_at"],
+            results=results,
+        )
+    )
+
+
+@app.get("/api/v1/rules")
+async def get_rules():
+    return {**scorer.ruleset.describe(), "reload_error": scorer.reload_error}
+
+
+@app.post("/api/v1/rules/reload")
+async def reload_rules():
+    """Recompile the scoring rule file now instead of waiting for the periodic check."""
+    try:
+        ruleset = await asyncio.to_thread(scorer.reload)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail=f"Rule file rejected, keeping {scorer.version}: {exc}")
+    return ruleset.describe()
+
+
+@app.get("/api/v1/feeds")
+async def get_feeds():
+    return feed_index.stats()
+
+
+@app.post("/api/v1/feeds/reload")
+async def reload_feeds():
+    """Rebuild the local feed index from the manifest and swap it in atomically."""
+    if not feed_index.manifest_path:
+        raise HTTPException(status_code=400, detail="LOCAL_FEEDS_MANIFEST is not configured")
+    try:
+        return await asyncio.to_thread(feed_index.reload)
+    except (OSError, ValueError, KeyError) as exc:
+        raise HTTPException(status_code=400, detail=f"Could not load feed manifest: {exc}")
+
+
+@app.post("/api/v1/feeds/lookup")
+async def lookup_feeds(request: FeedLookupRequest):
+    """Match IPs against the local feed index only; no upstream calls are made."""
+    unique_ips = list(dict.fromkeys(ip.strip() for ip in request.ip_addresses if ip and ip.strip()))
+    return {"matches": {ip: feed_index.lookup(ip) for ip in unique_ips}}
 
 
 @app.post("/api/v1/analyze/export")
 async def export_analysis(request: AnalysisRequest):
-    ip = request.ip_address.strip()
-    if not _validate_ipv4(ip):
+    ip = _normalize_ip(request.ip_address)
+    if ip is None:
         raise HTTPException(status_code=400, detail="Invalid IP address format")
 
-    response, report = await _perform_analysis(ip)
-    await _persist_analysis(response, report)
+    response = await _analyze_and_persist(ip)
 
     payload = response.model_dump()
     payload["generated_at"] = datetime.utcnow().isoformat() + "Z"
     json_bytes = json.dumps(payload, indent=2, default=str).encode("utf-8")
 
-    filename = f"{ip.replace('.', '_')}_analysis.json"
+    filename = f"{ip.replace('.', '_').replace(':', '_')}_analysis.json"
     headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
 
     return StreamingResponse(BytesIO(json_bytes), media_type="application/json", headers=headers)
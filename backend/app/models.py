@@ -1,9 +1,9 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
 class AnalysisRequest(BaseModel):
-    ip_address: str = Field(..., description="IPv4 address to analyze", example="1.2.3.4")
+    ip_address: str = Field(..., description="IPv4 or IPv6 address to analyze", example="1.2.3.4")
 
 
 class NormalizedThreatReport(BaseModel):
@@ -18,12 +18,41 @@ class NormalizedThreatReport(BaseModel):
     asn_name: str = Field(default="Unknown")
     open_ports: List[int] = Field(default_factory=list)
     total_reports: int = Field(default=0, ge=0)
+    feed_matches: List[str] = Field(default_factory=list)
     timestamp: Optional[str] = None
+    # Neighbourhood features from stored reports of the same /24 (IPv6 /48) and ASN, this address excluded
+    prefix_neighbor_ips: int = Field(default=0, ge=0)
+    prefix_high_risk_neighbors: int = Field(default=0, ge=0)
+    prefix_neighbor_mean_score: float = Field(default=0, ge=0, le=100)
+    asn_neighbor_ips: int = Field(default=0, ge=0)
+    asn_high_risk_neighbors: int = Field(default=0, ge=0)
+    asn_neighbor_mean_score: float = Field(default=0, ge=0, le=100)
+
+
+# The NormalizedThreatReport fields filled in from stored reports by the correlation stage
+CORRELATION_FIELDS = (
+    "prefix_neighbor_ips",
+    "prefix_high_risk_neighbors",
+    "prefix_neighbor_mean_score",
+    "asn_neighbor_ips",
+    "asn_high_risk_neighbors",
+    "asn_neighbor_mean_score",
+)
+
+
+class SourceStatus(BaseModel):
+    origin: Literal["cache", "live", "local"] = Field(
+        ..., description="'cache', 'live', or 'local' for answers from the local geo database"
+    )
+    tier: Optional[str] = None
+    age_seconds: float = 0
 
 
 class AnalysisResponse(BaseModel):
     ip_address: str
     threat_score: int = Field(..., ge=0, le=100)
+    # threat_score without the points of rules on subnet/ASN correlation features
+    base_score: Optional[int] = Field(None, ge=0, le=100)
     risk_level: str
     threat_narrative: str
     threat_categories: List[str] = Field(default_factory=list)
@@ -32,6 +61,56 @@ class AnalysisResponse(BaseModel):
     triggered_rules: List[str] = Field(default_factory=list)
     malicious_sources: int
     abuse_confidence: float
+    ruleset_version: Optional[str] = None
+    # True while the template narrative stands in for an LLM narrative still being generated
+    narrative_pending: bool = False
+    sources: Dict[str, SourceStatus] = Field(default_factory=dict)
     raw_data: Dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchAnalysisRequest(BaseModel):
+    ip_addresses: List[str] = Field(..., description="IPv4 or IPv6 addresses to analyze", example=["1.2.3.4", "5.6.7.8"])
+
+
+class BatchAnalysisItem(BaseModel):
+    ip_address: str
+    status: str
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    total: int
+    unique: int
+    succeeded: int
+    failed: int
+    results: List[BatchAnalysisItem] = Field(default_factory=list)
+
+
+class BlockAnalysisRequest(BaseModel):
+    network: str = Field(..., description="IPv4 CIDR to scan", example="203.0.113.0/24")
+    max_age_days: int = Field(default=30, ge=1, le=365)
+
+
+class ScoredAddress(BaseModel):
+    ip_address: str
+    threat_score: int = Field(..., ge=0, le=100)
+    risk_level: str
+    abuse_confidence: float
+    total_reports: int
+    threat_categories: List[str] = Field(default_factory=list)
+    triggered_rules: List[str] = Field(default_factory=list)
+    country_code: str
+    last_reported_at: Optional[str] = None
+
+
+class BulkScoreResponse(BaseModel):
+    source: str
+    network: Optional[str] = None
+    count: int
+    synced_at: Optional[str] = None
+    results: List[ScoredAddress] = Field(default_factory=list)
+
+
+class FeedLookupRequest(BaseModel):
+    ip_addresses: List[str] = Field(..., description="IPv4 or IPv6 addresses to match against local feeds")
@@ -0,0 +1,90 @@
+"""Local copy of the AbuseIPDB blacklist feed."""
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class BlacklistRepository:
+    def __init__(self, db_path: str) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _initialize(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS abuseipdb_blacklist (
+                    ip_address TEXT PRIMARY KEY,
+                    abuse_confidence INTEGER NOT NULL,
+                    country_code TEXT,
+                    last_reported_at TEXT,
+                    synced_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_blacklist_confidence "
+                "ON abuseipdb_blacklist(abuse_confidence DESC)"
+            )
+            conn.commit()
+
+    def replace_all(self, entries: Iterable[Dict[str, Any]], synced_at: Optional[datetime] = None) -> int:
+        """Swap in a freshly downloaded feed in a single transaction; returns the row count."""
+        synced = (synced_at or datetime.now(timezone.utc)).isoformat()
+        rows = [
+            (
+                entry["ipAddress"],
+                int(entry.get("abuseConfidenceScore", 0) or 0),
+                entry.get("countryCode") or "Unknown",
+                entry.get("lastReportedAt") or "",
+                synced,
+            )
+            for entry in entries
+        ]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM abuseipdb_blacklist")
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO abuseipdb_blacklist (
+                    ip_address, abuse_confidence, country_code, last_reported_at, synced_at
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+        return len(rows)
+
+    def get_entries(self, min_confidence: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT ip_address, abuse_confidence, country_code, last_reported_at, synced_at
+                FROM abuseipdb_blacklist
+                WHERE abuse_confidence >= ?
+                ORDER BY abuse_confidence DESC, ip_address
+                LIMIT ?
+                """,
+                (min_confidence, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, ip_address: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM abuseipdb_blacklist WHERE ip_address = ?", (ip_address,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def summary(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS entries, MAX(synced_at) AS synced_at FROM abuseipdb_blacklist"
+            ).fetchone()
+        return {"entries": row["entries"], "synced_at": row["synced_at"]}
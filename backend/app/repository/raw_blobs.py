@@ -0,0 +1,46 @@
+"""Canonical encoding and compression for content-addressed raw_data payloads."""
+import hashlib
+import json
+import zlib
+from typing import Any, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+
+def canonical_bytes(value: Any) -> bytes:
+    """Key-sorted compact JSON, so equal payloads always hash to the same digest."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def digest_of(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def compress(payload: bytes) -> Tuple[str, bytes]:
+    """Return ``(codec, data)``; zstd when installed, otherwise zlib."""
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return "zlib", zlib.compress(payload, ZLIB_LEVEL)
+
+
+def decompress_bytes(codec: str, data: bytes) -> bytes:
+    """The stored canonical JSON, still encoded."""
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Stored payload is zstd-compressed; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown raw payload codec {codec!r}")
+
+
+def decompress(codec: str, data: bytes) -> Any:
+    return json.loads(decompress_bytes(codec, data))
@@ -1,8 +1,101 @@
+import base64
+import itertools
 import json
+import logging
 import sqlite3
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import RISK_LEVELS
+from ..ip_keys import PREFIX_KEY_BYTES, ip_key, ip_key_or_none, key_prefix, network_key_range
+from ..json_codec import JSONFragment
+from ..models import CORRELATION_FIELDS
+from . import raw_blobs
+from .sqlite_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+# Largest number of bound parameters used in one "IN (...)" clause
+_IN_CHUNK = 500
+HOUR_MS = 3_600_000
+# Stats windows longer than this are charted in daily rather than hourly buckets
+HOURLY_VOLUME_MAX_HOURS = 168
+# Reports scoring at least this are counted as high risk by the correlation aggregates
+HIGH_RISK_SCORE = RISK_LEVELS["HIGH"][0]
+# ASN values that mean "no ASN"; such reports only join their subnet's aggregates
+UNKNOWN_ASNS = frozenset({"", "Unknown"})
+# Each scope fills the CORRELATION_FIELDS named "<scope>_..."
+CORRELATION_SCOPES = ("prefix", "asn")
+# Per-group columns, and how each is derived from the group's ip_summary rows
+_GROUP_AGGREGATES = {
+    "report_count": "SUM(report_count)",
+    "score_sum": "SUM(score_sum)",
+    "high_risk_reports": "SUM(high_risk_reports)",
+    "ip_count": "COUNT(*)",
+    "high_risk_ips": "SUM(high_risk_reports > 0)",
+    "max_threat_score": "MAX(max_threat_score)",
+    "last_seen_ts": "MAX(last_seen_ts)",
+}
+
+
+# Listing fields and the SQL columns each needs; raw_data is only served by get_report
+REPORT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "id": ("r.id",),
+    "ip_address": ("r.ip_address",),
+    "analyzed_at": ("r.analyzed_at",),
+    "threat_score": ("r.threat_score",),
+    "risk_level": ("r.risk_level",),
+    "abuse_confidence": ("r.abuse_confidence",),
+    "total_reports": ("r.total_reports",),
+    "categories": ("r.categories",),
+    "triggered_rules": ("r.triggered_rules",),
+    "narrative": ("r.narrative",),
+    "country": ("r.country",),
+    "asn": ("r.asn",),
+    "ruleset_version": ("r.ruleset_version",),
+    "narrative_pending": ("r.narrative_pending",),
+    "occurrence_count": ("s.report_count AS occurrence_count",),
+    "is_new": ("s.report_count AS occurrence_count", "s.first_seen_ts AS first_seen_ts"),
+}
+JSON_FIELDS = frozenset({"categories", "triggered_rules"})
+BOOL_FIELDS = frozenset({"narrative_pending"})
+# Fields that need the ip_summary join
+SUMMARY_FIELDS = frozenset({"occurrence_count", "is_new"})
+
+
+def resolve_report_fields(fields: Optional[Iterable[str]]) -> List[str]:
+    """Validated ``fields`` in REPORT_FIELDS order, always including id and analyzed_at; all fields when empty."""
+    if not fields:
+        return list(REPORT_FIELDS)
+    wanted = set(fields)
+    unknown = wanted - REPORT_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown report fields: {', '.join(sorted(unknown))}")
+    wanted.update(("id", "analyzed_at"))
+    return [field for field in REPORT_FIELDS if field in wanted]
+
+
+def encode_cursor(analyzed_ts: int, report_id: int) -> str:
+    """Opaque keyset cursor for the position just after ``(analyzed_ts, report_id)``."""
+    return base64.urlsafe_b64encode(f"{analyzed_ts}:{report_id}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        analyzed_ts, report_id = raw.split(":")
+        return int(analyzed_ts), int(report_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+
+
+def to_millis(value: datetime) -> int:
+    """Sortable integer timestamp (UTC milliseconds); naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
 
 
 class ReportRepository:
@@ -11,27 +104,56 @@ class ReportRepository:
         db_path: str,
         retention_days: int = 7,
         retention_limit: int = 1000,
+        rollup_retention_days: int = 400,
+        pool_size: int = 8,
+        cache_mb: int = 64,
+        mmap_mb: int = 256,
+        correlation_min_reports: int = 5,
     ) -> None:
         self.db_path = Path(db_path)
         self.retention_days = retention_days
         self.retention_limit = retention_limit
+        self.rollup_retention_days = rollup_retention_days
+        self.correlation_min_reports = correlation_min_reports
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = SQLitePool(db_path, size=pool_size, cache_mb=cache_mb, mmap_mb=mmap_mb)
+        self._listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+        self._versions = itertools.count(1)
+        # Bumped after every committed change; lets GET handlers answer 304 without querying
+        self.version = 0
         self._initialize()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self) -> None:
+        self.pool.close()
+
+    def add_listener(self, listener: Callable[[str, List[Dict[str, Any]]], None]) -> None:
+        """
+        Call ``listener(kind, items)`` in the writing thread after each commit:
+        "report" (saved reports with their stat deltas), "narrative" (settled
+        background narratives) or "purge" (retention removed reports).
+        """
+        self._listeners.append(listener)
+
+    def _changed(self, kind: str, items: List[Dict[str, Any]]) -> None:
+        self.version = next(self._versions)
+        for listener in self._listeners:
+            try:
+                listener(kind, items)
+            except Exception as exc:  # noqa: BLE001
+                # The write is already committed; a failing listener must not make callers retry it
+                logger.error("Report listener failed: %s", exc)
 
     def _initialize(self) -> None:
-        with self._connect() as conn:
+        with self.pool.writer() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS reports (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     ip_address TEXT NOT NULL,
+                    ip_key BLOB,
                     analyzed_at TEXT NOT NULL,
                     threat_score INTEGER NOT NULL,
+                    base_score INTEGER,
                     risk_level TEXT NOT NULL,
                     abuse_confidence REAL NOT NULL,
                     total_reports INTEGER,
@@ -40,20 +162,437 @@ class ReportRepository:
                     narrative TEXT,
                     country TEXT,
                     asn TEXT,
-                    raw_data TEXT NOT NULL
+                    raw_refs TEXT NOT NULL DEFAULT '{}',
+                    ruleset_version TEXT,
+                    analyzed_ts INTEGER NOT NULL,
+                    narrative_pending INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reports)")}
+            if "ruleset_version" not in columns:
+                conn.execute("ALTER TABLE reports ADD COLUMN ruleset_version TEXT")
+            if "narrative_pending" not in columns:
+                conn.execute("ALTER TABLE reports ADD COLUMN narrative_pending INTEGER NOT NULL DEFAULT 0")
+            if "base_score" not in columns:
+                # Reports stored before it was recorded fall back to threat_score
+                conn.execute("ALTER TABLE reports ADD COLUMN base_score INTEGER")
+            if "analyzed_ts" not in columns:
+                conn.execute("ALTER TABLE reports ADD COLUMN analyzed_ts INTEGER")
+                conn.execute(
+                    """
+                    UPDATE reports
+                    SET analyzed_ts = CAST(ROUND((julianday(analyzed_at) - 2440587.5) * 86400000) AS INTEGER)
+                    """
+                )
+            if "ip_key" not in columns:
+                conn.create_function("ip_key", 1, ip_key_or_none, deterministic=True)
+                conn.execute("ALTER TABLE reports ADD COLUMN ip_key BLOB")
+                conn.execute("UPDATE reports SET ip_key = ip_key(ip_address)")
+            # analyzed_at is kept for display only; all ordering and filtering uses analyzed_ts
+            conn.execute("DROP INDEX IF EXISTS idx_reports_analyzed_at")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_analyzed_ts ON reports(analyzed_ts)"
+            )
+            # Listing filters seek on (filter, analyzed_ts); rowid breaks ties, so each
+            # index also yields the (analyzed_ts, id) keyset order without a sort
+            # IPs are matched on the packed ip_key, so a network filter is a single range scan
+            conn.execute("DROP INDEX IF EXISTS idx_reports_ip")
+            conn.execute("DROP INDEX IF EXISTS idx_reports_ip_ts")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_ip_key_ts ON reports(ip_key, analyzed_ts)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reports_risk_ts ON reports(risk_level, analyzed_ts)"
+            )
+
+            has_summary = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ip_summary'"
+            ).fetchone()
+            summary_columns = {row["name"] for row in conn.execute("PRAGMA table_info(ip_summary)")}
+            if has_summary and not {"ip_key", "asn", "score_sum"} <= summary_columns:
+                # Summaries from before the packed key and correlation columns; they are derived data
+                conn.execute("DROP TABLE ip_summary")
+                has_summary = None
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ip_summary (
+                    ip_key BLOB PRIMARY KEY,
+                    ip_address TEXT NOT NULL,
+                    first_seen_ts INTEGER NOT NULL,
+                    last_seen_ts INTEGER NOT NULL,
+                    report_count INTEGER NOT NULL,
+                    max_threat_score INTEGER NOT NULL,
+                    top_report_id INTEGER NOT NULL,
+                    asn TEXT NOT NULL,
+                    score_sum INTEGER NOT NULL,
+                    high_risk_reports INTEGER NOT NULL
                 )
                 """
             )
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_reports_analyzed_at ON reports(analyzed_at DESC)"
+                """
+                CREATE INDEX IF NOT EXISTS idx_ip_summary_score
+                ON ip_summary(max_threat_score DESC, last_seen_ts DESC)
+                """
             )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ip_summary_asn ON ip_summary(asn)")
+            if not has_summary:
+                self._rebuild_summary(conn)
+
+            # Subnet and ASN aggregates for correlation scoring, kept in step with ip_summary
+            has_correlations = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'correlation_groups'"
+            ).fetchone()
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_reports_ip ON reports(ip_address)"
+                """
+                CREATE TABLE IF NOT EXISTS correlation_groups (
+                    scope TEXT NOT NULL,
+                    group_key TEXT NOT NULL,
+                    report_count INTEGER NOT NULL,
+                    score_sum INTEGER NOT NULL,
+                    high_risk_reports INTEGER NOT NULL,
+                    ip_count INTEGER NOT NULL,
+                    high_risk_ips INTEGER NOT NULL,
+                    max_threat_score INTEGER NOT NULL,
+                    last_seen_ts INTEGER NOT NULL,
+                    PRIMARY KEY (scope, group_key)
+                ) WITHOUT ROWID
+                """
             )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_correlation_groups_rank
+                ON correlation_groups(scope, high_risk_ips DESC, max_threat_score DESC)
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS correlation_categories (
+                    scope TEXT NOT NULL,
+                    group_key TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (scope, group_key, category)
+                ) WITHOUT ROWID
+                """
+            )
+
+            existing = {
+                row["name"]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_categories (
+                    report_id INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    analyzed_ts INTEGER NOT NULL,
+                    PRIMARY KEY (report_id, category)
+                )
+                """
+            )
+            if "report_categories" not in existing:
+                conn.execute(
+                    """
+                    INSERT OR IGNORE INTO report_categories (report_id, category, analyzed_ts)
+                    SELECT reports.id, c.value, reports.analyzed_ts FROM reports, json_each(reports.categories) c
+                    """
+                )
+            elif "analyzed_ts" not in {row["name"] for row in conn.execute("PRAGMA table_info(report_categories)")}:
+                conn.execute("ALTER TABLE report_categories ADD COLUMN analyzed_ts INTEGER NOT NULL DEFAULT 0")
+                conn.execute(
+                    """
+                    UPDATE report_categories
+                    SET analyzed_ts = (SELECT analyzed_ts FROM reports WHERE reports.id = report_categories.report_id)
+                    """
+                )
+            # Copy of the report's analyzed_ts, so a category listing is one range scan in keyset order
+            conn.execute("DROP INDEX IF EXISTS idx_report_categories_category")
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_report_categories_ts
+                ON report_categories(category, analyzed_ts, report_id)
+                """
+            )
+
+            if not has_summary or not has_correlations:
+                self._rebuild_correlations(conn)
+
+            # Hour-bucketed counters; these are not trimmed by report retention
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS risk_hourly (
+                    hour INTEGER NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (hour, risk_level)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS category_hourly (
+                    hour INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (hour, category)
+                )
+                """
+            )
+            if "risk_hourly" not in existing:
+                conn.execute(
+                    f"""
+                    INSERT INTO risk_hourly (hour, risk_level, count)
+                    SELECT analyzed_ts / {HOUR_MS}, risk_level, COUNT(*) FROM reports
+                    GROUP BY 1, 2
+                    """
+                )
+            if "category_hourly" not in existing:
+                conn.execute(
+                    f"""
+                    INSERT INTO category_hourly (hour, category, count)
+                    SELECT r.analyzed_ts / {HOUR_MS}, c.category, COUNT(*)
+                    FROM report_categories c JOIN reports r ON r.id = c.report_id
+                    GROUP BY 1, 2
+                    """
+                )
+
+            # raw_data payloads, one blob per source key, shared by every report with the same content
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS raw_blobs (
+                    digest TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    refs INTEGER NOT NULL
+                )
+                """
+            )
+            if "raw_data" in columns:
+                self._migrate_inline_raw_data(conn, "raw_refs" in columns)
+
+            # Single-row counters kept exact by triggers, so metrics never scan reports or ip_summary
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    reports INTEGER NOT NULL,
+                    unique_ips INTEGER NOT NULL
+                )
+                """
+            )
+            if "report_totals" not in existing:
+                conn.execute(
+                    """
+                    INSERT INTO report_totals (id, reports, unique_ips)
+                    VALUES (1, (SELECT COUNT(*) FROM reports), (SELECT COUNT(*) FROM ip_summary))
+                    """
+                )
+            for table, column in (("reports", "reports"), ("ip_summary", "unique_ips")):
+                for event, delta in (("INSERT", "+ 1"), ("DELETE", "- 1")):
+                    conn.execute(
+                        f"""
+                        CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()} AFTER {event} ON {table}
+                        BEGIN UPDATE report_totals SET {column} = {column} {delta} WHERE id = 1; END
+                        """
+                    )
             conn.commit()
 
-    def save_analysis(
+    def _migrate_inline_raw_data(self, conn: sqlite3.Connection, has_refs: bool) -> None:
+        """Move the legacy inline raw_data column into raw_blobs, then drop it."""
+        if not has_refs:
+            conn.execute("ALTER TABLE reports ADD COLUMN raw_refs TEXT NOT NULL DEFAULT '{}'")
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, raw_data FROM reports WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                "UPDATE reports SET raw_refs = ? WHERE id = ?",
+                [
+                    (json.dumps(self._store_raw(conn, json.loads(row["raw_data"]) if row["raw_data"] else {})), row["id"])
+                    for row in rows
+                ],
+            )
+            last_id = rows[-1]["id"]
+        conn.execute("ALTER TABLE reports DROP COLUMN raw_data")
+
+    def _store_raw(self, conn: sqlite3.Connection, raw_data: Dict[str, Any]) -> Dict[str, str]:
+        """Store each top-level raw_data entry as a blob (or add a reference); returns key -> digest."""
+        refs: Dict[str, str] = {}
+        for key, value in (raw_data or {}).items():
+            payload = raw_blobs.canonical_bytes(value)
+            digest = raw_blobs.digest_of(payload)
+            refs[key] = digest
+            if conn.execute("UPDATE raw_blobs SET refs = refs + 1 WHERE digest = ?", (digest,)).rowcount:
+                continue
+            codec, data = raw_blobs.compress(payload)
+            conn.execute(
+                "INSERT INTO raw_blobs (digest, codec, data, raw_size, refs) VALUES (?, ?, ?, ?, 1)",
+                (digest, codec, data, len(payload)),
+            )
+        return refs
+
+    def _rebuild_summary(self, conn: sqlite3.Connection, keys: Optional[Iterable[bytes]] = None) -> None:
+        """
+        Recompute ip_summary rows from reports, for the given ip_keys or for every IP.
+        An address keeps the ASN it was first stored with while it has reports left.
+        """
+        select = f"""
+            INSERT INTO ip_summary (
+                ip_key, ip_address, first_seen_ts, last_seen_ts, report_count, max_threat_score, top_report_id,
+                asn, score_sum, high_risk_reports
+            )
+            SELECT
+                r.ip_key,
+                MIN(r.ip_address),
+                MIN(r.analyzed_ts),
+                MAX(r.analyzed_ts),
+                COUNT(*),
+                MAX(r.threat_score),
+                (
+                    SELECT t.id FROM reports t
+                    WHERE t.ip_key = r.ip_key
+                    ORDER BY t.threat_score DESC, t.analyzed_ts DESC, t.id DESC
+                    LIMIT 1
+                ),
+                (
+                    SELECT t.asn FROM reports t
+                    WHERE t.ip_key = r.ip_key
+                    ORDER BY t.analyzed_ts, t.id
+                    LIMIT 1
+                ),
+                SUM(COALESCE(r.base_score, r.threat_score)),
+                SUM(COALESCE(r.base_score, r.threat_score) >= {HIGH_RISK_SCORE})
+            FROM reports r
+            {{where}}
+            GROUP BY r.ip_key
+        """
+        if keys is None:
+            conn.execute("DELETE FROM ip_summary")
+            conn.execute(select.format(where="WHERE r.ip_key IS NOT NULL"))
+            return
+        keys = [key for key in keys if key is not None]
+        for start in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[start:start + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            conn.execute(
+                f"""
+                DELETE FROM ip_summary WHERE ip_key IN ({marks})
+                AND NOT EXISTS (SELECT 1 FROM reports r WHERE r.ip_key = ip_summary.ip_key)
+                """,
+                chunk,
+            )
+            conn.execute(
+                select.format(where=f"WHERE r.ip_key IN ({marks})")
+                + """
+                ON CONFLICT(ip_key) DO UPDATE SET
+                    first_seen_ts = excluded.first_seen_ts,
+                    last_seen_ts = excluded.last_seen_ts,
+                    report_count = excluded.report_count,
+                    max_threat_score = excluded.max_threat_score,
+                    top_report_id = excluded.top_report_id,
+                    score_sum = excluded.score_sum,
+                    high_risk_reports = excluded.high_risk_reports
+                """,
+                chunk,
+            )
+
+    def _rebuild_correlations(
         self,
+        conn: sqlite3.Connection,
+        groups: Optional[Iterable[Tuple[str, str]]] = None,
+    ) -> None:
+        """
+        Recompute correlation_groups from ip_summary, for the given ``(scope, group_key)``
+        pairs or for every group; a full rebuild also recounts correlation_categories.
+        """
+        columns = ", ".join(_GROUP_AGGREGATES)
+        aggregates = ", ".join(_GROUP_AGGREGATES.values())
+        unknown = ",".join("?" * len(UNKNOWN_ASNS))
+        if groups is None:
+            # Group on the leading ip_key bytes and label each distinct prefix once, rather than
+            # parsing every address in Python
+            prefix_of = "substr({0}, 1, CASE length({0}) WHEN 5 THEN %d ELSE %d END)" % (
+                PREFIX_KEY_BYTES[4], PREFIX_KEY_BYTES[6]
+            )
+            named = ", ".join(f"{aggregate} AS {column}" for column, aggregate in _GROUP_AGGREGATES.items())
+            conn.create_function("key_prefix", 1, key_prefix, deterministic=True)
+            conn.execute("DELETE FROM correlation_groups")
+            conn.execute("DELETE FROM correlation_categories")
+            conn.execute(
+                f"""
+                INSERT INTO correlation_groups (scope, group_key, {columns})
+                SELECT 'prefix', key_prefix(prefix), {columns} FROM (
+                    SELECT {prefix_of.format("ip_key")} AS prefix, {named} FROM ip_summary GROUP BY prefix
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                INSERT INTO correlation_groups (scope, group_key, {columns})
+                SELECT 'asn', asn, {aggregates} FROM ip_summary WHERE asn NOT IN ({unknown}) GROUP BY asn
+                """,
+                tuple(UNKNOWN_ASNS),
+            )
+            conn.execute(
+                f"""
+                INSERT INTO correlation_categories (scope, group_key, category, count)
+                SELECT 'prefix', key_prefix(prefix), category, n FROM (
+                    SELECT {prefix_of.format("r.ip_key")} AS prefix, c.category, COUNT(*) AS n
+                    FROM report_categories c
+                    JOIN reports r ON r.id = c.report_id
+                    WHERE r.ip_key IS NOT NULL
+                    GROUP BY prefix, c.category
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                INSERT INTO correlation_categories (scope, group_key, category, count)
+                SELECT 'asn', s.asn, c.category, COUNT(*)
+                FROM report_categories c
+                JOIN reports r ON r.id = c.report_id
+                JOIN ip_summary s ON s.ip_key = r.ip_key
+                WHERE s.asn NOT IN ({unknown})
+                GROUP BY s.asn, c.category
+                """,
+                tuple(UNKNOWN_ASNS),
+            )
+            return
+        for scope, group_key in groups:
+            conn.execute("DELETE FROM correlation_groups WHERE scope = ? AND group_key = ?", (scope, group_key))
+            if scope == "prefix":
+                where, params = "ip_key BETWEEN ? AND ?", network_key_range(group_key)
+            else:
+                where, params = "asn = ?", (group_key,)
+            conn.execute(
+                f"""
+                INSERT INTO correlation_groups (scope, group_key, {columns})
+                SELECT ?, ?, {aggregates} FROM ip_summary WHERE {where} HAVING COUNT(*) > 0
+                """,
+                (scope, group_key, *params),
+            )
+
+    def save_analysis(self, **fields: Any) -> None:
+        self.save_many([fields])
+
+    def save_many(self, records: Sequence[Dict[str, Any]]) -> int:
+        """Insert several analyses in one transaction; listeners hear about the batch once it commits."""
+        if not records:
+            return 0
+        with self.pool.writer() as conn:
+            events = [self._insert_report(conn, **fields) for fields in records]
+        self._changed("report", events)
+        return len(records)
+
+    def _insert_report(
+        self,
+        conn: sqlite3.Connection,
         *,
         ip_address: str,
         threat_score: int,
@@ -67,12 +606,25 @@ class ReportRepository:
         asn: str,
         raw_data: Dict[str, Any],
         analyzed_at: Optional[datetime] = None,
-    ) -> None:
+        ruleset_version: Optional[str] = None,
+        narrative_pending: bool = False,
+        base_score: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Insert one analysis; returns it in listing shape with the stat deltas it caused.
+        ``base_score`` is the score without correlation-rule points (default: ``threat_score``);
+        the neighbourhood aggregates use it so neighbours cannot inflate each other.
+        """
         analyzed_at = analyzed_at or datetime.now(timezone.utc)
+        analyzed_ts = to_millis(analyzed_at)
+        key = ip_key(ip_address)
+        base_score = int(threat_score if base_score is None else base_score)
         record = (
             ip_address,
+            key,
             analyzed_at.isoformat(),
             int(threat_score),
+            base_score,
             risk_level,
             float(abuse_confidence),
             int(total_reports),
@@ -81,153 +633,534 @@ class ReportRepository:
             narrative or "",
             country or "Unknown",
             asn or "Unknown",
-            json.dumps(raw_data or {}),
+            json.dumps(self._store_raw(conn, raw_data)),
+            ruleset_version,
+            analyzed_ts,
+            int(narrative_pending),
         )
 
-        with self._connect() as conn:
-            conn.execute(
+        cursor = conn.execute(
+            """
+            INSERT INTO reports (
+                ip_address,
+                ip_key,
+                analyzed_at,
+                threat_score,
+                base_score,
+                risk_level,
+                abuse_confidence,
+                total_reports,
+                categories,
+                triggered_rules,
+                narrative,
+                country,
+                asn,
+                raw_refs,
+                ruleset_version,
+                analyzed_ts,
+                narrative_pending
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            record,
+        )
+        high_risk = int(base_score >= HIGH_RISK_SCORE)
+        summary = conn.execute(
+            """
+            INSERT INTO ip_summary (
+                ip_key, ip_address, first_seen_ts, last_seen_ts, report_count, max_threat_score, top_report_id,
+                asn, score_sum, high_risk_reports
+            ) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+            ON CONFLICT(ip_key) DO UPDATE SET
+                first_seen_ts = MIN(first_seen_ts, excluded.first_seen_ts),
+                last_seen_ts = MAX(last_seen_ts, excluded.last_seen_ts),
+                report_count = report_count + 1,
+                top_report_id = CASE
+                    WHEN excluded.max_threat_score >= max_threat_score THEN excluded.top_report_id
+                    ELSE top_report_id
+                END,
+                max_threat_score = MAX(max_threat_score, excluded.max_threat_score),
+                score_sum = score_sum + excluded.score_sum,
+                high_risk_reports = high_risk_reports + excluded.high_risk_reports
+            RETURNING report_count, first_seen_ts, asn, high_risk_reports
+            """,
+            (
+                key, ip_address, analyzed_ts, analyzed_ts, int(threat_score), cursor.lastrowid,
+                asn or "Unknown", base_score, high_risk,
+            ),
+        ).fetchone()
+        unique_categories = list(dict.fromkeys(categories or []))
+        self._record_rollups(conn, cursor.lastrowid, analyzed_ts, risk_level, unique_categories)
+        self._record_correlations(
+            conn, key, summary, int(threat_score), base_score, high_risk, analyzed_ts, unique_categories
+        )
+        return {
+            "report": {
+                "id": cursor.lastrowid,
+                "ip_address": ip_address,
+                "analyzed_at": analyzed_at.isoformat(),
+                "threat_score": int(threat_score),
+                "risk_level": risk_level,
+                "abuse_confidence": float(abuse_confidence),
+                "total_reports": int(total_reports),
+                "categories": categories or [],
+                "triggered_rules": triggered_rules or [],
+                "narrative": narrative or "",
+                "country": country or "Unknown",
+                "asn": asn or "Unknown",
+                "ruleset_version": ruleset_version,
+                "narrative_pending": bool(narrative_pending),
+                "occurrence_count": summary["report_count"],
+                "is_new": summary["report_count"] <= 1 and analyzed_ts == summary["first_seen_ts"],
+            },
+            # What this report added to /reports/stats, so live clients can update without refetching
+            "delta": {
+                "reports": 1,
+                "unique_ips": 1 if summary["report_count"] == 1 else 0,
+                "risk_level": risk_level,
+                "categories": list(dict.fromkeys(categories or [])),
+                "hour": datetime.fromtimestamp(analyzed_ts // HOUR_MS * 3600, timezone.utc).strftime("%Y-%m-%dT%H:00:00"),
+            },
+        }
+
+    def _record_rollups(
+        self,
+        conn: sqlite3.Connection,
+        report_id: int,
+        analyzed_ts: int,
+        risk_level: str,
+        unique_categories: List[str],
+    ) -> None:
+        hour = analyzed_ts // HOUR_MS
+        conn.executemany(
+            "INSERT OR IGNORE INTO report_categories (report_id, category, analyzed_ts) VALUES (?, ?, ?)",
+            [(report_id, category, analyzed_ts) for category in unique_categories],
+        )
+        conn.execute(
+            """
+            INSERT INTO risk_hourly (hour, risk_level, count) VALUES (?, ?, 1)
+            ON CONFLICT(hour, risk_level) DO UPDATE SET count = count + 1
+            """,
+            (hour, risk_level),
+        )
+        conn.executemany(
+            """
+            INSERT INTO category_hourly (hour, category, count) VALUES (?, ?, 1)
+            ON CONFLICT(hour, category) DO UPDATE SET count = count + 1
+            """,
+            [(hour, category) for category in unique_categories],
+        )
+
+    def _record_correlations(
+        self,
+        conn: sqlite3.Connection,
+        key: bytes,
+        summary: sqlite3.Row,
+        threat_score: int,
+        base_score: int,
+        high_risk: int,
+        analyzed_ts: int,
+        unique_categories: List[str],
+    ) -> None:
+        """Add one report to its subnet's and ASN's aggregates, given the ip_summary row it just updated."""
+        groups = [("prefix", key_prefix(key))]
+        if summary["asn"] not in UNKNOWN_ASNS:
+            groups.append(("asn", summary["asn"]))
+        new_ip = int(summary["report_count"] == 1)
+        # The address turns high risk with its first high-risk report
+        new_high_risk_ip = int(bool(high_risk) and summary["high_risk_reports"] == 1)
+        conn.executemany(
+            """
+            INSERT INTO correlation_groups (
+                scope, group_key, report_count, score_sum, high_risk_reports, ip_count, high_risk_ips,
+                max_threat_score, last_seen_ts
+            ) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scope, group_key) DO UPDATE SET
+                report_count = report_count + 1,
+                score_sum = score_sum + excluded.score_sum,
+                high_risk_reports = high_risk_reports + excluded.high_risk_reports,
+                ip_count = ip_count + excluded.ip_count,
+                high_risk_ips = high_risk_ips + excluded.high_risk_ips,
+                max_threat_score = MAX(max_threat_score, excluded.max_threat_score),
+                last_seen_ts = MAX(last_seen_ts, excluded.last_seen_ts)
+            """,
+            [
+                (scope, group_key, base_score, high_risk, new_ip, new_high_risk_ip, threat_score, analyzed_ts)
+                for scope, group_key in groups
+            ],
+        )
+        conn.executemany(
+            """
+            INSERT INTO correlation_categories (scope, group_key, category, count) VALUES (?, ?, ?, 1)
+            ON CONFLICT(scope, group_key, category) DO UPDATE SET count = count + 1
+            """,
+            [(scope, group_key, category) for scope, group_key in groups for category in unique_categories],
+        )
+
+    def update_narrative(self, ip_address: str, analyzed_at: datetime, narrative: Optional[str]) -> int:
+        """
+        Settle a report saved with ``narrative_pending``: store ``narrative``
+        (or keep the existing one when it is ``None``) and clear the flag.
+        Returns the number of reports updated; 0 if it is not stored (yet).
+        """
+        with self.pool.writer() as conn:
+            rows = conn.execute(
                 """
-                INSERT INTO reports (
-                    ip_address,
-                    analyzed_at,
-                    threat_score,
-                    risk_level,
-                    abuse_confidence,
-                    total_reports,
-                    categories,
-                    triggered_rules,
-                    narrative,
-                    country,
-                    asn,
-                    raw_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                UPDATE reports
+                SET narrative = COALESCE(?, narrative), narrative_pending = 0
+                WHERE ip_key = ? AND analyzed_ts = ?
+                RETURNING id, narrative
                 """,
-                record,
+                (narrative, ip_key(ip_address), to_millis(analyzed_at)),
+            ).fetchall()
+        if rows:
+            self._changed(
+                "narrative",
+                [{"id": row["id"], "narrative": row["narrative"], "narrative_pending": False} for row in rows],
             )
-            self._apply_retention(conn)
-            conn.commit()
+        return len(rows)
 
-    def _apply_retention(self, conn: sqlite3.Connection) -> None:
+    def _retention_boundary(self) -> Optional[tuple]:
+        """``(analyzed_ts, id)`` such that every report ordered before it is past retention."""
+        boundary = None
         if self.retention_days > 0:
             cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
-            conn.execute(
-                "DELETE FROM reports WHERE datetime(analyzed_at) < datetime(?)",
-                (cutoff.isoformat(),),
-            )
+            boundary = (to_millis(cutoff), 0)
         if self.retention_limit > 0:
-            conn.execute(
-                """
-                DELETE FROM reports
-                WHERE id NOT IN (
-                    SELECT id FROM reports
-                    ORDER BY datetime(analyzed_at) DESC
-                    LIMIT ?
+            with self.pool.reader() as conn:
+                # Oldest report that still fits in the limit
+                row = conn.execute(
+                    "SELECT analyzed_ts, id FROM reports ORDER BY analyzed_ts DESC, id DESC LIMIT 1 OFFSET ?",
+                    (self.retention_limit - 1,),
+                ).fetchone()
+            if row is not None and (boundary is None or tuple(row) > boundary):
+                boundary = tuple(row)
+        return boundary
+
+    def compact(
+        self,
+        chunk_size: int = 1000,
+        vacuum_pages: int = 2000,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Apply REPORT_RETENTION_DAYS/REPORT_RETENTION_LIMIT in chunks of ``chunk_size``
+        reports, oldest first, each in its own short write transaction so queued
+        inserts and readers are never held up for long. Afterwards, expired stats
+        rollups are pruned, up to ``vacuum_pages`` free pages are returned to the OS
+        (when the database uses incremental auto-vacuum) and the WAL is checkpointed.
+        """
+        started = time.perf_counter()
+        purged = 0
+        chunks = 0
+        boundary = self._retention_boundary()
+        while boundary is not None and not (should_stop and should_stop()):
+            with self.pool.writer() as conn:
+                rows = conn.execute(
+                    """
+                    DELETE FROM reports WHERE id IN (
+                        SELECT id FROM reports
+                        WHERE analyzed_ts <= ? AND (analyzed_ts < ? OR id < ?)
+                        ORDER BY analyzed_ts
+                        LIMIT ?
+                    )
+                    RETURNING id, ip_key, raw_refs, ip_address, categories
+                    """,
+                    (boundary[0], boundary[0], boundary[1], chunk_size),
+                ).fetchall()
+                if rows:
+                    self._forget_reports(conn, rows)
+            purged += len(rows)
+            chunks += 1 if rows else 0
+            if len(rows) < chunk_size:
+                break
+
+        if purged:
+            self._changed("purge", [{"reports_purged": purged}])
+
+        rollups_purged = 0
+        freed_pages = 0
+        with self.pool.writer() as conn:
+            if self.rollup_retention_days > 0:
+                cutoff_hour = (
+                    to_millis(datetime.now(timezone.utc) - timedelta(days=self.rollup_retention_days)) // HOUR_MS
                 )
-                """,
-                (self.retention_limit,),
+                for table in ("risk_hourly", "category_hourly"):
+                    rollups_purged += conn.execute(f"DELETE FROM {table} WHERE hour < ?", (cutoff_hour,)).rowcount
+        with self.pool.writer() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                # The pragma frees one page per step; executescript runs it to completion
+                conn.executescript(f"PRAGMA incremental_vacuum({max(1, int(vacuum_pages))});")
+                freed_pages = before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            checkpoint = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+
+        return {
+            "reports_purged": purged,
+            "chunks": chunks,
+            "rollup_rows_purged": rollups_purged,
+            "pages_freed": freed_pages,
+            "wal_pages_checkpointed": checkpoint[2] if checkpoint else 0,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _forget_reports(self, conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> None:
+        """
+        Bring ip_summary, the correlation aggregates, report_categories and raw_blobs
+        in line after ``rows`` (id, ip_key, raw_refs, ip_address, categories) were deleted.
+        """
+        keys = list({row[1] for row in rows if row[1] is not None})
+        asns: Dict[bytes, str] = {}
+        for start in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[start:start + _IN_CHUNK]
+            asns.update(
+                conn.execute(
+                    f"SELECT ip_key, asn FROM ip_summary WHERE ip_key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+            )
+        self._rebuild_summary(conn, keys)
+
+        groups: Dict[Tuple[str, str], None] = {}
+        removed: Dict[Tuple[str, str, str], int] = {}
+        for row in rows:
+            if row[1] is None:
+                continue
+            asn = asns.get(row[1])
+            row_groups = [("prefix", key_prefix(row[1]))] + ([("asn", asn)] if asn and asn not in UNKNOWN_ASNS else [])
+            for group in row_groups:
+                groups[group] = None
+                for category in dict.fromkeys(json.loads(row[4] or "[]")):
+                    removed[(*group, category)] = removed.get((*group, category), 0) + 1
+        self._rebuild_correlations(conn, groups)
+        conn.executemany(
+            "UPDATE correlation_categories SET count = count - ? WHERE scope = ? AND group_key = ? AND category = ?",
+            [(n, *group_category) for group_category, n in removed.items()],
+        )
+        conn.executemany(
+            "DELETE FROM correlation_categories WHERE scope = ? AND group_key = ? AND category = ? AND count <= 0",
+            list(removed),
+        )
+        released: Dict[str, int] = {}
+        for row in rows:
+            for digest in json.loads(row[2] or "{}").values():
+                released[digest] = released.get(digest, 0) + 1
+        conn.executemany("UPDATE raw_blobs SET refs = refs - ? WHERE digest = ?", [(n, d) for d, n in released.items()])
+        conn.executemany("DELETE FROM raw_blobs WHERE digest = ? AND refs <= 0", [(d,) for d in released])
+        expired_ids = [row[0] for row in rows]
+        for start in range(0, len(expired_ids), _IN_CHUNK):
+            chunk = expired_ids[start:start + _IN_CHUNK]
+            conn.execute(
+                f"DELETE FROM report_categories WHERE report_id IN ({','.join('?' * len(chunk))})",
+                chunk,
             )
 
     def get_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
-        with self._connect() as conn:
+        """Most recent reports without their raw_data; see get_report for the full record."""
+        return self.list_reports(limit=limit)["reports"]
+
+    def list_reports(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        category: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[Iterable[str]] = None,
+        fragments: bool = False,
+        network: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of reports, newest first, plus the ``next_cursor`` for the page
+        after it (``None`` on the last page). ``since`` is inclusive and ``until``
+        exclusive; ``network`` is an IPv4 or IPv6 CIDR. ``fields`` limits the
+        returned keys; ``id`` and ``analyzed_at`` are always included. With
+        ``fragments``, JSON columns are returned as the stored JSONFragment
+        instead of parsed lists. Raises ValueError for a malformed cursor,
+        address or network, or an unknown field.
+        """
+        wanted = frozenset(resolve_report_fields(fields))
+        if category is not None:
+            # Seek the category index, which carries analyzed_ts, and join reports by id
+            source = "report_categories c JOIN reports r ON r.id = c.report_id"
+            ts_column, id_column = "c.analyzed_ts", "c.report_id"
+            conditions, params = ["c.category = ?"], [category]
+        else:
+            source = "reports r"
+            ts_column, id_column = "r.analyzed_ts", "r.id"
+            conditions, params = [], []
+        if ip_address is not None:
+            conditions.append("r.ip_key = ?")
+            params.append(ip_key(ip_address))
+        if network is not None:
+            conditions.append("r.ip_key BETWEEN ? AND ?")
+            params.extend(network_key_range(network))
+        if risk_level is not None:
+            conditions.append("r.risk_level = ?")
+            params.append(risk_level)
+        if since is not None:
+            conditions.append(f"{ts_column} >= ?")
+            params.append(to_millis(since))
+        if until is not None:
+            conditions.append(f"{ts_column} < ?")
+            params.append(to_millis(until))
+        if cursor is not None:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            # Written as a range on analyzed_ts so the index bounds the scan
+            conditions.append(f"{ts_column} <= ? AND ({ts_column} < ? OR {id_column} < ?)")
+            params.extend((cursor_ts, cursor_ts, cursor_id))
+
+        columns = ["r.id", "r.analyzed_ts", "r.analyzed_at"]
+        columns.extend(dict.fromkeys(column for field in wanted for column in REPORT_FIELDS[field]))
+        if wanted & SUMMARY_FIELDS:
+            source += " LEFT JOIN ip_summary s ON s.ip_key = r.ip_key"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.pool.reader() as conn:
             rows = conn.execute(
+                f"""
+                SELECT {', '.join(dict.fromkeys(columns))}
+                FROM {source}
+                {where}
+                ORDER BY {ts_column} DESC, {id_column} DESC
+                LIMIT ?
+                """,
+                (*params, limit + 1),
+            ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["analyzed_ts"], rows[-1]["id"])
+        return {
+            "reports": [self._row_to_report(row, fields=wanted, fragments=fragments) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    def get_report(self, report_id: int, fragments: bool = False) -> Optional[Dict[str, Any]]:
+        """One report with its raw_data; ``fragments`` as in ``list_reports``, raw_data included."""
+        with self.pool.reader() as conn:
+            row = conn.execute(
                 """
                 SELECT
                     r.*,
-                    (
-                        SELECT COUNT(*)
-                        FROM reports sub
-                        WHERE sub.ip_address = r.ip_address
-                    ) AS occurrence_count,
-                    (
-                        SELECT MIN(datetime(sub.analyzed_at))
-                        FROM reports sub
-                        WHERE sub.ip_address = r.ip_address
-                    ) AS first_seen
+                    s.report_count AS occurrence_count,
+                    s.first_seen_ts AS first_seen_ts
                 FROM reports r
-                ORDER BY datetime(r.analyzed_at) DESC
-                LIMIT ?
+                LEFT JOIN ip_summary s ON s.ip_key = r.ip_key
+                WHERE r.id = ?
                 """,
-                (limit,),
-            ).fetchall()
+                (report_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            raw_data = self._load_raw(conn, json.loads(row["raw_refs"] or "{}"), fragments)
+        return self._row_to_report(row, raw_data, fragments=fragments)
 
-        results: List[Dict[str, Any]] = []
-        for row in rows:
-            categories = json.loads(row["categories"]) if row["categories"] else []
-            triggered = json.loads(row["triggered_rules"]) if row["triggered_rules"] else []
-            raw_data = json.loads(row["raw_data"]) if row["raw_data"] else {}
-            analyzed_at = datetime.fromisoformat(row["analyzed_at"])
-            first_seen = (
-                datetime.fromisoformat(row["first_seen"]) if row["first_seen"] else analyzed_at
+    def _load_raw(self, conn: sqlite3.Connection, refs: Dict[str, str], fragments: bool = False) -> Dict[str, Any]:
+        if not refs:
+            return {}
+        digests = list(dict.fromkeys(refs.values()))
+        # Blobs hold canonical JSON, so a fragment skips the parse and re-encode entirely
+        load = (
+            (lambda codec, data: JSONFragment(raw_blobs.decompress_bytes(codec, data)))
+            if fragments
+            else raw_blobs.decompress
+        )
+        blobs = {
+            row["digest"]: load(row["codec"], row["data"])
+            for row in conn.execute(
+                f"SELECT digest, codec, data FROM raw_blobs WHERE digest IN ({','.join('?' * len(digests))})",
+                digests,
             )
+        }
+        return {key: blobs[digest] for key, digest in refs.items() if digest in blobs}
+
+    @staticmethod
+    def _row_to_report(
+        row: sqlite3.Row,
+        raw_data: Optional[Dict[str, Any]] = None,
+        fields: Optional[frozenset] = None,
+        fragments: bool = False,
+    ) -> Dict[str, Any]:
+        """Map a row to the API shape; with ``fields``, only those keys (plus id and analyzed_at) are built."""
+        wanted = REPORT_FIELDS.keys() if fields is None else fields
+        # analyzed_at is stored as isoformat() output, so it is already in API form
+        report: Dict[str, Any] = {"id": row["id"], "analyzed_at": row["analyzed_at"]}
+        for field in REPORT_FIELDS:
+            if field not in wanted:
+                continue
+            if field in JSON_FIELDS:
+                if fragments:
+                    report[field] = JSONFragment(row[field] or "[]")
+                else:
+                    report[field] = json.loads(row[field]) if row[field] else []
+            elif field in BOOL_FIELDS:
+                report[field] = bool(row[field])
+            elif field in SUMMARY_FIELDS:
+                continue
+            elif field not in report:
+                report[field] = row[field]
+        if wanted & SUMMARY_FIELDS:
             occurrence = int(row["occurrence_count"] or 0)
-            results.append(
-                {
-                    "id": row["id"],
-                    "ip_address": row["ip_address"],
-                    "analyzed_at": analyzed_at.isoformat(),
-                    "threat_score": row["threat_score"],
-                    "risk_level": row["risk_level"],
-                    "abuse_confidence": row["abuse_confidence"],
-                    "total_reports": row["total_reports"],
-                    "categories": categories,
-                    "triggered_rules": triggered,
-                    "narrative": row["narrative"],
-                    "country": row["country"],
-                    "asn": row["asn"],
-                    "raw_data": raw_data,
-                    "occurrence_count": occurrence,
-                    "is_new": occurrence <= 1 and analyzed_at == first_seen,
-                }
-            )
-        return results
+            if "occurrence_count" in wanted:
+                report["occurrence_count"] = occurrence
+            if "is_new" in wanted:
+                first_seen_ts = row["first_seen_ts"] if row["first_seen_ts"] is not None else row["analyzed_ts"]
+                report["is_new"] = occurrence <= 1 and row["analyzed_ts"] == first_seen_ts
+        if raw_data is not None:
+            report["raw_data"] = raw_data
+        return report
 
     def get_stats(self, hours: int = 24) -> Dict[str, Any]:
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        with self._connect() as conn:
+        # Rollups are hourly, so the window starts at the top of the hour containing the cutoff
+        cutoff_hour = to_millis(datetime.now(timezone.utc) - timedelta(hours=hours)) // HOUR_MS
+        bucket_hours = 1 if hours <= HOURLY_VOLUME_MAX_HOURS else 24
+        with self.pool.reader() as conn:
             top_risks_rows = conn.execute(
                 """
-                SELECT ip_address, threat_score, risk_level, abuse_confidence, analyzed_at,
-                       (
-                           SELECT COUNT(*)
-                           FROM reports sub
-                           WHERE sub.ip_address = reports.ip_address
-                       ) AS occurrence_count
-                FROM reports
-                ORDER BY threat_score DESC, datetime(analyzed_at) DESC
+                SELECT s.ip_address, s.max_threat_score AS threat_score, s.last_seen_ts,
+                       s.report_count AS occurrence_count, r.risk_level, r.abuse_confidence
+                FROM ip_summary s
+                JOIN reports r ON r.id = s.top_report_id
+                ORDER BY s.max_threat_score DESC, s.last_seen_ts DESC
                 LIMIT 5
                 """
             ).fetchall()
 
             risk_counts_rows = conn.execute(
                 """
-                SELECT risk_level, COUNT(*) as count
-                FROM reports
-                WHERE datetime(analyzed_at) >= datetime(?)
+                SELECT risk_level, SUM(count) as count
+                FROM risk_hourly
+                WHERE hour >= ?
                 GROUP BY risk_level
                 """,
-                (cutoff.isoformat(),),
+                (cutoff_hour,),
             ).fetchall()
 
             volume_rows = conn.execute(
                 """
-                SELECT strftime('%Y-%m-%dT%H:00:00', analyzed_at) as bucket, COUNT(*) as count
-                FROM reports
-                WHERE datetime(analyzed_at) >= datetime(?)
-                GROUP BY bucket
-                ORDER BY bucket DESC
-                LIMIT 24
+                SELECT hour / ? * ? as hour, SUM(count) as count
+                FROM risk_hourly
+                WHERE hour >= ?
+                GROUP BY 1
+                ORDER BY 1
                 """,
-                (cutoff.isoformat(),),
+                (bucket_hours, bucket_hours, cutoff_hour),
             ).fetchall()
 
-            total_reports = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
-            distinct_ips = conn.execute("SELECT COUNT(DISTINCT ip_address) FROM reports").fetchone()[0]
+            total_reports, distinct_ips = conn.execute(
+                "SELECT reports, unique_ips FROM report_totals WHERE id = 1"
+            ).fetchone()
             last_row = conn.execute(
-                "SELECT analyzed_at FROM reports ORDER BY datetime(analyzed_at) DESC LIMIT 1"
+                "SELECT analyzed_at FROM reports ORDER BY analyzed_ts DESC, id DESC LIMIT 1"
             ).fetchone()
             category_rows = conn.execute(
-                "SELECT categories FROM reports WHERE datetime(analyzed_at) >= datetime(?)",
-                (cutoff.isoformat(),),
+                """
+                SELECT category, SUM(count) AS count
+                FROM category_hourly
+                WHERE hour >= ?
+                GROUP BY category
+                """,
+                (cutoff_hour,),
             ).fetchall()
 
         top_risks = [
@@ -236,7 +1169,7 @@ class ReportRepository:
                 "threat_score": row["threat_score"],
                 "risk_level": row["risk_level"],
                 "abuse_confidence": row["abuse_confidence"],
-                "last_seen": datetime.fromisoformat(row["analyzed_at"]).isoformat(),
+                "last_seen": datetime.fromtimestamp(row["last_seen_ts"] / 1000, timezone.utc).isoformat(),
                 "occurrence_count": row["occurrence_count"],
             }
             for row in top_risks_rows
@@ -244,15 +1177,14 @@ class ReportRepository:
 
         risk_counts = {row["risk_level"]: row["count"] for row in risk_counts_rows}
         volume = [
-            {"bucket": row["bucket"], "count": row["count"]}
-            for row in sorted(volume_rows, key=lambda r: r["bucket"])
+            {
+                "bucket": datetime.fromtimestamp(row["hour"] * 3600, timezone.utc).strftime("%Y-%m-%dT%H:00:00"),
+                "count": row["count"],
+            }
+            for row in volume_rows
         ]
 
-        category_counts: Dict[str, int] = {}
-        for row in category_rows:
-            cats = json.loads(row["categories"]) if row["categories"] else []
-            for cat in cats:
-                category_counts[cat] = category_counts.get(cat, 0) + 1
+        category_counts = {row["category"]: row["count"] for row in category_rows}
 
         metrics = {
             "total_reports": total_reports,
@@ -267,3 +1199,120 @@ class ReportRepository:
             "report_volume": volume,
             "metrics": metrics,
         }
+
+    def correlation_features(self, ip_address: str, asn: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Subnet and ASN neighbourhood of ``ip_address`` as the CORRELATION_FIELDS
+        of a NormalizedThreatReport: a few primary-key reads, no scans. The
+        address's own stored reports are left out, so re-analysing an IP never
+        scores it against itself. Neighbours count with their base scores, which
+        leave out correlation-rule points, so they cannot inflate each other. A
+        stored address is matched by the ASN it was first stored with; ``asn``
+        is used for addresses not stored yet. Raises ValueError for a malformed
+        address.
+        """
+        key = ip_key(ip_address)
+        features: Dict[str, Any] = dict.fromkeys(CORRELATION_FIELDS, 0)
+        with self.pool.reader() as conn:
+            own = conn.execute(
+                "SELECT asn, report_count, score_sum, high_risk_reports FROM ip_summary WHERE ip_key = ?", (key,)
+            ).fetchone()
+            if own is not None:
+                asn = own["asn"]
+            groups = [("prefix", key_prefix(key))]
+            if asn and asn not in UNKNOWN_ASNS:
+                groups.append(("asn", asn))
+            for scope, group_key in groups:
+                row = conn.execute(
+                    """
+                    SELECT report_count, score_sum, ip_count, high_risk_ips FROM correlation_groups
+                    WHERE scope = ? AND group_key = ?
+                    """,
+                    (scope, group_key),
+                ).fetchone()
+                if row is None:
+                    continue
+                reports, score_sum, ips, high_risk_ips = row
+                if own is not None:
+                    reports -= own["report_count"]
+                    score_sum -= own["score_sum"]
+                    ips -= 1
+                    high_risk_ips -= own["high_risk_reports"] > 0
+                features[f"{scope}_neighbor_ips"] = ips
+                features[f"{scope}_high_risk_neighbors"] = high_risk_ips
+                if reports > 0 and reports >= self.correlation_min_reports:
+                    features[f"{scope}_neighbor_mean_score"] = round(score_sum / reports, 2)
+        return features
+
+    def list_correlations(
+        self,
+        scope: Optional[str] = None,
+        limit: int = 20,
+        ip_address: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Subnet ("prefix") and ASN aggregates, those with the most high-risk addresses
+        first, ``limit`` per scope. With ``ip_address``, only the groups that address
+        belongs to, plus the correlation features it would be scored with. Raises
+        ValueError for an unknown scope or a malformed address.
+        """
+        scopes = CORRELATION_SCOPES if scope is None else (scope,)
+        if any(name not in CORRELATION_SCOPES for name in scopes):
+            raise ValueError(f"Unknown correlation scope {scope!r}")
+        columns = "scope, group_key, " + ", ".join(_GROUP_AGGREGATES)
+        with self.pool.reader() as conn:
+            if ip_address is not None:
+                key = ip_key(ip_address)
+                own = conn.execute("SELECT asn FROM ip_summary WHERE ip_key = ?", (key,)).fetchone()
+                wanted = {"prefix": key_prefix(key), "asn": own["asn"] if own is not None else None}
+                rows = [
+                    row
+                    for name in scopes
+                    if wanted[name] is not None
+                    for row in conn.execute(
+                        f"SELECT {columns} FROM correlation_groups WHERE scope = ? AND group_key = ?",
+                        (name, wanted[name]),
+                    )
+                ]
+            else:
+                rows = [
+                    row
+                    for name in scopes
+                    for row in conn.execute(
+                        f"""
+                        SELECT {columns} FROM correlation_groups WHERE scope = ?
+                        ORDER BY high_risk_ips DESC, max_threat_score DESC LIMIT ?
+                        """,
+                        (name, limit),
+                    )
+                ]
+            categories: Dict[Tuple[str, str], Dict[str, int]] = {}
+            for row in rows:
+                categories[(row["scope"], row["group_key"])] = {
+                    category: count
+                    for category, count in conn.execute(
+                        """
+                        SELECT category, count FROM correlation_categories
+                        WHERE scope = ? AND group_key = ? ORDER BY count DESC, category
+                        """,
+                        (row["scope"], row["group_key"]),
+                    )
+                }
+        groups = [
+            {
+                "scope": row["scope"],
+                "group": row["group_key"],
+                "report_count": row["report_count"],
+                "ip_count": row["ip_count"],
+                "high_risk_ips": row["high_risk_ips"],
+                "high_risk_reports": row["high_risk_reports"],
+                "max_threat_score": row["max_threat_score"],
+                "mean_base_score": round(row["score_sum"] / row["report_count"], 2),
+                "last_seen": datetime.fromtimestamp(row["last_seen_ts"] / 1000, timezone.utc).isoformat(),
+                "categories": categories[(row["scope"], row["group_key"])],
+            }
+            for row in rows
+        ]
+        if ip_address is None:
+            return {"groups": groups}
+        return {"groups": groups, "features": self.correlation_features(ip_address)}
@@ -0,0 +1,111 @@
+"""Thread-safe SQLite connection pool with one serialized writer and pooled WAL readers."""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+class SQLitePool:
+    """
+    Connections are opened once and reused across ``asyncio.to_thread`` workers.
+    The database runs in WAL mode, so readers see the last committed state while
+    the single writer connection appends; writers are serialized in process
+    instead of contending for SQLite's file lock. Each connection keeps its own
+    prepared-statement cache, keyed by SQL text.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 8,
+        cache_mb: int = 64,
+        mmap_mb: int = 256,
+        busy_timeout_seconds: float = 5.0,
+        cached_statements: int = 256,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.size = max(1, size)
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.cached_statements = cached_statements
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened: List[sqlite3.Connection] = []
+        self._open_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._counters = {"reads": 0, "writes": 0, "read_waits": 0}
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_seconds,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+            # Can only be chosen before the first table exists; lets freed pages be
+            # returned with "PRAGMA incremental_vacuum" instead of a full VACUUM
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # synchronous=NORMAL is durable across application crashes in WAL mode;
+        # only an OS crash or power loss can drop the last few commits
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = {-self.cache_mb * 1024}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_mb * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        self._opened.append(conn)
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            # The writer connection is not counted against the reader pool size
+            if len(self._opened) - (self._writer is not None) < self.size:
+                return self._open()
+        self._counters["read_waits"] += 1
+        return self._idle.get()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._checkout()
+        self._counters["reads"] += 1
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive write connection; commits on exit and rolls back on error."""
+        with self._write_lock:
+            if self._writer is None:
+                with self._open_lock:
+                    self._writer = self._open()
+            self._counters["writes"] += 1
+            with self._writer:
+                yield self._writer
+
+    def close(self) -> None:
+        with self._write_lock, self._open_lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+            self._writer = None
+            self._idle = queue.LifoQueue()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._opened),
+            "idle_readers": self._idle.qsize(),
+            "pool_size": self.size,
+            **self._counters,
+        }
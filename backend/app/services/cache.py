@@ -0,0 +1,166 @@
+"""Tiered TTL cache for upstream threat-intel lookups."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    value: Dict[str, Any]
+    stored_at: float
+    tier: str
+
+    def age(self, now: float) -> float:
+        return max(0.0, now - self.stored_at)
+
+
+class ThreatIntelCache:
+    """
+    In-process LRU tier with an optional SQLite tier that survives restarts.
+    Every source has its own TTL; entries older than it are treated as misses.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        max_entries: int = 10000,
+        db_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.db_path = Path(db_path) if db_path else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._counters = {
+            "hits": 0,
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "writes": 0,
+        }
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._initialize()
+
+    @property
+    def persistent(self) -> bool:
+        return self.db_path is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _initialize(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS intel_cache (
+                    source TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (source, cache_key)
+                )
+                """
+            )
+            conn.commit()
+        self.purge_expired()
+
+    def _is_fresh(self, source: str, stored_at: float, now: float) -> bool:
+        ttl = self.ttls.get(source, 0)
+        return ttl > 0 and now - stored_at < ttl
+
+    def get(self, source: str, key: str) -> Optional[CacheEntry]:
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get((source, key))
+            if entry is not None:
+                if self._is_fresh(source, entry.stored_at, now):
+                    self._memory.move_to_end((source, key))
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return entry
+                del self._memory[(source, key)]
+                self._counters["expired"] += 1
+
+        if self.persistent:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, stored_at FROM intel_cache WHERE source = ? AND cache_key = ?",
+                    (source, key),
+                ).fetchone()
+            if row is not None:
+                value, stored_at = row
+                if self._is_fresh(source, stored_at, now):
+                    entry = CacheEntry(value=json.loads(value), stored_at=stored_at, tier="persistent")
+                    with self._lock:
+                        self._counters["hits"] += 1
+                        self._counters["persistent_hits"] += 1
+                        self._remember((source, key), CacheEntry(entry.value, stored_at, "memory"))
+                    return entry
+                with self._lock:
+                    self._counters["expired"] += 1
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, source: str, key: str, value: Dict[str, Any]) -> None:
+        if self.ttls.get(source, 0) <= 0:
+            return
+        stored_at = self._clock()
+        with self._lock:
+            self._remember((source, key), CacheEntry(value, stored_at, "memory"))
+            self._counters["writes"] += 1
+        if self.persistent:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO intel_cache (source, cache_key, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (source, key, json.dumps(value), stored_at),
+                )
+                conn.commit()
+
+    def _remember(self, key: Tuple[str, str], entry: CacheEntry) -> None:
+        # Caller holds the lock
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while self.max_entries > 0 and len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from the persistent tier; returns the number removed."""
+        if not self.persistent:
+            return 0
+        now = self._clock()
+        removed = 0
+        with self._connect() as conn:
+            for source, ttl in self.ttls.items():
+                removed += conn.execute(
+                    "DELETE FROM intel_cache WHERE source = ? AND stored_at <= ?",
+                    (source, now - ttl),
+                ).rowcount
+            conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._memory)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "persistent": self.persistent,
+            "ttl_seconds": self.ttls,
+        }
@@ -1,42 +1,193 @@
 import asyncio
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple
 import aiohttp
+from .cache import ThreatIntelCache
+from .feed_index import FeedIndex
+from .geo_db import GeoDatabase
+from .rate_limiter import Priority, QuotaExhaustedError, RateLimitedError, TokenBucketLimiter
 from .utils import with_retries
 from ..config import (
     ABUSEIPDB_API_KEY,
     ABUSEIPDB_BASE_URL,
+    ABUSEIPDB_BURST,
+    ABUSEIPDB_DAILY_QUOTA,
+    ABUSEIPDB_INTERACTIVE_RESERVE,
+    ABUSEIPDB_MAX_CONCURRENCY,
+    ABUSEIPDB_RATE_PER_SECOND,
+    BULK_MAX_QUEUE_SECONDS,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    INTERACTIVE_MAX_QUEUE_SECONDS,
     IPAPI_BASE_URL,
+    IPAPI_BURST,
+    IPAPI_MAX_CONCURRENCY,
+    IPAPI_RATE_PER_SECOND,
     REQUEST_TIMEOUT,
 )
 
 
+def default_limiters() -> Dict[str, TokenBucketLimiter]:
+    return {
+        "abuseipdb": TokenBucketLimiter(
+            "abuseipdb",
+            rate_per_second=ABUSEIPDB_RATE_PER_SECOND,
+            burst=ABUSEIPDB_BURST,
+            quota_limit=ABUSEIPDB_DAILY_QUOTA,
+            interactive_reserve=ABUSEIPDB_INTERACTIVE_RESERVE,
+        ),
+        # ip-api.com reports its per-minute window as X-Rl (remaining) and X-Ttl (seconds to reset)
+        "geolocation": TokenBucketLimiter(
+            "geolocation",
+            rate_per_second=IPAPI_RATE_PER_SECOND,
+            burst=IPAPI_BURST,
+            limit_header="",
+            remaining_header="X-Rl",
+            reset_header="X-Ttl",
+            reset_is_delta=True,
+            default_reset=lambda now: now + 60,
+        ),
+    }
+
+
 class ThreatIntelCollector:
     """
     Collects threat intelligence data from AbuseIPDB and ip-api.com.
     """
 
-    def __init__(self, abuseipdb_key: str = None):
+    def __init__(
+        self,
+        abuseipdb_key: str = None,
+        abuseipdb_concurrency: int = ABUSEIPDB_MAX_CONCURRENCY,
+        ipapi_concurrency: int = IPAPI_MAX_CONCURRENCY,
+        abuseipdb_base_url: str = ABUSEIPDB_BASE_URL,
+        ipapi_base_url: str = IPAPI_BASE_URL,
+        cache: Optional[ThreatIntelCache] = None,
+        limiters: Optional[Dict[str, TokenBucketLimiter]] = None,
+        feed_index: Optional[FeedIndex] = None,
+        geo_db: Optional[GeoDatabase] = None,
+    ):
         self.abuseipdb_key = abuseipdb_key or ABUSEIPDB_API_KEY
+        self.cache = cache
+        self.feed_index = feed_index
+        self.geo_db = geo_db
+        self.limiters = default_limiters() if limiters is None else limiters
+        self.abuseipdb_base_url = abuseipdb_base_url
+        self.ipapi_base_url = ipapi_base_url
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Caps in-flight requests per upstream, shared by every caller of this collector
+        self._limits = {
+            "abuseipdb": asyncio.Semaphore(max(1, abuseipdb_concurrency)),
+            "geolocation": asyncio.Semaphore(max(1, ipapi_concurrency)),
+        }
 
-    async def fetch_all(self, ip: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as session:
-            tasks = [
-                self.fetch_abuseipdb(session, ip),
-                self.fetch_geolocation(session, ip),
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def start(self) -> None:
+        """Open the shared keep-alive session used by every lookup."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
 
-        def ok(idx: int) -> Dict[str, Any]:
-            val = results[idx]
-            return val if not isinstance(val, Exception) else {"error": str(val)}
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
-        return {
-            "abuseipdb": ok(0),
-            "geolocation": ok(1),
-        }
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily open the session when used outside the app lifespan (scripts, tests)
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def _limited(self, source: str, coro) -> Dict[str, Any]:
+        async with self._limits[source]:
+            return await coro
+
+    async def _acquire(self, source: str, priority: Priority) -> None:
+        limiter = self.limiters.get(source)
+        if limiter is not None:
+            max_wait = INTERACTIVE_MAX_QUEUE_SECONDS if priority == Priority.INTERACTIVE else BULK_MAX_QUEUE_SECONDS
+            await limiter.acquire(priority, max_wait=max_wait)
+
+    def _observe(self, source: str, resp: aiohttp.ClientResponse) -> None:
+        limiter = self.limiters.get(source)
+        retry_after = limiter.observe(resp.status, resp.headers) if limiter is not None else 0.0
+        if resp.status == 429:
+            raise RateLimitedError(f"{source} rate limit exceeded (HTTP 429)", retry_after=retry_after)
+
+    def quota_state(self) -> Dict[str, Any]:
+        return {source: limiter.state() for source, limiter in self.limiters.items()}
+
+    async def _cached(
+        self, source: str, fetch, session: aiohttp.ClientSession, ip: str, priority: Priority
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Serve ``source`` for ``ip`` from the cache when fresh, otherwise fetch it live."""
+        if self.cache is not None:
+            if self.cache.persistent:
+                entry = await asyncio.to_thread(self.cache.get, source, ip)
+            else:
+                entry = self.cache.get(source, ip)
+            if entry is not None:
+                status = {"origin": "cache", "tier": entry.tier, "age_seconds": round(entry.age(time.time()), 1)}
+                return entry.value, status
+
+        value = await self._limited(source, fetch(session, ip, priority=priority))
+        if self.cache is not None and "error" not in value:
+            if self.cache.persistent:
+                await asyncio.to_thread(self.cache.set, source, ip, value)
+            else:
+                self.cache.set(source, ip, value)
+        return value, {"origin": "live", "age_seconds": 0.0}
+
+    async def _geolocate(
+        self, session: aiohttp.ClientSession, ip: str, priority: Priority
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Answer from the local geo database when it knows the IP; only misses reach ip-api.com."""
+        if self.geo_db is not None:
+            local = self.geo_db.lookup(ip)
+            if local is not None:
+                return {"raw": {"source": "local-geo-db"}, **local, "query": ip}, {"origin": "local", "age_seconds": 0.0}
+        return await self._cached("geolocation", self.fetch_geolocation, session, ip, priority)
+
+    async def fetch_all(self, ip: str, priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        session = await self._get_session()
+        sources = ("abuseipdb", "geolocation")
+        tasks = [
+            self._cached("abuseipdb", self.fetch_abuseipdb, session, ip, priority),
+            self._geolocate(session, ip, priority),
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # An AbuseIPDB lookup we never made is not evidence the IP is clean; fail rather than
+        # score without it. Geolocation only adds context, so that leg degrades to an error entry
+        if isinstance(results[0], QuotaExhaustedError):
+            raise results[0]
+
+        data: Dict[str, Any] = {}
+        status: Dict[str, Any] = {}
+        for source, val in zip(sources, results):
+            if isinstance(val, Exception):
+                data[source] = {"error": str(val)}
+                status[source] = {"origin": "live", "age_seconds": 0.0}
+            else:
+                data[source], status[source] = val
+        if self.feed_index is not None:
+            data["local_feeds"] = {"matches": self.feed_index.lookup(ip)}
+        data["sources"] = status
+        return data
 
     @with_retries()
-    async def fetch_abuseipdb(self, session: aiohttp.ClientSession, ip: str) -> Dict[str, Any]:
+    async def fetch_abuseipdb(
+        self, session: aiohttp.ClientSession, ip: str, priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, Any]:
         """
         Query AbuseIPDB for threat intelligence data.
         Returns abuse confidence score, total reports, and IP details.
@@ -44,7 +195,7 @@ class ThreatIntelCollector:
         if not self.abuseipdb_key:
             return {"error": "ABUSEIPDB_API_KEY missing"}
         
-        url = f"{ABUSEIPDB_BASE_URL}/check"
+        url = f"{self.abuseipdb_base_url}/check"
         headers = {
             "Accept": "application/json",
             "Key": self.abuseipdb_key
@@ -55,78 +206,24 @@ class ThreatIntelCollector:
             "verbose": ""
         }
         
+        await self._acquire("abuseipdb", priority)
         async with session.get(url, headers=headers, params=params) as resp:
+            self._observe("abuseipdb", resp)
             if resp.status >= 400:
                 error_data = await resp.json(content_type=None) if resp.content_type == "application/json" else {"error": f"HTTP {resp.status}"}
                 return {"error": error_data}
             
             data = await resp.json(content_type=None)
-            ip_data = data.get("data", {})
-            
-            # Extract key metrics from AbuseIPDB response
-            abuse_confidence_score = int(ip_data.get("abuseConfidenceScore", 0) or 0)
-            total_reports = int(ip_data.get("totalReports", 0) or 0)
-            num_distinct_users = int(ip_data.get("numDistinctUsers", 0) or 0)
-            is_whitelisted = bool(ip_data.get("isWhitelisted", False))
-            is_public = bool(ip_data.get("isPublic", True))
-            usage_type = ip_data.get("usageType", "Unknown")
-            is_tor = bool(ip_data.get("isTor", False))
-            country_code = ip_data.get("countryCode", "Unknown")
-            isp = ip_data.get("isp", "Unknown")
-            domain = ip_data.get("domain", "")
-            hostnames = ip_data.get("hostnames", [])
-            last_reported_at = ip_data.get("lastReportedAt", "")
-            
-            # Calculate threat categories based on AbuseIPDB data
-            threat_types = set()
-            if abuse_confidence_score >= 75:
-                threat_types.add("malware")
-            if abuse_confidence_score >= 50:
-                threat_types.add("suspicious")
-            if is_tor:
-                threat_types.add("tor")
-            if total_reports >= 10:
-                threat_types.add("spam")
-            if total_reports >= 5:
-                threat_types.add("scanner")
-            
-            # Determine reputation based on abuse confidence score
-            # AbuseIPDB: 0-25 = good, 26-50 = suspicious, 51-75 = high risk, 76-100 = malicious
-            if abuse_confidence_score >= 76:
-                reputation = 0  # Malicious
-            elif abuse_confidence_score >= 51:
-                reputation = 1  # Suspicious/High risk
-            elif abuse_confidence_score >= 26:
-                reputation = 1  # Suspicious
-            else:
-                reputation = 3 if abuse_confidence_score == 0 and total_reports == 0 else 2  # Good or Unknown
-            
-            # Use abuse confidence score directly as threat confidence
-            threat_confidence = float(abuse_confidence_score)
-            
-            return {
-                "raw": data,
-                "abuse_confidence_score": abuse_confidence_score,
-                "total_reports": total_reports,
-                "num_distinct_users": num_distinct_users,
-                "is_whitelisted": is_whitelisted,
-                "is_public": is_public,
-                "usage_type": usage_type,
-                "is_tor": is_tor,
-                "country_code": country_code,
-                "isp": isp,
-                "domain": domain,
-                "hostnames": hostnames,
-                "last_reported_at": last_reported_at,
-                "threat_confidence": threat_confidence,
-                "threat_types": list(threat_types),
-                "reputation": reputation,
-            }
+            return self.summarize_abuseipdb(data.get("data", {}), data)
 
     @with_retries()
-    async def fetch_geolocation(self, session: aiohttp.ClientSession, ip: str) -> Dict[str, Any]:
-        url = f"{IPAPI_BASE_URL}/json/{ip}"
+    async def fetch_geolocation(
+        self, session: aiohttp.ClientSession, ip: str, priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, Any]:
+        url = f"{self.ipapi_base_url}/json/{ip}"
+        await self._acquire("geolocation", priority)
         async with session.get(url) as resp:
+            self._observe("geolocation", resp)
             data = await resp.json(content_type=None)
             if resp.status >= 400:
                 return {"error": data}
@@ -138,4 +235,116 @@ class ThreatIntelCollector:
                 "query": data.get("query", ip),
             }
 
+    async def _abuseipdb_get(self, endpoint: str, params: Dict[str, Any], priority: Priority) -> Dict[str, Any]:
+        session = await self._get_session()
+        headers = {"Accept": "application/json", "Key": self.abuseipdb_key}
+        await self._acquire("abuseipdb", priority)
+        async with session.get(f"{self.abuseipdb_base_url}/{endpoint}", headers=headers, params=params) as resp:
+            self._observe("abuseipdb", resp)
+            data = await resp.json(content_type=None)
+            if resp.status >= 400:
+                raise RuntimeError(f"AbuseIPDB /{endpoint} failed with HTTP {resp.status}: {data}")
+            return data
 
+    @with_retries()
+    async def fetch_check_block(
+        self, network: str, max_age_days: int = 30, priority: Priority = Priority.INTERACTIVE
+    ) -> List[Dict[str, Any]]:
+        """
+        Query AbuseIPDB /check-block for a whole CIDR in one call.
+        Returns an AbuseIPDB summary (same shape as fetch_abuseipdb) per reported address.
+        """
+        if not self.abuseipdb_key:
+            raise RuntimeError("ABUSEIPDB_API_KEY missing")
+        data = await self._abuseipdb_get(
+            "check-block", {"network": network, "maxAgeInDays": max_age_days}, priority
+        )
+        block = data.get("data", {}) or {}
+        summaries = []
+        for entry in block.get("reportedAddress", []) or []:
+            ip_data = {
+                "ipAddress": entry.get("ipAddress"),
+                "abuseConfidenceScore": entry.get("abuseConfidenceScore", 0),
+                "totalReports": entry.get("numReports", 0),
+                "countryCode": entry.get("countryCode") or "Unknown",
+                "lastReportedAt": entry.get("mostRecentReport", ""),
+            }
+            summary = self.summarize_abuseipdb(ip_data, entry)
+            summary["ip_address"] = ip_data["ipAddress"]
+            summaries.append(summary)
+        return summaries
+
+    @with_retries()
+    async def fetch_blacklist(
+        self, confidence_minimum: int = 90, limit: int = 10000, priority: Priority = Priority.BULK
+    ) -> List[Dict[str, Any]]:
+        """Download the AbuseIPDB /blacklist feed; returns its raw ``data`` entries."""
+        if not self.abuseipdb_key:
+            raise RuntimeError("ABUSEIPDB_API_KEY missing")
+        data = await self._abuseipdb_get(
+            "blacklist", {"confidenceMinimum": confidence_minimum, "limit": limit}, priority
+        )
+        return [entry for entry in data.get("data", []) or [] if entry.get("ipAddress")]
+
+    @staticmethod
+    def summarize_abuseipdb(ip_data: Dict[str, Any], raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Derive the collector's AbuseIPDB summary from one ``data`` record."""
+        # Extract key metrics from AbuseIPDB response
+        abuse_confidence_score = int(ip_data.get("abuseConfidenceScore", 0) or 0)
+        total_reports = int(ip_data.get("totalReports", 0) or 0)
+        num_distinct_users = int(ip_data.get("numDistinctUsers", 0) or 0)
+        is_whitelisted = bool(ip_data.get("isWhitelisted", False))
+        is_public = bool(ip_data.get("isPublic", True))
+        usage_type = ip_data.get("usageType", "Unknown")
+        is_tor = bool(ip_data.get("isTor", False))
+        country_code = ip_data.get("countryCode", "Unknown")
+        isp = ip_data.get("isp", "Unknown")
+        domain = ip_data.get("domain", "")
+        hostnames = ip_data.get("hostnames", [])
+        last_reported_at = ip_data.get("lastReportedAt", "")
+
+        # Calculate threat categories based on AbuseIPDB data
+        threat_types = set()
+        if abuse_confidence_score >= 75:
+            threat_types.add("malware")
+        if abuse_confidence_score >= 50:
+            threat_types.add("suspicious")
+        if is_tor:
+            threat_types.add("tor")
+        if total_reports >= 10:
+            threat_types.add("spam")
+        if total_reports >= 5:
+            threat_types.add("scanner")
+
+        # Determine reputation based on abuse confidence score
+        # AbuseIPDB: 0-25 = good, 26-50 = suspicious, 51-75 = high risk, 76-100 = malicious
+        if abuse_confidence_score >= 76:
+            reputation = 0  # Malicious
+        elif abuse_confidence_score >= 51:
+            reputation = 1  # Suspicious/High risk
+        elif abuse_confidence_score >= 26:
+            reputation = 1  # Suspicious
+        else:
+            reputation = 3 if abuse_confidence_score == 0 and total_reports == 0 else 2  # Good or Unknown
+
+        # Use abuse confidence score directly as threat confidence
+        threat_confidence = float(abuse_confidence_score)
+
+        return {
+            "raw": raw,
+            "abuse_confidence_score": abuse_confidence_score,
+            "total_reports": total_reports,
+            "num_distinct_users": num_distinct_users,
+            "is_whitelisted": is_whitelisted,
+            "is_public": is_public,
+            "usage_type": usage_type,
+            "is_tor": is_tor,
+            "country_code": country_code,
+            "isp": isp,
+            "domain": domain,
+            "hostnames": hostnames,
+            "last_reported_at": last_reported_at,
+            "threat_confidence": threat_confidence,
+            "threat_types": list(threat_types),
+            "reputation": reputation,
+        }
@@ -0,0 +1,72 @@
+"""Periodic background retention for the report database."""
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionCompactor:
+    """
+    Runs ``compact_fn`` in a worker thread every ``interval`` seconds, starting
+    immediately. ``compact_fn`` receives a ``should_stop`` callable so a long
+    run can stop between chunks when the application shuts down.
+    """
+
+    def __init__(self, compact_fn: Callable[..., Dict[str, Any]], interval: float = 300.0) -> None:
+        self._compact_fn = compact_fn
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._stopping = threading.Event()
+        self._last: Optional[Dict[str, Any]] = None
+        self._totals = {"runs": 0, "failures": 0, "reports_purged": 0, "seconds": 0.0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the loop, letting an in-progress run finish its current chunk."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        try:
+            result = await asyncio.to_thread(self._compact_fn, should_stop=self._stopping.is_set)
+        except Exception:
+            self._totals["failures"] += 1
+            raise
+        self._last = result
+        self._totals["runs"] += 1
+        self._totals["reports_purged"] += result.get("reports_purged", 0)
+        self._totals["seconds"] = round(self._totals["seconds"] + result.get("seconds", 0.0), 3)
+        if result.get("reports_purged"):
+            logger.info(
+                "Retention purged %d reports in %d chunks (%.2fs)",
+                result["reports_purged"],
+                result.get("chunks", 0),
+                result.get("seconds", 0.0),
+            )
+        return result
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Retention compaction failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"interval_seconds": self.interval, "last_run": self._last, **self._totals}
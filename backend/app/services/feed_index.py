@@ -0,0 +1,266 @@
+"""Offline threat-feed index with CIDR-aware lookups."""
+import csv
+import ipaddress
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_IPV4_MAX = 0xFFFFFFFF
+_IPV4_MAPPED_PREFIX = 0xFFFF  # ::ffff:0:0/96, shifted right by 32
+_CSV_COLUMNS = ("ip", "ip_address", "ipaddress", "cidr", "network", "address")
+
+
+@dataclass(frozen=True)
+class FeedSource:
+    name: str
+    path: str
+    category: str
+    format: str = "auto"  # auto | ip | cidr | csv
+    column: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _FeedRanges:
+    source: FeedSource
+    starts: array
+    ends: array
+    # IPv6 ranges do not fit an array typecode; plain sorted lists of 128-bit ints
+    starts6: Tuple[int, ...] = ()
+    ends6: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    feeds: Tuple[_FeedRanges, ...]
+    entries: int
+    loaded_at: str
+    load_seconds: float
+
+
+def ipv4_to_int(ip: str) -> int:
+    return struct.unpack("!I", socket.inet_pton(socket.AF_INET, ip))[0]
+
+
+def ipv6_to_int(ip: str) -> int:
+    high, low = struct.unpack("!QQ", socket.inet_pton(socket.AF_INET6, ip))
+    return high << 64 | low
+
+
+def parse_range6(value: str) -> Tuple[int, int]:
+    """Parse an IPv6 address or CIDR into an inclusive ``(start, end)`` integer range."""
+    network = ipaddress.IPv6Network(value.strip(), strict=False)
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """Parse an IPv4 address or CIDR into an inclusive ``(start, end)`` integer range."""
+    value = value.strip()
+    if "/" not in value:
+        n = ipv4_to_int(value)
+        return n, n
+    address, _, prefix = value.partition("/")
+    bits = int(prefix)
+    if not 0 <= bits <= 32:
+        raise ValueError(f"Invalid prefix length in {value!r}")
+    host_mask = _IPV4_MAX >> bits
+    start = ipv4_to_int(address) & ~host_mask & _IPV4_MAX
+    return start, start | host_mask
+
+
+def _iter_values(source: FeedSource) -> Iterator[str]:
+    path = Path(source.path)
+    fmt = source.format
+    if fmt == "auto":
+        fmt = "csv" if path.suffix.lower() == ".csv" else "ip"
+    with path.open(newline="", encoding="utf-8", errors="replace") as handle:
+        if fmt == "csv":
+            reader = csv.reader(handle)
+            header = next(reader, None)
+            column = 0
+            if header:
+                lowered = [cell.strip().lower() for cell in header]
+                wanted = (source.column.lower(),) if source.column else _CSV_COLUMNS
+                match = next((lowered.index(name) for name in wanted if name in lowered), None)
+                if match is not None:
+                    column = match
+                elif header[0].strip():
+                    yield header[0]
+            for row in reader:
+                if len(row) > column:
+                    yield row[column]
+        else:
+            # Plain IP and CIDR lists share a format: one entry per line, '#' or ';' comments
+            for line in handle:
+                entry = line.split("#", 1)[0].split(";", 1)[0].strip()
+                if entry:
+                    yield entry.split()[0]
+
+
+def _build_ranges(source: FeedSource) -> Tuple[_FeedRanges, int, int]:
+    """Load one feed into merged, sorted ranges; returns ``(ranges, entries, skipped)``."""
+    packed: List[int] = []
+    ranges6: List[Tuple[int, int]] = []
+    skipped = 0
+    for value in _iter_values(source):
+        try:
+            if ":" in value:
+                ranges6.append(parse_range6(value))
+            else:
+                start, end = parse_range(value)
+                packed.append(start << 32 | end)
+        except (OSError, ValueError):
+            skipped += 1
+    packed.sort()
+    ranges6.sort()
+
+    starts = array("I")
+    ends = array("I")
+    for key in packed:
+        start, end = key >> 32, key & _IPV4_MAX
+        if ends and start <= ends[-1] + 1:
+            if end > ends[-1]:
+                ends[-1] = end
+            continue
+        starts.append(start)
+        ends.append(end)
+
+    starts6: List[int] = []
+    ends6: List[int] = []
+    for start, end in ranges6:
+        if ends6 and start <= ends6[-1] + 1:
+            if end > ends6[-1]:
+                ends6[-1] = end
+            continue
+        starts6.append(start)
+        ends6.append(end)
+    feed = _FeedRanges(source, starts, ends, tuple(starts6), tuple(ends6))
+    return feed, len(packed) + len(ranges6), skipped
+
+
+class FeedIndex:
+    """
+    Sorted integer range index over local blocklists. Lookups are a binary search
+    per feed; reloads build a new snapshot off to the side and swap it in atomically.
+    """
+
+    def __init__(self, manifest_path: Optional[str] = None) -> None:
+        self.manifest_path = manifest_path
+        self._snapshot = _Snapshot(feeds=(), entries=0, loaded_at="", load_seconds=0.0)
+        self._reload_lock = threading.Lock()
+        self._skipped = 0
+        self._errors: List[str] = []
+
+    @staticmethod
+    def read_manifest(path: str) -> List[FeedSource]:
+        manifest = Path(path)
+        entries = json.loads(manifest.read_text())
+        sources = []
+        for entry in entries.get("feeds", entries) if isinstance(entries, dict) else entries:
+            feed_path = Path(entry["path"])
+            if not feed_path.is_absolute():
+                feed_path = manifest.parent / feed_path
+            sources.append(
+                FeedSource(
+                    name=entry["name"],
+                    path=str(feed_path),
+                    category=entry.get("category", "malware"),
+                    format=entry.get("format", "auto"),
+                    column=entry.get("column"),
+                )
+            )
+        return sources
+
+    def load(self, sources: List[FeedSource]) -> Dict[str, Any]:
+        with self._reload_lock:
+            started = time.perf_counter()
+            feeds = []
+            entries = 0
+            skipped = 0
+            errors = []
+            for source in sources:
+                try:
+                    ranges, count, bad = _build_ranges(source)
+                except OSError as exc:
+                    errors.append(f"{source.name}: {exc}")
+                    continue
+                feeds.append(ranges)
+                entries += count
+                skipped += bad
+            self._snapshot = _Snapshot(
+                feeds=tuple(feeds),
+                entries=entries,
+                loaded_at=datetime.now(timezone.utc).isoformat(),
+                load_seconds=round(time.perf_counter() - started, 3),
+            )
+            self._skipped = skipped
+            self._errors = errors
+        return self.stats()
+
+    def reload(self) -> Dict[str, Any]:
+        if not self.manifest_path:
+            return self.stats()
+        return self.load(self.read_manifest(self.manifest_path))
+
+    def lookup_int(self, n: int) -> List[Dict[str, str]]:
+        matches = []
+        for feed in self._snapshot.feeds:
+            idx = bisect_right(feed.starts, n) - 1
+            if idx >= 0 and feed.ends[idx] >= n:
+                matches.append({"feed": feed.source.name, "category": feed.source.category})
+        return matches
+
+    def lookup_int6(self, n: int) -> List[Dict[str, str]]:
+        matches = []
+        for feed in self._snapshot.feeds:
+            idx = bisect_right(feed.starts6, n) - 1
+            if idx >= 0 and feed.ends6[idx] >= n:
+                matches.append({"feed": feed.source.name, "category": feed.source.category})
+        return matches
+
+    def lookup(self, ip: str) -> List[Dict[str, str]]:
+        try:
+            if ":" not in ip:
+                return self.lookup_int(ipv4_to_int(ip))
+            n = ipv6_to_int(ip)
+        except OSError:
+            return []
+        if n >> 32 == _IPV4_MAPPED_PREFIX:
+            return self.lookup_int(n & _IPV4_MAX)
+        return self.lookup_int6(n)
+
+    def memory_bytes(self) -> int:
+        total = 0
+        for feed in self._snapshot.feeds:
+            total += feed.starts.itemsize * len(feed.starts) + feed.ends.itemsize * len(feed.ends)
+            if feed.starts6:
+                total += sys.getsizeof(feed.starts6) + sys.getsizeof(feed.ends6)
+                total += sum(sys.getsizeof(n) for n in feed.starts6 + feed.ends6)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "feeds": [
+                {
+                    "name": feed.source.name,
+                    "category": feed.source.category,
+                    "ranges": len(feed.starts) + len(feed.starts6),
+                }
+                for feed in snapshot.feeds
+            ],
+            "entries": snapshot.entries,
+            "skipped_entries": self._skipped,
+            "errors": list(self._errors),
+            "index_bytes": self.memory_bytes(),
+            "loaded_at": snapshot.loaded_at or None,
+            "load_seconds": snapshot.load_seconds,
+        }
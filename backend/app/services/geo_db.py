@@ -0,0 +1,251 @@
+"""Offline geolocation/ASN database answering country, countryCode and org in process."""
+import csv
+import heapq
+import mmap
+import os
+import time
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .feed_index import ipv4_to_int, parse_range
+
+try:
+    import maxminddb
+    MAXMINDDB_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    MAXMINDDB_AVAILABLE = False
+
+_MAGIC = b"TICEGEO1"
+_BYTE_ORDER_MARK = 0x01020304
+# magic, byte-order mark, range count, record count
+_HEADER_SIZE = len(_MAGIC) + 4 * 3
+_FIELD_SEPARATOR = "\x1f"
+
+
+def _read_csv_ranges(csv_path: Path) -> Tuple[List[Tuple[int, int, int]], List[List[str]]]:
+    """
+    Read ``network`` (CIDR) or ``start``/``end`` (dotted or integer) rows plus
+    ``country``, ``country_code`` and ``org`` (or ``asn``/``as``) columns.
+    """
+    records: List[List[str]] = []
+    record_ids: Dict[Tuple[str, str, str], int] = {}
+    ranges: List[Tuple[int, int, int]] = []
+
+    def to_int(value: str) -> int:
+        value = value.strip()
+        return int(value) if value.isdigit() else ipv4_to_int(value)
+
+    with csv_path.open(newline="", encoding="utf-8", errors="replace") as handle:
+        reader = csv.DictReader(handle)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+
+        def column(*names: str) -> Optional[str]:
+            return next((fields[name] for name in names if name in fields), None)
+
+        network_col = column("network", "cidr")
+        start_col = column("start", "start_ip", "ip_from", "range_start")
+        end_col = column("end", "end_ip", "ip_to", "range_end")
+        country_col = column("country", "country_name")
+        code_col = column("country_code", "countrycode", "iso_code")
+        org_col = column("org", "as", "asn", "as_org", "autonomous_system_organization")
+        if not network_col and not (start_col and end_col):
+            raise ValueError(f"{csv_path} needs a 'network' column or 'start'/'end' columns")
+
+        for row in reader:
+            try:
+                if network_col:
+                    start, end = parse_range(row[network_col])
+                else:
+                    start, end = to_int(row[start_col]), to_int(row[end_col])
+            except (OSError, ValueError):
+                continue
+            key = (
+                (row.get(country_col) if country_col else "") or "Unknown",
+                (row.get(code_col) if code_col else "") or "Unknown",
+                (row.get(org_col) if org_col else "") or "Unknown",
+            )
+            record_id = record_ids.get(key)
+            if record_id is None:
+                record_id = record_ids[key] = len(records)
+                records.append(list(key))
+            ranges.append((start, end, record_id))
+
+    ranges.sort()
+    return ranges, records
+
+
+def _flatten_ranges(ranges: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Split start-sorted, possibly nested ranges into disjoint ones so a single
+    bisect finds the answer; where ranges overlap the narrowest one wins.
+    """
+    bounds = sorted({start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges})
+    flat: List[Tuple[int, int, int]] = []
+    active: List[Tuple[int, int, int, int]] = []
+    pos = 0
+    for low, high in zip(bounds, bounds[1:]):
+        while pos < len(ranges) and ranges[pos][0] <= low:
+            start, end, record_id = ranges[pos]
+            heapq.heappush(active, (end - start, pos, end, record_id))
+            pos += 1
+        while active and active[0][2] < low:
+            heapq.heappop(active)
+        if not active:
+            continue
+        record_id = active[0][3]
+        if flat and flat[-1][2] == record_id and flat[-1][1] + 1 == low:
+            flat[-1] = (flat[-1][0], high - 1, record_id)
+        else:
+            flat.append((low, high - 1, record_id))
+    return flat
+
+
+def compile_csv(csv_path: str, out_path: str) -> int:
+    """
+    Compile a CSV range file into the memory-mappable binary format; returns the range count.
+
+    Layout after the header: range starts, range ends and record ids (uint32 each),
+    record byte offsets (uint32, one extra for the end), then the UTF-8 record blob.
+    """
+    ranges, records = _read_csv_ranges(Path(csv_path))
+    ranges = _flatten_ranges(ranges)
+    starts = array("I", (r[0] for r in ranges))
+    ends = array("I", (r[1] for r in ranges))
+    record_index = array("I", (r[2] for r in ranges))
+    encoded = [_FIELD_SEPARATOR.join(record).encode("utf-8") for record in records]
+    offsets = array("I", [0])
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    header = array("I", [_BYTE_ORDER_MARK, len(ranges), len(records)])
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(_MAGIC)
+        header.tofile(handle)
+        starts.tofile(handle)
+        ends.tofile(handle)
+        record_index.tofile(handle)
+        offsets.tofile(handle)
+        handle.write(b"".join(encoded))
+    os.replace(tmp_path, out_path)
+    return len(ranges)
+
+
+class GeoDatabase:
+    """
+    Range-indexed geo/ASN lookups. Compiled databases are memory-mapped, so the
+    range arrays and record strings stay in the page cache instead of on the
+    Python heap and startup does no parsing. A MaxMind
+    ``.mmdb`` file is used through ``maxminddb`` when that package is installed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._mmap: Optional[mmap.mmap] = None
+        self._reader = None
+        self._starts = self._ends = self._record_index = self._offsets = None
+        self._blob_start = 0
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self) -> None:
+        started = time.perf_counter()
+        if self.path.suffix.lower() == ".mmdb":
+            if not MAXMINDDB_AVAILABLE:
+                raise RuntimeError("Reading .mmdb files requires the 'maxminddb' package")
+            self._reader = maxminddb.open_database(str(self.path), maxminddb.MODE_MMAP)
+        else:
+            binary = self.path
+            if self.path.suffix.lower() == ".csv":
+                binary = self.path.with_suffix(".geo.bin")
+                if not binary.exists() or binary.stat().st_mtime < self.path.stat().st_mtime:
+                    compile_csv(str(self.path), str(binary))
+            self._map(binary)
+        self.load_seconds = round(time.perf_counter() - started, 4)
+
+    def _map(self, binary: Path) -> None:
+        with binary.open("rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{binary} is not a compiled geo database")
+        view = memoryview(self._mmap)
+        mark, count, record_count = view[len(_MAGIC):_HEADER_SIZE].cast("I")
+        if mark != _BYTE_ORDER_MARK:
+            raise ValueError(f"{binary} was compiled on a machine with a different byte order")
+        offset = _HEADER_SIZE
+        size = 4 * count
+        self._starts = view[offset:offset + size].cast("I")
+        self._ends = view[offset + size:offset + 2 * size].cast("I")
+        self._record_index = view[offset + 2 * size:offset + 3 * size].cast("I")
+        offsets_start = offset + 3 * size
+        self._offsets = view[offsets_start:offsets_start + 4 * (record_count + 1)].cast("I")
+        self._blob_start = offsets_start + 4 * (record_count + 1)
+
+    def _record(self, record_id: int) -> List[str]:
+        start = self._blob_start + self._offsets[record_id]
+        end = self._blob_start + self._offsets[record_id + 1]
+        return self._mmap[start:end].decode("utf-8").split(_FIELD_SEPARATOR)
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        result = self._lookup_mmdb(ip) if self._reader is not None else self._lookup_ranges(ip)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _lookup_ranges(self, ip: str) -> Optional[Dict[str, Any]]:
+        try:
+            n = ipv4_to_int(ip)
+        except OSError:
+            return None
+        idx = bisect_right(self._starts, n) - 1
+        if idx < 0 or self._ends[idx] < n:
+            return None
+        country, country_code, org = self._record(self._record_index[idx])
+        return {"country": country, "countryCode": country_code, "org": org}
+
+    def _lookup_mmdb(self, ip: str) -> Optional[Dict[str, Any]]:
+        try:
+            record = self._reader.get(ip)
+        except ValueError:
+            return None
+        if not record:
+            return None
+        country = record.get("country") or record.get("registered_country") or {}
+        org = record.get("autonomous_system_organization")
+        asn = record.get("autonomous_system_number")
+        if asn and org:
+            org = f"AS{asn} {org}"
+        return {
+            "country": (country.get("names") or {}).get("en", "Unknown"),
+            "countryCode": country.get("iso_code", "Unknown"),
+            "org": org or "Unknown",
+        }
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+        for view in (self._starts, self._ends, self._record_index, self._offsets):
+            if view is not None:
+                view.release()
+        self._starts = self._ends = self._record_index = self._offsets = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "format": "mmdb" if self._reader is not None else "ranges",
+            "ranges": len(self._starts) if self._starts is not None else None,
+            "records": len(self._offsets) - 1 if self._offsets is not None else None,
+            "mapped_bytes": len(self._mmap) if self._mmap is not None else None,
+            "load_seconds": self.load_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
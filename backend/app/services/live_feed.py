@@ -0,0 +1,98 @@
+"""In-process pub/sub that fans repository changes out to Server-Sent Events clients."""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Sent to a subscriber that fell too far behind; the client reloads instead of replaying
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+class LiveFeed:
+    """
+    ``publish`` encodes each event once and queues the bytes for every
+    subscriber, so the cost grows with the write rate rather than with the
+    number of open dashboards. A subscriber whose queue fills (a stalled
+    client) has its backlog replaced by a single ``resync`` event.
+    """
+
+    def __init__(self, queue_size: int = 256, heartbeat: float = 15.0, retry_ms: int = 3000) -> None:
+        self.queue_size = max(1, queue_size)
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._sequence = 0
+        self._closing = False
+        self._counters = {"events": 0, "deliveries": 0, "resyncs": 0, "connections": 0}
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._closing = False
+
+    def close(self) -> None:
+        """End every open stream."""
+        self._closing = True
+        for queue in self._subscribers:
+            self._offer(queue, None)
+
+    def publish_threadsafe(self, kind: str, items: List[Dict[str, Any]]) -> None:
+        """Repository listener: hands events from the writer thread to the event loop."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(self.publish, kind, items)
+        except RuntimeError:
+            # The loop shut down between the check and the call
+            pass
+
+    def publish(self, kind: str, items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            self._sequence += 1
+            message = (
+                f"id: {self._sequence}\nevent: {kind}\n"
+                f"data: {json.dumps(item, separators=(',', ':'), default=str)}\n\n"
+            ).encode("utf-8")
+            self._counters["events"] += 1
+            for queue in self._subscribers:
+                self._offer(queue, message)
+
+    def _offer(self, queue: asyncio.Queue, message: Optional[bytes]) -> None:
+        try:
+            queue.put_nowait(message)
+            if message is not None:
+                self._counters["deliveries"] += 1
+            return
+        except asyncio.QueueFull:
+            pass
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC if message is not None else None)
+        if message is not None:
+            self._counters["resyncs"] += 1
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """One client's event stream; ends when the client disconnects or the feed closes."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        self._counters["connections"] += 1
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode("ascii")
+            while not self._closing:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"subscribers": len(self._subscribers), "queue_size": self.queue_size, **self._counters}
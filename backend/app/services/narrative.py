@@ -1,8 +1,14 @@
 import os
 import asyncio
+import time
+from typing import Optional, Tuple
+
 from ..models import NormalizedThreatReport
+from .narrative_cache import IP_PLACEHOLDER, NarrativeCache, narrative_fingerprint, narrative_profile
+from .utils import SingleFlight
 
 try:
+    import httpx
     from openai import OpenAI
     OPENAI_AVAILABLE = True
 except Exception:  # noqa: BLE001
@@ -10,34 +16,102 @@ except Exception:  # noqa: BLE001
 
 
 class NarrativeGenerator:
-    def __init__(self, openai_key: str | None = None):
+    def __init__(
+        self,
+        openai_key: str | None = None,
+        base_url: str | None = None,
+        timeout: float = 20.0,
+        cache: Optional[NarrativeCache] = None,
+    ):
         self.openai_key = openai_key or os.getenv("OPENAI_API_KEY")
+        self.timeout = timeout
+        self.cache = cache
+        # Concurrent misses on one fingerprint (a burst of similar botnet nodes) share a completion
+        self._flights = SingleFlight()
         self.client = None
         if OPENAI_AVAILABLE and self.openai_key:
             try:
-                self.client = OpenAI(api_key=self.openai_key)
+                # No SDK retries: a slow completion is abandoned for the template instead. The
+                # explicit httpx client keeps the SDK working with httpx releases that dropped "proxies"
+                self.client = OpenAI(
+                    api_key=self.openai_key,
+                    base_url=base_url or None,
+                    timeout=timeout,
+                    max_retries=0,
+                    http_client=httpx.Client(timeout=timeout),
+                )
             except Exception:  # noqa: BLE001
                 self.client = None
 
+    @property
+    def llm_enabled(self) -> bool:
+        return self.client is not None
+
     async def generate(self, report: NormalizedThreatReport, score: int, risk_level: str) -> str:
         if self.client:
             try:
-                return await self._generate_with_openai(report, score, risk_level)
+                return await asyncio.wait_for(self.generate_llm(report, score, risk_level), self.timeout)
             except Exception:  # noqa: BLE001
                 pass
-        return self._generate_template(report, score, risk_level)
+        return self.generate_template(report, score, risk_level)
+
+    async def cached(self, report: NormalizedThreatReport, score: int, risk_level: str) -> Optional[str]:
+        """The cached LLM narrative for this profile, without calling the LLM on a miss."""
+        if self.cache is None or self.client is None:
+            return None
+        # A miss here is counted by the generate_llm call that follows it. The cache is SQLite
+        # (a hit also writes last_used), so it is read off the event loop
+        fingerprint = narrative_fingerprint(report, score, risk_level)
+        narrative = await asyncio.to_thread(self.cache.get, fingerprint, False)
+        return narrative.replace(IP_PLACEHOLDER, report.ip_address) if narrative is not None else None
+
+    async def generate_llm(self, report: NormalizedThreatReport, score: int, risk_level: str) -> str:
+        """Narrative from the cache or the LLM; raises on failure, and callers bound the wait."""
+        if self.cache is None:
+            narrative, _ = await self._complete(report, score, risk_level)
+            return narrative
+        fingerprint = narrative_fingerprint(report, score, risk_level)
+        narrative = await asyncio.to_thread(self.cache.get, fingerprint)
+        if narrative is None:
+            narrative = await self._flights.do(fingerprint, self._complete_and_cache, fingerprint, report, score, risk_level)
+        return narrative.replace(IP_PLACEHOLDER, report.ip_address)
 
-    async def _generate_with_openai(self, report: NormalizedThreatReport, score: int, risk_level: str) -> str:
+    async def _complete_and_cache(
+        self, fingerprint: str, report: NormalizedThreatReport, score: int, risk_level: str
+    ) -> str:
+        started = time.perf_counter()
+        narrative, tokens = await self._complete(report, score, risk_level)
+        # Stored without the IP so any address with the same profile can reuse it
+        generic = narrative.replace(report.ip_address, IP_PLACEHOLDER)
+        await asyncio.to_thread(self.cache.put, fingerprint, generic, time.perf_counter() - started, tokens)
+        return generic
+
+    async def _complete(self, report: NormalizedThreatReport, score: int, risk_level: str) -> Tuple[str, int]:
         system = "You are a security analyst generating concise threat narratives."
-        user = (
-            f"Summarize the threat for IP {report.ip_address}. "
-            f"Risk: {risk_level} ({score}/100). "
-            f"Categories: {', '.join(report.threat_categories) or 'none'}. "
-            f"Malicious vendors: {report.malicious_sources}. "
-            f"Abuse confidence: {report.abuse_confidence}%. "
-            f"Country: {report.country}. ASN: {report.asn_name}. "
-            "Give a short paragraph and 2-3 recommended actions."
-        )
+        if self.cache is None:
+            user = (
+                f"Summarize the threat for IP {report.ip_address}. "
+                f"Risk: {risk_level} ({score}/100). "
+                f"Categories: {', '.join(report.threat_categories) or 'none'}. "
+                f"Malicious vendors: {report.malicious_sources}. "
+                f"Abuse confidence: {report.abuse_confidence}%. "
+                f"Country: {report.country}. ASN: {report.asn_name}. "
+                "Give a short paragraph and 2-3 recommended actions."
+            )
+        else:
+            # The narrative is reused for every address in its fingerprint bucket, so it is
+            # written from the bucket's ranges and must not quote this address's exact numbers
+            profile = narrative_profile(report, score, risk_level)
+            user = (
+                f"Summarize the threat for IP {report.ip_address}. "
+                f"Risk: {risk_level} (score {profile['score']}/100). "
+                f"Categories: {', '.join(profile['categories']) or 'none'}. "
+                f"Malicious vendors: {profile['malicious']}. "
+                f"Abuse confidence: {profile['confidence']}%. "
+                f"Country: {profile['country']}. ASN: {profile['asn']}. "
+                "Numbers are ranges; quote them as ranges, never as exact values. "
+                "Give a short paragraph and 2-3 recommended actions."
+            )
 
         # OpenAI Python SDK is sync; run in a thread to avoid blocking
         def _call():
@@ -50,11 +124,12 @@ class NarrativeGenerator:
                 temperature=0.2,
                 max_tokens=220,
             )
-            return resp.choices[0].message.content.strip()
+            usage = getattr(resp, "usage", None)
+            return resp.choices[0].message.content.strip(), (getattr(usage, "total_tokens", 0) or 0)
 
         return await asyncio.to_thread(_call)
 
-    def _generate_template(self, report: NormalizedThreatReport, score: int, risk_level: str) -> str:
+    def generate_template(self, report: NormalizedThreatReport, score: int, risk_level: str) -> str:
         actions = [
             "Block the IP at network perimeter and WAF",
             "Search SIEM logs for recent connections from this IP",
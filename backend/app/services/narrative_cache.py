@@ -0,0 +1,188 @@
+"""SQLite-backed cache of LLM narratives keyed by a bucketed threat-feature fingerprint."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..models import NormalizedThreatReport
+
+# Bump when the prompt changes so narratives written for the old prompt stop matching
+PROMPT_VERSION = 2
+# Cached narratives store this in place of the IP address they were generated for
+IP_PLACEHOLDER = "{ip}"
+
+
+def _bucket(value: float, width: int) -> int:
+    return int(value // width) * width
+
+
+def _span(low: int, high: int) -> str:
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def narrative_profile(report: NormalizedThreatReport, score: int, risk_level: str) -> Dict[str, Any]:
+    """
+    The profile a cacheable narrative is written from. Numbers are bucketed
+    (score and abuse confidence to tens, vendor detections to powers of two)
+    and given as ranges, so near-identical profiles, such as nodes of one
+    botnet, share a narrative that is true for each of them.
+    """
+    score_low = _bucket(score, 10)
+    confidence_low = _bucket(report.abuse_confidence, 10)
+    bits = int(report.malicious_sources).bit_length()
+    return {
+        "risk": risk_level,
+        "score": _span(score_low, min(score_low + 9, 100)),
+        "confidence": _span(confidence_low, min(confidence_low + 9, 100)),
+        "malicious": _span((1 << bits) >> 1, (1 << bits) - 1),
+        "categories": sorted(set(report.threat_categories)),
+        "country": report.country.strip(),
+        "asn": report.asn_name.strip(),
+    }
+
+
+def narrative_fingerprint(report: NormalizedThreatReport, score: int, risk_level: str) -> str:
+    """Hash of ``narrative_profile``, the only fields a cached narrative's prompt uses."""
+    features = {"v": PROMPT_VERSION, **narrative_profile(report, score, risk_level)}
+    features["country"] = features["country"].lower()
+    features["asn"] = features["asn"].lower()
+    canonical = json.dumps(features, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class NarrativeCache:
+    """
+    Narratives persist in SQLite; entries older than ``ttl`` seconds are
+    misses, and beyond ``max_entries`` the least recently used are evicted.
+    Every hit is credited with the generation time and tokens it saved.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 5000,
+        ttl: float = 7 * 24 * 60 * 60,
+        cost_per_1k_tokens: float = 0.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "writes": 0,
+            "saved_seconds": 0.0,
+            "saved_tokens": 0,
+        }
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._initialize()
+
+    def _initialize(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS narrative_cache (
+                    fingerprint TEXT PRIMARY KEY,
+                    narrative TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    generation_seconds REAL NOT NULL,
+                    tokens INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_narrative_cache_last_used ON narrative_cache(last_used)"
+            )
+        self.purge_expired()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, fingerprint: str, count_miss: bool = True) -> Optional[str]:
+        """
+        Cached narrative (still holding IP_PLACEHOLDER) or None. Pass
+        ``count_miss=False`` for a peek that a counted lookup will follow.
+        """
+        now = self._clock()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT narrative, created_at, generation_seconds, tokens FROM narrative_cache WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+            if row is not None and now - row[1] >= self.ttl:
+                self._conn.execute("DELETE FROM narrative_cache WHERE fingerprint = ?", (fingerprint,))
+                self._counters["expired"] += 1
+                row = None
+            if row is None:
+                if count_miss:
+                    self._counters["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE narrative_cache SET last_used = ?, hits = hits + 1 WHERE fingerprint = ?",
+                (now, fingerprint),
+            )
+            self._counters["hits"] += 1
+            self._counters["saved_seconds"] += row[2]
+            self._counters["saved_tokens"] += row[3]
+            return row[0]
+
+    def put(self, fingerprint: str, narrative: str, generation_seconds: float, tokens: int = 0) -> None:
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO narrative_cache
+                    (fingerprint, narrative, created_at, last_used, hits, generation_seconds, tokens)
+                VALUES (?, ?, ?, ?, 0, ?, ?)
+                """,
+                (fingerprint, narrative, now, now, generation_seconds, int(tokens)),
+            )
+            self._counters["writes"] += 1
+            excess = self._count() - self.max_entries
+            if self.max_entries > 0 and excess > 0:
+                self._counters["evictions"] += self._conn.execute(
+                    """
+                    DELETE FROM narrative_cache WHERE fingerprint IN (
+                        SELECT fingerprint FROM narrative_cache ORDER BY last_used LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                ).rowcount
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM narrative_cache").fetchone()[0]
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM narrative_cache WHERE created_at <= ?", (self._clock() - self.ttl,)
+            ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = self._count()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "saved_seconds": round(counters["saved_seconds"], 3),
+            "saved_usd": round(counters["saved_tokens"] / 1000 * self.cost_per_1k_tokens, 4),
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
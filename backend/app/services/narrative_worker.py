@@ -0,0 +1,123 @@
+"""Background worker pool that produces LLM narratives off the analysis request path."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NarrativeWorkerPool:
+    """
+    Runs ``generate_fn(job)`` on up to ``workers`` jobs at a time, each bounded
+    by ``timeout`` seconds, and hands the result to ``apply_fn(job, narrative)``.
+    ``narrative`` is ``None`` when generation failed, timed out, or the pool
+    shut down first, so the caller can settle the job either way. ``submit``
+    never waits: once ``max_pending`` jobs are queued, new jobs are refused.
+    """
+
+    def __init__(
+        self,
+        generate_fn: Callable[[Any], Awaitable[str]],
+        apply_fn: Callable[[Any, Optional[str]], Awaitable[None]],
+        workers: int = 4,
+        timeout: float = 20.0,
+        max_pending: int = 1000,
+    ) -> None:
+        self._generate_fn = generate_fn
+        self._apply_fn = apply_fn
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: Dict[int, Any] = {}
+        self._closing = False
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "rejected": 0,
+            "last_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._closing = False
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    def submit(self, job: Any) -> bool:
+        """Queue ``job``; returns False (and drops it) when the pool is closed or full."""
+        if self._closing:
+            self._counters["rejected"] += 1
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            return False
+        self._counters["submitted"] += 1
+        return True
+
+    async def close(self) -> None:
+        """Abandon in-flight and queued jobs, settling each with ``apply_fn(job, None)``."""
+        if not self._tasks:
+            return
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        leftovers = list(self._jobs.values())
+        self._jobs.clear()
+        while not self._queue.empty():
+            leftovers.append(self._queue.get_nowait())
+        for job in leftovers:
+            await self._settle(job, None)
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._queue.get()
+            key = id(job)
+            # Left registered until settled, so close() can settle it if cancelled
+            # mid-generation or mid-write; a None narrative never overwrites a stored one
+            self._jobs[key] = job
+            narrative = await self._generate(job)
+            await self._settle(job, narrative)
+            self._jobs.pop(key, None)
+
+    async def _generate(self, job: Any) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            narrative = await asyncio.wait_for(self._generate_fn(job), self.timeout)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            logger.warning("Narrative generation timed out after %.1fs", self.timeout)
+            return None
+        except Exception as exc:  # noqa: BLE001
+            self._counters["failures"] += 1
+            logger.warning("Narrative generation failed: %s", exc)
+            return None
+        self._counters["completed"] += 1
+        self._counters["last_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return narrative
+
+    async def _settle(self, job: Any, narrative: Optional[str]) -> None:
+        try:
+            await self._apply_fn(job, narrative)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Could not store generated narrative: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "timeout_seconds": self.timeout,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._jobs),
+            **self._counters,
+        }
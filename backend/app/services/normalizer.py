@@ -1,6 +1,6 @@
 from typing import Dict, Any
 from ..models import NormalizedThreatReport
-from ..config import HIGH_RISK_COUNTRIES
+from ..config import HIGH_RISK_COUNTRIES, THREAT_CATEGORIES
 
 
 class DataNormalizer:
@@ -8,6 +8,7 @@ class DataNormalizer:
     def normalize(raw_data: Dict[str, Any], ip: str) -> NormalizedThreatReport:
         abuseipdb = raw_data.get("abuseipdb", {}) or {}
         geo = raw_data.get("geolocation", {}) or {}
+        feed_matches = (raw_data.get("local_feeds", {}) or {}).get("matches", []) or []
         
         # Extract AbuseIPDB data
         abuse_confidence_score = float(abuseipdb.get("abuse_confidence_score", 0) or 0)
@@ -49,6 +50,7 @@ class DataNormalizer:
             abuseipdb_reputation,
             is_tor,
             is_whitelisted,
+            [match.get("category", "") for match in feed_matches],
         )
 
         reputation_score = DataNormalizer._reputation(abuse_confidence_score, total_reports, abuseipdb_reputation)
@@ -64,10 +66,11 @@ class DataNormalizer:
             country=country,
             country_code=country_code,
             asn_name=asn_name,
+            feed_matches=list(dict.fromkeys(match.get("feed", "") for match in feed_matches)),
         )
 
     @staticmethod
-    def _categorize(abuse_conf: float, total_reports: int, country_code: str, threat_types: list, reputation: int, is_tor: bool = False, is_whitelisted: bool = False):
+    def _categorize(abuse_conf: float, total_reports: int, country_code: str, threat_types: list, reputation: int, is_tor: bool = False, is_whitelisted: bool = False, feed_categories: list = None):
         categories = []
         
         # Skip categorization if IP is whitelisted
@@ -121,6 +124,12 @@ class DataNormalizer:
             if mapped and mapped not in categories:
                 categories.append(mapped)
         
+        # Local blocklist feed categories
+        for feed_category in feed_categories or []:
+            mapped = threat_type_mapping.get(feed_category.lower(), feed_category.lower())
+            if mapped in THREAT_CATEGORIES and mapped not in categories:
+                categories.append(mapped)
+        
         # Geography-based
         if country_code in HIGH_RISK_COUNTRIES:
             if "c2" not in categories:
@@ -0,0 +1,214 @@
+"""Client-side token-bucket rate limiting and quota tracking for upstream APIs."""
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class RateLimitedError(Exception):
+    """The upstream answered 429; ``retry_after`` is how long it asked us to wait."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExhaustedError(Exception):
+    """No request slot will free up within the caller's queueing budget."""
+
+    retryable = False
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def next_utc_midnight(now: float) -> float:
+    current = datetime.fromtimestamp(now, tz=timezone.utc)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket for one upstream that also tracks the quota advertised in
+    response headers. Waiters are served in priority order; once the remaining
+    quota drops to ``interactive_reserve`` only interactive requests get through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: float,
+        burst: int,
+        quota_limit: Optional[int] = None,
+        interactive_reserve: int = 0,
+        limit_header: str = "X-RateLimit-Limit",
+        remaining_header: str = "X-RateLimit-Remaining",
+        reset_header: str = "X-RateLimit-Reset",
+        reset_is_delta: bool = False,
+        default_reset: Callable[[float], float] = next_utc_midnight,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.name = name
+        self.rate = max(rate_per_second, 1e-6)
+        self.burst = max(1, burst)
+        self.quota_limit = quota_limit
+        self.interactive_reserve = interactive_reserve
+        self.limit_header = limit_header
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self.reset_is_delta = reset_is_delta
+        self._default_reset = default_reset
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        # Count down from the configured quota until the upstream reports its own figures, so
+        # the interactive reserve holds from the first request rather than the first response
+        self.quota_remaining: Optional[int] = None
+        self.quota_reset_at: Optional[float] = None
+        self._restart_quota(self._updated)
+        self._blocked_until = 0.0
+        self._waiters: List[Tuple[int, int, object]] = []
+        self._seq = itertools.count()
+        self._cond: Optional[asyncio.Condition] = None
+        self._counters = {"granted": 0, "queued": 0, "throttled": 0, "rejected": 0}
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.quota_reset_at is not None and now >= self.quota_reset_at:
+            self._restart_quota(now)
+
+    def _restart_quota(self, now: float) -> None:
+        if self.quota_limit is None:
+            self.quota_remaining = None
+            self.quota_reset_at = None
+        else:
+            self.quota_remaining = self.quota_limit
+            self.quota_reset_at = self._default_reset(now)
+
+    def _wait_time(self, priority: Priority, now: float) -> float:
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        if self.quota_remaining is not None:
+            floor = self.interactive_reserve if priority >= Priority.BULK else 0
+            if self.quota_remaining <= floor:
+                reset_at = self.quota_reset_at or self._default_reset(now)
+                return max(0.0, reset_at - now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, max_wait: float = 30.0) -> None:
+        """Wait for a request slot, raising QuotaExhaustedError if none frees up within ``max_wait``."""
+        cond = self._condition()
+        entry = (int(priority), next(self._seq), object())
+        async with cond:
+            heapq.heappush(self._waiters, entry)
+            deadline = self._clock() + max_wait
+            queued = False
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    wait = self._wait_time(priority, now) if self._waiters[0] is entry else None
+                    if wait is not None and wait <= 0:
+                        self._tokens -= 1
+                        if self.quota_remaining is not None:
+                            self.quota_remaining -= 1
+                        self._counters["granted"] += 1
+                        return
+                    remaining = deadline - now
+                    if remaining <= 0 or (wait is not None and wait > remaining):
+                        self._counters["rejected"] += 1
+                        retry_after = wait if wait is not None else 0.0
+                        raise QuotaExhaustedError(
+                            f"{self.name} request budget exhausted; retry in {retry_after:.0f}s",
+                            retry_after=retry_after,
+                        )
+                    if not queued:
+                        queued = True
+                        self._counters["queued"] += 1
+                    timeout = remaining if wait is None else min(wait, remaining)
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                cond.notify_all()
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> float:
+        """Update quota state from an upstream response; returns the advised retry delay on 429."""
+        now = self._clock()
+        limit = _int_header(headers, self.limit_header)
+        if limit is not None:
+            self.quota_limit = limit
+        remaining = _int_header(headers, self.remaining_header)
+        if remaining is not None:
+            self.quota_remaining = remaining
+        reset = _float_header(headers, self.reset_header)
+        if reset is not None:
+            self.quota_reset_at = now + reset if self.reset_is_delta else reset
+
+        if status != 429:
+            return 0.0
+        self._counters["throttled"] += 1
+        retry_after = _float_header(headers, "Retry-After")
+        if retry_after is None and self.quota_reset_at is not None:
+            retry_after = max(0.0, self.quota_reset_at - now)
+        retry_after = retry_after if retry_after is not None else 1.0
+        self._blocked_until = max(self._blocked_until, now + retry_after)
+        return retry_after
+
+    def state(self) -> Dict[str, Any]:
+        now = self._clock()
+        self._refill(now)
+        reset_at = self.quota_reset_at
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "quota_limit": self.quota_limit,
+            "quota_remaining": self.quota_remaining,
+            "quota_resets_at": (
+                datetime.fromtimestamp(reset_at, tz=timezone.utc).isoformat() if reset_at else None
+            ),
+            "interactive_reserve": self.interactive_reserve,
+            "bulk_paused": self.quota_remaining is not None and self.quota_remaining <= self.interactive_reserve,
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 1),
+            "queued": len(self._waiters),
+            **self._counters,
+        }
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = _float_header(headers, name)
+    return int(value) if value is not None else None
+
+
+def _float_header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name) if name else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
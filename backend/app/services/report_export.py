@@ -0,0 +1,76 @@
+"""Streaming NDJSON/CSV encoding of stored reports for historical exports."""
+import asyncio
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+GZIP_LEVEL = 6
+
+
+def encode_ndjson(reports: Iterable[Dict[str, Any]]) -> bytes:
+    return "".join(
+        json.dumps(report, separators=(",", ":"), default=str) + "\n" for report in reports
+    ).encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def encode_csv(reports: Iterable[Dict[str, Any]], columns: Sequence[str], header: bool = False) -> bytes:
+    """CSV rows in ``columns`` order; list fields are joined with ``;``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    for report in reports:
+        writer.writerow([_csv_value(report.get(column)) for column in columns])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_reports(
+    fetch_page: Callable[[Optional[str]], Dict[str, Any]],
+    fmt: str,
+    columns: List[str],
+    gzip_output: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export one page at a time. ``fetch_page(cursor)`` returns a
+    ``ReportRepository.list_reports`` page and runs in a worker thread, so only
+    one page is held in memory and no database connection stays checked out
+    while the client reads. Gzip output is flushed after every page, so the
+    client receives each page as soon as it is encoded.
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format {fmt!r}")
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip_output else None
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield emit(encode_csv((), columns, header=True))
+    cursor: Optional[str] = None
+    while True:
+        page = await asyncio.to_thread(fetch_page, cursor)
+        if page["reports"]:
+            if fmt == "csv":
+                yield emit(encode_csv(page["reports"], columns))
+            else:
+                yield emit(encode_ndjson(page["reports"]))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,67 @@
+"""Serialized API responses reused until the report data they were built from changes."""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    LRU of response bodies tagged with the repository generation they were
+    built at. A lookup at a later generation is a miss, so every write
+    invalidates all entries without touching them. Used from the event loop only.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, bytes]]" = OrderedDict()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "invalidated": 0,
+            "evictions": 0,
+            "hit_seconds": 0.0,
+            "miss_seconds": 0.0,
+        }
+
+    def get(self, key: Hashable, generation: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] != generation:
+            del self._entries[key]
+            self._counters["invalidated"] += 1
+            entry = None
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return entry[1]
+
+    def put(self, key: Hashable, generation: int, body: bytes) -> None:
+        """Store ``body``; ``generation`` must be read before the data was queried."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (generation, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def observe(self, hit: bool, seconds: float) -> None:
+        """Record how long a response took to serve, from the cache or built fresh."""
+        self._counters["hit_seconds" if hit else "miss_seconds"] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self._counters
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "invalidated": counters["invalidated"],
+            "evictions": counters["evictions"],
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "hit_avg_ms": round(counters["hit_seconds"] / counters["hits"] * 1000, 3) if counters["hits"] else None,
+            "miss_avg_ms": (
+                round(counters["miss_seconds"] / counters["misses"] * 1000, 3) if counters["misses"] else None
+            ),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
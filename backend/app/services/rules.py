@@ -0,0 +1,283 @@
+"""Declarative scoring rule sets compiled into fast evaluators."""
+import hashlib
+import json
+import math
+import operator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config import HIGH_RISK_COUNTRIES, THREAT_CATEGORIES
+from ..models import CORRELATION_FIELDS, NormalizedThreatReport
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    YAML_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Bit assigned to each threat category in ScoringBatch.category_mask
+CATEGORY_BITS = {category: 1 << idx for idx, category in enumerate(THREAT_CATEGORIES)}
+
+# Named sets every rule file can reference as "@name" without redefining them
+DEFAULT_SETS = {
+    "high_risk_countries": list(HIGH_RISK_COUNTRIES),
+}
+
+NUMERIC_OPS = (">=", ">", "<=", "<", "==", "between")
+MEMBERSHIP_OPS = ("in", "not_in")
+LIST_OPS = ("contains_any", "count_gte")
+
+# Report fields that have a same-named numeric column on ScoringBatch
+_BATCH_NUMERIC_COLUMNS = (
+    "abuse_confidence", "total_reports", "malicious_sources", "suspicious_sources", *CORRELATION_FIELDS
+)
+_COMPARATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "==": operator.eq}
+
+
+class RuleSetError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    name: str
+    field: str
+    op: str
+    value: Any
+    points: int
+
+
+def read_rule_document(path: str) -> Tuple[Dict[str, Any], bytes]:
+    raw = Path(path).read_bytes()
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        if not YAML_AVAILABLE:
+            raise RuleSetError("YAML rule files require the 'PyYAML' package")
+        document = yaml.safe_load(raw)
+    else:
+        document = json.loads(raw)
+    if not isinstance(document, dict):
+        raise RuleSetError("Rule file must contain a mapping with a 'rules' list")
+    return document, raw
+
+
+def _threshold(name: str, value: Any) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RuleSetError(f"Rule {name!r} needs a numeric value, got {value!r}")
+    if not math.isfinite(number):
+        raise RuleSetError(f"Rule {name!r} needs a finite value, got {value!r}")
+    return number
+
+
+def parse_rules(document: Dict[str, Any]) -> List[RuleSpec]:
+    named_sets = {**DEFAULT_SETS, **(document.get("sets") or {})}
+    fields = NormalizedThreatReport.model_fields
+    specs: List[RuleSpec] = []
+    seen = set()
+    for position, entry in enumerate(document.get("rules") or []):
+        try:
+            name, field, op, value = entry["name"], entry["field"], entry["op"], entry["value"]
+            points = int(entry["points"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RuleSetError(f"Rule #{position} is missing name/field/op/value/points: {exc}")
+        if name in seen:
+            raise RuleSetError(f"Duplicate rule name {name!r}")
+        seen.add(name)
+        if field not in fields:
+            raise RuleSetError(f"Rule {name!r} references unknown field {field!r}")
+        if op not in NUMERIC_OPS + MEMBERSHIP_OPS + LIST_OPS:
+            raise RuleSetError(f"Rule {name!r} uses unknown operator {op!r}")
+
+        if isinstance(value, str) and value.startswith("@"):
+            if value[1:] not in named_sets:
+                raise RuleSetError(f"Rule {name!r} references unknown set {value!r}")
+            value = named_sets[value[1:]]
+        if op == "between":
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise RuleSetError(f"Rule {name!r}: 'between' takes [low, high) as a two-item list")
+            value = (_threshold(name, value[0]), _threshold(name, value[1]))
+        elif op in NUMERIC_OPS or op == "count_gte":
+            value = _threshold(name, value)
+        else:
+            if isinstance(value, str):
+                value = [value]
+            value = frozenset(value)
+        specs.append(RuleSpec(name=name, field=field, op=op, value=value, points=points))
+    if not specs:
+        raise RuleSetError("Rule file defines no rules")
+    return specs
+
+
+def _number(value: float) -> str:
+    # repr() of an infinite float is the bare name "inf", which the generated code cannot resolve
+    return repr(value) if math.isfinite(value) else f"float({str(value)!r})"
+
+
+def _condition_source(spec: RuleSpec, idx: int) -> str:
+    """Python expression for a non-tiered rule; set operands are bound as ``S<idx>``."""
+    attr = f"r.{spec.field}"
+    if spec.op == "between":
+        return f"{_number(spec.value[0])} <= {attr} < {_number(spec.value[1])}"
+    if spec.op in NUMERIC_OPS:
+        return f"{attr} {spec.op} {_number(spec.value)}"
+    if spec.op == "in":
+        return f"{attr} in S{idx}"
+    if spec.op == "not_in":
+        return f"{attr} not in S{idx}"
+    if spec.op == "contains_any":
+        return f"not S{idx}.isdisjoint({attr})"
+    return f"len({attr}) >= {_number(spec.value)}"
+
+
+def _generate_evaluator(specs: Sequence[RuleSpec]) -> Tuple[Callable[[NormalizedThreatReport], Tuple[int, List[str]]], str]:
+    """
+    Generate one straight-line function for the whole rule set. Numeric ``>=``/``between``
+    rules on the same field whose ranges do not overlap (the abuse-confidence and
+    report-count tiers) become a single if/elif chain from the highest threshold down,
+    so a report stops at the first tier it reaches instead of testing every tier.
+    """
+    namespace: Dict[str, Any] = {}
+    ranges: Dict[str, List[Tuple[float, float, int]]] = {}
+    for idx, spec in enumerate(specs):
+        if spec.op == ">=":
+            ranges.setdefault(spec.field, []).append((spec.value, math.inf, idx))
+        elif spec.op == "between":
+            ranges.setdefault(spec.field, []).append((spec.value[0], spec.value[1], idx))
+
+    lines = ["def evaluate(r):", "    score = 0", "    hits = []"]
+    tier_of: Dict[int, str] = {}
+    for group, (field, entries) in enumerate(ranges.items()):
+        entries.sort()
+        if len(entries) < 2 or any(prev[1] > cur[0] for prev, cur in zip(entries, entries[1:])):
+            continue
+        lines.append(f"    v{group} = r.{field}")
+        keyword = "if"
+        upper = math.inf
+        for low, high, idx in reversed(entries):
+            # A tier's upper bound only needs checking when it leaves a gap below the next tier
+            bounded = "" if high >= upper else f" and v{group} < {_number(high)}"
+            lines.append(f"    {keyword} v{group} >= {_number(low)}{bounded}:")
+            lines.append(f"        t{group} = {idx}")
+            keyword = "elif"
+            upper = low
+            tier_of[idx] = f"t{group} == {idx}"
+        lines.append("    else:")
+        lines.append(f"        t{group} = -1")
+
+    for idx, spec in enumerate(specs):
+        if isinstance(spec.value, frozenset):
+            namespace[f"S{idx}"] = spec.value
+        condition = tier_of.get(idx) or _condition_source(spec, idx)
+        lines.append(f"    if {condition}:")
+        lines.append(f"        score += {spec.points}")
+        lines.append(f"        hits.append({spec.name!r})")
+    lines.append("    return (0 if score < 0 else 100 if score > 100 else score), hits")
+
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, "<scoring-rules>", "exec"), namespace)  # noqa: S102
+    return namespace["evaluate"], source
+
+
+def _vector_check(spec: RuleSpec) -> Optional[Callable[[Any], Any]]:
+    """Column-wise version of a rule over a ScoringBatch, or None if it has no columnar form."""
+    field, op, value = spec.field, spec.op, spec.value
+    if op in NUMERIC_OPS:
+        if field not in _BATCH_NUMERIC_COLUMNS:
+            return None
+        if op == "between":
+            low, high = value
+            return lambda b: (getattr(b, field) >= low) & (getattr(b, field) < high)
+        compare = _COMPARATORS[op]
+        return lambda b: compare(getattr(b, field), value)
+    if op in MEMBERSHIP_OPS and field == "country_code":
+        members = sorted(value)
+        if op == "in":
+            return lambda b: np.isin(b.country_code, members)
+        return lambda b: ~np.isin(b.country_code, members)
+    if op == "contains_any" and field == "threat_categories":
+        bits = 0
+        for category in value:
+            bits |= CATEGORY_BITS.get(category, 0)
+        return lambda b: (b.category_mask & bits) != 0
+    if op == "count_gte" and field == "feed_matches":
+        return lambda b: b.feed_match_count >= value
+    return None
+
+
+class CompiledRuleSet:
+    """
+    Immutable rule set compiled once into generated Python for single reports
+    and into NumPy column expressions for ScoringBatch.
+    """
+
+    def __init__(self, specs: Sequence[RuleSpec], version: str, source: Optional[str] = None) -> None:
+        self.specs = list(specs)
+        self.version = version
+        self.source = source
+        self.names = [spec.name for spec in self.specs]
+        # Points a triggered rule adds to the base score; rules on correlation features add none
+        self._base_points = {
+            spec.name: 0 if spec.field in CORRELATION_FIELDS else spec.points for spec in self.specs
+        }
+        self._evaluate, self.generated_source = _generate_evaluator(self.specs)
+        self._vector: List[Optional[Callable[[Any], Any]]] = [_vector_check(spec) for spec in self.specs]
+
+    @classmethod
+    def from_file(cls, path: str) -> "CompiledRuleSet":
+        document, raw = read_rule_document(path)
+        specs = parse_rules(document)
+        digest = hashlib.sha256(raw).hexdigest()[:8]
+        declared = str(document.get("version") or "").strip()
+        version = f"{declared}+{digest}" if declared else digest
+        return cls(specs, version=version, source=str(path))
+
+    def evaluate(self, report: NormalizedThreatReport) -> Tuple[int, List[str]]:
+        return self._evaluate(report)
+
+    def base_score(self, triggered: Sequence[str]) -> int:
+        """The score ``triggered`` earns without the rules on correlation features."""
+        score = sum(self._base_points[name] for name in triggered)
+        return 0 if score < 0 else 100 if score > 100 else score
+
+    def evaluate_batch(self, batch: Any) -> Tuple[Any, Any]:
+        """Return ``(scores, triggered_bits)`` for a ScoringBatch; bit i is ``self.names[i]``."""
+        if not NUMPY_AVAILABLE:
+            raise RuleSetError("Batch scoring requires numpy")
+        if len(self.specs) > 64:
+            raise RuleSetError("Batch scoring supports at most 64 rules")
+        rows = len(batch)
+        scores = np.zeros(rows, dtype=np.int64)
+        triggered = np.zeros(rows, dtype=np.uint64)
+        for bit, (spec, check) in enumerate(zip(self.specs, self._vector)):
+            if check is None:
+                raise RuleSetError(f"Rule {spec.name!r} has no vectorized form")
+            hit = np.asarray(check(batch), dtype=bool)
+            scores += hit * spec.points
+            triggered |= hit.astype(np.uint64) << np.uint64(bit)
+        np.clip(scores, 0, 100, out=scores)
+        return scores, triggered
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "rules": [
+                {
+                    "name": spec.name,
+                    "field": spec.field,
+                    "op": spec.op,
+                    "value": sorted(spec.value) if isinstance(spec.value, frozenset) else spec.value,
+                    "points": spec.points,
+                }
+                for spec in self.specs
+            ],
+        }
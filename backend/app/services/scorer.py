@@ -1,49 +1,197 @@
-from typing import List, Tuple
-from ..models import NormalizedThreatReport
-from ..config import RISK_LEVELS
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ..models import CORRELATION_FIELDS, NormalizedThreatReport
+from ..config import RISK_LEVELS, RULES_RELOAD_INTERVAL, SCORING_RULES_PATH
+from .rules import CATEGORY_BITS, CompiledRuleSet
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:  # noqa: BLE001
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScoringBatch:
+    """Columnar view of many normalized reports, one NumPy array per field."""
+
+    abuse_confidence: Any
+    total_reports: Any
+    malicious_sources: Any
+    suspicious_sources: Any
+    category_mask: Any
+    country_code: Any
+    feed_match_count: Any
+    # Correlation features; left out, they are zero for every row
+    prefix_neighbor_ips: Any = None
+    prefix_high_risk_neighbors: Any = None
+    prefix_neighbor_mean_score: Any = None
+    asn_neighbor_ips: Any = None
+    asn_high_risk_neighbors: Any = None
+    asn_neighbor_mean_score: Any = None
+
+    def __post_init__(self) -> None:
+        for name in CORRELATION_FIELDS:
+            if getattr(self, name) is None:
+                setattr(self, name, np.zeros(len(self), dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.abuse_confidence)
+
+    @classmethod
+    def from_reports(cls, reports: Sequence[NormalizedThreatReport]) -> "ScoringBatch":
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Batch scoring requires numpy")
+        masks = []
+        for report in reports:
+            mask = 0
+            for category in report.threat_categories:
+                mask |= CATEGORY_BITS.get(category, 0)
+            masks.append(mask)
+        return cls(
+            abuse_confidence=np.fromiter((r.abuse_confidence for r in reports), dtype=np.float64, count=len(reports)),
+            total_reports=np.fromiter((r.total_reports for r in reports), dtype=np.int64, count=len(reports)),
+            malicious_sources=np.fromiter((r.malicious_sources for r in reports), dtype=np.int64, count=len(reports)),
+            suspicious_sources=np.fromiter((r.suspicious_sources for r in reports), dtype=np.int64, count=len(reports)),
+            category_mask=np.array(masks, dtype=np.uint32),
+            country_code=np.array([r.country_code for r in reports], dtype=str),
+            feed_match_count=np.fromiter((len(r.feed_matches) for r in reports), dtype=np.int64, count=len(reports)),
+            **{
+                name: np.fromiter((getattr(r, name) for r in reports), dtype=np.float64, count=len(reports))
+                for name in CORRELATION_FIELDS
+            },
+        )
 
 
 class ThreatScoringEngine:
     """
     Rule-based threat scoring with additive points and capped at 100.
+    Rules come from a declarative file (SCORING_RULES_PATH) that is hot-reloaded.
     """
 
-    def __init__(self):
-        self.rules = [
-            ("AbuseIPDB High Abuse Confidence", lambda r: r.abuse_confidence >= 85, 35),
-            ("AbuseIPDB Moderate Abuse Confidence", lambda r: 75 <= r.abuse_confidence < 85, 22),
-            ("AbuseIPDB Elevated Abuse Confidence", lambda r: 60 <= r.abuse_confidence < 75, 12),
-            ("AbuseIPDB High Report Count", lambda r: r.total_reports >= 15, 25),
-            ("AbuseIPDB Moderate Report Count", lambda r: 10 <= r.total_reports < 15, 15),
-            ("AbuseIPDB Multiple Reports", lambda r: 5 <= r.total_reports < 10, 8),
-            ("High Malicious Sources", lambda r: r.malicious_sources >= 5, 30),
-            ("Moderate Malicious Sources", lambda r: 2 <= r.malicious_sources < 5, 18),
-            ("Suspicious Sources Detected", lambda r: r.suspicious_sources >= 3, 12),
-            ("Category Malware", lambda r: "malware" in r.threat_categories, 35),
-            ("Category Botnet/C2", lambda r: "botnet" in r.threat_categories or "c2" in r.threat_categories, 30),
-            ("Category Phishing", lambda r: "phishing" in r.threat_categories, 25),
-            ("High-Risk Geography", lambda r: r.country_code in {"KP", "IR", "SY", "CU"}, 15),
-        ]
+    def __init__(self, rules_path: str = SCORING_RULES_PATH, reload_interval: float = RULES_RELOAD_INTERVAL):
+        self.rules_path = rules_path
+        self.reload_interval = reload_interval
+        self.reload_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._ruleset = CompiledRuleSet.from_file(rules_path)
+        self._mtime = self._file_mtime()
+        self._checked_at = time.monotonic()
 
-    def score(self, report: NormalizedThreatReport) -> Tuple[int, List[str]]:
-        print(f"[DEBUG] Scoring IP:{report.ip_address} | Abuse Confidence:{report.abuse_confidence} | Malicious Sources:{report.malicious_sources} | Suspicious Sources:{report.suspicious_sources} | Total Reports:{report.total_reports} | Categories:{report.threat_categories} | Country:{report.country_code}")
-        score = 0
-        triggered: List[str] = []
-        for name, cond, pts in self.rules:
+    @property
+    def ruleset(self) -> CompiledRuleSet:
+        return self._ruleset
+
+    @property
+    def version(self) -> str:
+        return self._ruleset.version
+
+    @property
+    def rules(self) -> List[str]:
+        return list(self._ruleset.names)
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.rules_path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> CompiledRuleSet:
+        """Recompile the rule file and swap it in; the previous rule set stays active on error."""
+        with self._reload_lock:
+            mtime = self._file_mtime()
             try:
-                if cond(report):
-                    score += pts
-                    triggered.append(name)
+                ruleset = CompiledRuleSet.from_file(self.rules_path)
+            except Exception as exc:  # noqa: BLE001
+                self.reload_error = str(exc)
+                self._mtime = mtime
+                logger.warning("Keeping scoring rules %s; reload failed: %s", self._ruleset.version, exc)
+                raise
+            self._ruleset = ruleset
+            self._mtime = mtime
+            self.reload_error = None
+            logger.info("Loaded scoring rules %s from %s", ruleset.version, self.rules_path)
+            return ruleset
+
+    def maybe_reload(self) -> None:
+        """Pick up edits to the rule file, checking its mtime at most every ``reload_interval`` seconds."""
+        if self.reload_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        if self._file_mtime() != self._mtime:
+            try:
+                self.reload()
             except Exception:  # noqa: BLE001
-                continue
-        score = max(0, min(100, score))
+                pass
+
+    def score(self, report: NormalizedThreatReport) -> Tuple[int, List[str]]:
+        score, triggered, _ = self.score_versioned(report)
         return score, triggered
 
+    def score_versioned(self, report: NormalizedThreatReport) -> Tuple[int, List[str], str]:
+        """Score ``report`` and return the version of the rule set that produced the result."""
+        score, _, triggered, version = self.score_with_base(report)
+        return score, triggered, version
+
+    def score_with_base(self, report: NormalizedThreatReport) -> Tuple[int, int, List[str], str]:
+        """
+        ``score_versioned`` plus the base score: the same result without the points
+        of rules on correlation features, which is what neighbours are compared on.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Scoring IP:%s | Abuse Confidence:%s | Malicious Sources:%s | Suspicious Sources:%s | "
+                "Total Reports:%s | Categories:%s | Country:%s",
+                report.ip_address, report.abuse_confidence, report.malicious_sources,
+                report.suspicious_sources, report.total_reports, report.threat_categories, report.country_code,
+            )
+        self.maybe_reload()
+        ruleset = self._ruleset
+        score, triggered = ruleset.evaluate(report)
+        return score, ruleset.base_score(triggered), triggered, ruleset.version
+
+    def score_batch(self, batch: ScoringBatch) -> Dict[str, Any]:
+        """
+        Score every row of ``batch`` in vectorized passes. Returns ``scores`` (int),
+        ``triggered`` (uint64 bitset, bit i = self.rules[i]), ``risk_levels`` and the
+        rule set ``version``; each row matches what ``score`` returns for the same report.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Batch scoring requires numpy")
+        self.maybe_reload()
+        ruleset = self._ruleset
+        scores, triggered = ruleset.evaluate_batch(batch)
+        return {
+            "scores": scores,
+            "triggered": triggered,
+            "risk_levels": self.risk_levels(scores),
+            "version": ruleset.version,
+        }
+
+    def triggered_names(self, bits: int) -> List[str]:
+        """Decode one row of ``score_batch()['triggered']`` into rule names."""
+        bits = int(bits)
+        return [name for idx, name in enumerate(self._ruleset.names) if bits >> idx & 1]
+
+    @staticmethod
+    def risk_levels(scores) -> Any:
+        levels = list(RISK_LEVELS.items())
+        conditions = [(scores >= lo) & (scores <= hi) for _, (lo, hi) in levels]
+        return np.select(conditions, [level for level, _ in levels], default="LOW")
+
     @staticmethod
     def risk_level(score: int) -> str:
         for level, (lo, hi) in RISK_LEVELS.items():
             if lo <= score <= hi:
                 return level
         return "LOW"
-
-
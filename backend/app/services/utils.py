@@ -1,26 +1,66 @@
 import asyncio
+import random
 from functools import wraps
 from ..config import MAX_RETRIES
 
 
-def with_retries(retries: int = None, delay_seconds: float = 0.5):
+def with_retries(retries: int = None, delay_seconds: float = 0.5, max_delay_seconds: float = 8.0):
+    """
+    Retry with jittered exponential backoff. Exceptions may carry ``retry_after``
+    (honoured when it fits within ``max_delay_seconds``, otherwise re-raised at once)
+    or ``retryable = False`` to skip retrying altogether.
+    """
     count = MAX_RETRIES if retries is None else retries
 
     def deco(fn):
         @wraps(fn)
         async def wrapper(*args, **kwargs):
-            last_exc = None
             for attempt in range(count + 1):
                 try:
                     return await fn(*args, **kwargs)
                 except Exception as exc:  # noqa: BLE001
-                    last_exc = exc
-                    if attempt < count:
-                        await asyncio.sleep(delay_seconds)
-            raise last_exc
+                    if attempt >= count or getattr(exc, "retryable", True) is False:
+                        raise
+                    retry_after = float(getattr(exc, "retry_after", 0) or 0)
+                    if retry_after > max_delay_seconds:
+                        raise
+                    backoff = min(max_delay_seconds, delay_seconds * (2 ** attempt))
+                    await asyncio.sleep(max(retry_after, backoff * random.uniform(0.5, 1.5)))
 
         return wrapper
 
     return deco
 
 
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    coroutine and every caller arriving while it is in flight awaits the same result.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one waiter disconnecting does not cancel the shared work
+        return await asyncio.shield(task)
+
+    def in_flight(self, key) -> bool:
+        return key in self._in_flight
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,160 @@
+"""Write-behind queue that batches report persistence off the request path."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from .utils import with_retries
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Accepts items immediately and hands them to ``flush_fn`` (run in a worker
+    thread) in batches of up to ``batch_size``, once a batch fills or
+    ``flush_interval`` seconds pass. At most ``max_pending`` items wait in
+    memory; further submitters block until the writer catches up. ``close()``
+    stops intake and drains everything still queued. ``flush_fn`` must write a
+    batch all or nothing: a batch that keeps failing is bisected so that only
+    the items failing on their own are dropped.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[Sequence[Any]], Any],
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        max_pending: int = 10000,
+    ) -> None:
+        self._flush_fn = flush_fn
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self._pending: Deque[Any] = deque()
+        self._cond = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._in_flight = 0
+        self._flush_requests = 0
+        self._counters = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "backpressure_waits": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, item: Any) -> None:
+        if self._closing:
+            raise RuntimeError("Write-behind queue is closed")
+        self.start()
+        async with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._counters["backpressure_waits"] += 1
+                await self._cond.wait_for(lambda: len(self._pending) < self.max_pending or self._closing)
+            self._pending.append(item)
+            self._counters["submitted"] += 1
+            self._cond.notify_all()
+
+    async def flush(self) -> None:
+        """Wait until everything submitted so far has been written (or dropped)."""
+        if self._task is None:
+            return
+        async with self._cond:
+            self._flush_requests += 1
+            self._cond.notify_all()
+            try:
+                await self._cond.wait_for(lambda: not self._pending and not self._in_flight)
+            finally:
+                self._flush_requests -= 1
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        async with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    return
+                if len(self._pending) < self.batch_size and not (self._closing or self._flush_requests):
+                    try:
+                        await asyncio.wait_for(
+                            self._cond.wait_for(
+                                lambda: len(self._pending) >= self.batch_size
+                                or self._closing
+                                or self._flush_requests > 0
+                            ),
+                            self.flush_interval,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._in_flight = len(batch)
+                self._cond.notify_all()
+
+            await self._flush(batch)
+
+            async with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    async def _flush(self, batch: List[Any]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._write(batch)
+            written = len(batch)
+        except Exception as exc:  # noqa: BLE001
+            self._counters["failed_batches"] += 1
+            written = await self._salvage(batch, exc)
+        self._counters["written"] += written
+        self._counters["dropped"] += len(batch) - written
+        if written:
+            self._counters["batches"] += 1
+            self._counters["last_batch_size"] = written
+            self._counters["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _salvage(self, batch: List[Any], exc: Exception) -> int:
+        """Write a batch that failed after retries in halves, once each; returns how many items were written."""
+        if len(batch) == 1:
+            logger.error("Dropping a queued write that failed on its own: %s", exc)
+            return 0
+        middle = len(batch) // 2
+        written = 0
+        for part in (batch[:middle], batch[middle:]):
+            try:
+                await asyncio.to_thread(self._flush_fn, part)
+            except Exception as part_exc:  # noqa: BLE001
+                written += await self._salvage(part, part_exc)
+            else:
+                written += len(part)
+        return written
+
+    @with_retries(retries=3, delay_seconds=0.2, max_delay_seconds=2.0)
+    async def _write(self, batch: List[Any]) -> None:
+        await asyncio.to_thread(self._flush_fn, batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "in_flight": self._in_flight,
+            "batch_size": self.batch_size,
+            "max_pending": self.max_pending,
+            **self._counters,
+        }
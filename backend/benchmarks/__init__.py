@@ -0,0 +1 @@
+"""Standalone performance benchmarks. Run from ``backend/`` with ``python -m benchmarks.<name>``."""
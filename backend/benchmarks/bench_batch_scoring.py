@@ -0,0 +1,71 @@
+"""Compare ThreatScoringEngine.score (per report) with score_batch (vectorized) on synthetic rows."""
+import argparse
+import time
+
+import numpy as np
+
+from app.models import NormalizedThreatReport
+from app.services.scorer import CATEGORY_BITS, ScoringBatch, ThreatScoringEngine
+
+COUNTRIES = np.array(["US", "DE", "CN", "RU", "KP", "IR", "BR", "Unknown"])
+
+
+def _synthetic_batch(rows: int, seed: int) -> ScoringBatch:
+    rng = np.random.default_rng(seed)
+    return ScoringBatch(
+        abuse_confidence=rng.integers(0, 101, rows).astype(np.float64),
+        total_reports=rng.integers(0, 40, rows),
+        malicious_sources=rng.integers(0, 8, rows),
+        suspicious_sources=rng.integers(0, 8, rows),
+        category_mask=rng.integers(0, 1 << len(CATEGORY_BITS), rows).astype(np.uint32),
+        country_code=COUNTRIES[rng.integers(0, len(COUNTRIES), rows)],
+        feed_match_count=rng.integers(0, 3, rows),
+    )
+
+
+def _reports_from_batch(batch: ScoringBatch):
+    names = list(CATEGORY_BITS)
+    return [
+        NormalizedThreatReport(
+            ip_address="0.0.0.0",
+            abuse_confidence=float(batch.abuse_confidence[i]),
+            total_reports=int(batch.total_reports[i]),
+            malicious_sources=int(batch.malicious_sources[i]),
+            suspicious_sources=int(batch.suspicious_sources[i]),
+            threat_categories=[name for name in names if int(batch.category_mask[i]) & CATEGORY_BITS[name]],
+            country_code=str(batch.country_code[i]),
+            feed_matches=["feed"] * int(batch.feed_match_count[i]),
+        )
+        for i in range(len(batch))
+    ]
+
+
+def main(rows: int, scalar_rows: int, seed: int) -> None:
+    engine = ThreatScoringEngine()
+    batch = _synthetic_batch(rows, seed)
+
+    started = time.perf_counter()
+    result = engine.score_batch(batch)
+    vector_seconds = time.perf_counter() - started
+    print(f"score_batch  {rows:>9,} rows: {vector_seconds:7.3f}s ({rows / vector_seconds:>12,.0f} rows/s)")
+
+    reports = _reports_from_batch(_synthetic_batch(scalar_rows, seed))
+    started = time.perf_counter()
+    scalar = [engine.score(report) for report in reports]
+    scalar_seconds = time.perf_counter() - started
+    print(
+        f"score        {scalar_rows:>9,} rows: {scalar_seconds:7.3f}s ({scalar_rows / scalar_seconds:>12,.0f} rows/s)"
+        f" -> {(scalar_seconds / scalar_rows * rows) / vector_seconds:,.0f}x slower per row"
+    )
+
+    mismatches = sum(1 for i, (score, _) in enumerate(scalar) if score != result["scores"][i])
+    print(f"scalar/vector mismatches over the first {scalar_rows:,} rows: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.rows, min(args.scalar_rows, args.rows), args.seed)
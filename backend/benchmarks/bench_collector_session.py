@@ -0,0 +1,82 @@
+"""Compare per-lookup ClientSession creation against the collector's shared pooled session.
+
+Runs ``fetch_all`` for many IPs concurrently against a local stub server and prints
+p50/p99 latency for both strategies. The stub is plain HTTP on loopback, so the gain
+measured here is connection setup only; against the real upstreams the shared pool
+also skips DNS resolution and the TLS handshake to api.abuseipdb.com.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import aiohttp
+
+from app.config import REQUEST_TIMEOUT
+from app.services.collector import ThreatIntelCollector
+from benchmarks.stub_upstream import start_stub
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _per_request_session(collector: ThreatIntelCollector, ip: str) -> None:
+    # The collector's behaviour before the shared pool: a fresh session per IP
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as session:
+        await asyncio.gather(
+            collector.fetch_abuseipdb(session, ip),
+            collector.fetch_geolocation(session, ip),
+        )
+
+
+async def _run(label: str, lookup, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(idx: int) -> None:
+        ip = f"198.51.{idx // 256 % 256}.{idx % 256}"
+        async with semaphore:
+            started = time.perf_counter()
+            await lookup(ip)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - wall
+    print(
+        f"{label:<22} p50={_percentile(latencies, 50):7.2f}ms "
+        f"p99={_percentile(latencies, 99):7.2f}ms mean={statistics.mean(latencies):7.2f}ms "
+        f"throughput={requests / wall:8.1f} lookups/s"
+    )
+
+
+async def main(requests: int, concurrency: int, latency: float) -> None:
+    runner, base_url = await start_stub(latency)
+    collector = ThreatIntelCollector(
+        abuseipdb_key="benchmark",
+        abuseipdb_concurrency=concurrency,
+        ipapi_concurrency=concurrency,
+        abuseipdb_base_url=f"{base_url}/api/v2",
+        ipapi_base_url=base_url,
+        limiters={},
+    )
+    try:
+        await _run("session per lookup", lambda ip: _per_request_session(collector, ip), requests, concurrency)
+        await collector.start()
+        await _run("shared pooled session", collector.fetch_all, requests, concurrency)
+    finally:
+        await collector.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.002, help="stub response delay in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency))
@@ -0,0 +1,110 @@
+"""Subnet/ASN correlation at millions of stored reports: incremental aggregates vs scanning reports."""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.config import RISK_LEVELS
+from app.ip_keys import ip_prefix, network_key_range
+from app.repository.report_repository import ReportRepository
+from benchmarks.bench_ip_prefix import _ip
+from benchmarks.bench_repository_load import _report
+
+HIGH = RISK_LEVELS["HIGH"][0]
+
+
+def _asn(rng: random.Random, asns: int) -> str:
+    # A few large hosting networks and a long tail, as in real abuse data
+    return f"AS{64512 + min(int(rng.paretovariate(1.2)) - 1, asns - 1)} Network"
+
+
+def _p50(fn, args, repeats: int) -> float:
+    samples = []
+    for idx in range(repeats):
+        started = time.perf_counter()
+        fn(*args[idx % len(args)])
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _scan_features(conn: sqlite3.Connection, ip: str, asn: str) -> tuple:
+    """The same neighbourhood numbers computed from reports on demand, as a per-analysis query would."""
+    aggregate = (
+        f"SELECT COUNT(DISTINCT ip_key), COUNT(DISTINCT CASE WHEN base_score >= {HIGH} THEN ip_key END),"
+        " AVG(base_score) FROM reports WHERE "
+    )
+    prefix = conn.execute(aggregate + "ip_key BETWEEN ? AND ?", network_key_range(ip_prefix(ip))).fetchone()
+    return prefix, conn.execute(aggregate + "asn = ?", (asn,)).fetchone()
+
+
+def _save(repo: ReportRepository, rng: random.Random, count: int, prefixes: int, asns: int, now: datetime) -> float:
+    started = time.perf_counter()
+    for start in range(0, count, 5000):
+        repo.save_many(
+            [
+                {
+                    **_report(rng),
+                    "ip_address": _ip(rng, prefixes, 0.3),
+                    "asn": _asn(rng, asns),
+                    "threat_score": rng.choice((rng.randint(0, 50), rng.randint(51, 100))),
+                    "analyzed_at": now - timedelta(microseconds=count - idx),
+                }
+                for idx in range(start, min(count, start + 5000))
+            ]
+        )
+    return time.perf_counter() - started
+
+
+def main(reports: int, prefixes: int, asns: int, extra: int, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "reports.db")
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        seconds = _save(repo, rng, reports, prefixes, asns, now - timedelta(days=1))
+        with sqlite3.connect(path) as conn:
+            groups = dict(conn.execute("SELECT scope, COUNT(*) FROM correlation_groups GROUP BY scope").fetchall())
+        print(f"{reports:,} reports in {seconds:.0f}s ({reports / seconds:,.0f}/s); "
+              f"{groups.get('prefix', 0):,} subnets, {groups.get('asn', 0):,} ASNs")
+
+        with_aggregates = _save(repo, rng, extra, prefixes, asns, now)
+        record = repo._record_correlations
+        repo._record_correlations = lambda *args: None
+        without = _save(repo, rng, extra, prefixes, asns, now)
+        repo._record_correlations = record
+        print(f"  insert   without aggregates {without / extra * 1e6:7.1f} us/report   "
+              f"with aggregates {with_aggregates / extra * 1e6:7.1f} us/report")
+
+        probes = [(_ip(rng, prefixes, 0.3), _asn(rng, asns)) for _ in range(repeats)]
+        conn = sqlite3.connect(path)
+        features = _p50(repo.correlation_features, probes, repeats)
+        scan_repeats = max(3, repeats // 20)
+        scanned = _p50(lambda ip, asn: _scan_features(conn, ip, asn), probes, scan_repeats)
+        print(f"  features per analysis   aggregates {features:8.3f} ms   scanning reports {scanned:9.1f} ms "
+              f"({scanned / features:,.0f}x)")
+        print(f"  /correlations top 20    {_p50(lambda: repo.list_correlations(limit=20), [()], repeats):8.3f} ms   "
+              f"?ip= {_p50(lambda ip, _: repo.list_correlations(ip_address=ip), probes, repeats):8.3f} ms")
+        conn.close()
+        repo.close()
+
+        with sqlite3.connect(path) as conn:
+            conn.execute("DROP TABLE correlation_groups")
+        started = time.perf_counter()
+        ReportRepository(db_path=path, retention_days=0, retention_limit=0).close()
+        print(f"  one-off rebuild of the aggregates on upgrade: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=2_000_000)
+    parser.add_argument("--prefixes", type=int, default=20_000)
+    parser.add_argument("--asns", type=int, default=5_000)
+    parser.add_argument("--extra", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=53)
+    args = parser.parse_args()
+    main(args.reports, args.prefixes, args.asns, args.extra, args.repeats, args.seed)
@@ -0,0 +1,77 @@
+"""Load a synthetic blocklist into FeedIndex and measure load time, memory and lookup rate."""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from app.services.feed_index import FeedIndex, FeedSource
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _int_to_ip(n: int) -> str:
+    return f"{n >> 24 & 255}.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def _write_feed(path: str, entries: int, cidr_ratio: float, rng: random.Random) -> None:
+    with open(path, "w") as handle:
+        for _ in range(entries):
+            n = rng.getrandbits(32)
+            if rng.random() < cidr_ratio:
+                prefix = rng.randint(16, 30)
+                handle.write(f"{_int_to_ip(n)}/{prefix}\n")
+            else:
+                handle.write(_int_to_ip(n) + "\n")
+
+
+def main(entries: int, lookups: int, cidr_ratio: float, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "feed.txt")
+        started = time.perf_counter()
+        _write_feed(path, entries, cidr_ratio, rng)
+        print(f"generated {entries:,} entries ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+
+        index = FeedIndex()
+        rss_before = _rss_bytes()
+        stats = index.load([FeedSource("synthetic", path, "malware")])
+        rss_after = _rss_bytes()
+
+    print(
+        f"loaded in {stats['load_seconds']:.1f}s: {stats['feeds'][0]['ranges']:,} merged ranges, "
+        f"index arrays {stats['index_bytes'] / 1e6:.1f} MB, RSS +{(rss_after - rss_before) / 1e6:.1f} MB"
+    )
+
+    probes = [rng.getrandbits(32) for _ in range(lookups)]
+    started = time.perf_counter()
+    hits = sum(1 for n in probes if index.lookup_int(n))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{lookups:,} integer lookups: {lookups / elapsed:,.0f} lookups/s "
+        f"({elapsed / lookups * 1e6:.2f} us each, {hits:,} hits)"
+    )
+
+    ips = [_int_to_ip(n) for n in probes[: lookups // 10]]
+    started = time.perf_counter()
+    for ip in ips:
+        index.lookup(ip)
+    elapsed = time.perf_counter() - started
+    print(f"{len(ips):,} dotted-quad lookups: {len(ips) / elapsed:,.0f} lookups/s ({elapsed / len(ips) * 1e6:.2f} us each)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    parser.add_argument("--cidr-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.entries, args.lookups, args.cidr_ratio, args.seed)
@@ -0,0 +1,82 @@
+"""
+Measure compile time, startup time, RSS and lookup rate of the offline geo/ASN database.
+Startup and RSS are measured in a fresh interpreter so compile-time allocations do not skew them.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.services.geo_db import GeoDatabase, compile_csv
+from benchmarks.bench_feed_index import _int_to_ip, _rss_bytes
+
+
+def _write_csv(path: str, ranges: int, orgs: int, rng: random.Random) -> None:
+    countries = [("United States", "US"), ("Germany", "DE"), ("China", "CN"), ("Brazil", "BR"), ("India", "IN")]
+    step = (1 << 32) // ranges
+    with open(path, "w") as handle:
+        handle.write("start,end,country,country_code,org\n")
+        for i in range(ranges):
+            start = i * step
+            country, code = rng.choice(countries)
+            asn = rng.randrange(orgs)
+            handle.write(f"{_int_to_ip(start)},{_int_to_ip(start + step - 2)},{country},{code},AS{asn} Org {asn}\n")
+
+
+def measure(bin_path: str, lookups: int, seed: int) -> None:
+    rng = random.Random(seed)
+    ips = [_int_to_ip(rng.getrandbits(32)) for _ in range(lookups)]
+
+    rss_before = _rss_bytes()
+    db = GeoDatabase(bin_path)
+    rss_open = _rss_bytes()
+    print(f"startup (open + mmap): {db.load_seconds * 1000:.2f} ms, RSS +{(rss_open - rss_before) / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    for ip in ips:
+        db.lookup(ip)
+    elapsed = time.perf_counter() - started
+    rss_after = _rss_bytes()
+    print(
+        f"{lookups:,} lookups: {lookups / elapsed:,.0f} lookups/s ({elapsed / lookups * 1e6:.2f} us each), "
+        f"RSS +{(rss_after - rss_before) / 1e6:.1f} MB after touching mapped pages, "
+        f"hit ratio {db.hits / lookups:.2%}"
+    )
+    db.close()
+
+
+def main(ranges: int, orgs: int, lookups: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "geo.csv")
+        bin_path = os.path.join(tmp_dir, "geo.geo.bin")
+        _write_csv(csv_path, ranges, orgs, rng)
+
+        started = time.perf_counter()
+        compile_csv(csv_path, bin_path)
+        print(
+            f"compiled {ranges:,} ranges ({os.path.getsize(csv_path) / 1e6:.1f} MB csv -> "
+            f"{os.path.getsize(bin_path) / 1e6:.1f} MB bin) in {time.perf_counter() - started:.1f}s"
+        )
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_geo_db", "--measure", bin_path,
+             "--lookups", str(lookups), "--seed", str(seed)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ranges", type=int, default=1_000_000)
+    parser.add_argument("--orgs", type=int, default=60_000)
+    parser.add_argument("--lookups", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--measure", metavar="BIN_PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.lookups, args.seed)
+    else:
+        main(args.ranges, args.orgs, args.lookups, args.seed)
@@ -0,0 +1,110 @@
+"""Prefix queries over stored reports: packed ip_key range scans vs text matching on ip_address, plus index sizes."""
+import argparse
+import ipaddress
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.ip_keys import network_key_range
+from app.repository.report_repository import ReportRepository
+from benchmarks.bench_repository_load import _report
+
+_V4_BASE = int(ipaddress.IPv4Address("10.0.0.0"))
+_V6_BASE = int(ipaddress.IPv6Address("2001:db8::"))
+
+
+def _ip(rng: random.Random, prefixes: int, ipv6_share: float) -> str:
+    if rng.random() < ipv6_share:
+        # /48s under 2001:db8::/32, random host bits in the low 64
+        return str(ipaddress.IPv6Address(_V6_BASE | rng.randrange(prefixes) << 80 | rng.getrandbits(64)))
+    return str(ipaddress.IPv4Address(_V4_BASE | rng.randrange(prefixes) << 8 | rng.randrange(256)))
+
+
+def _p50(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _index_bytes(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (name,)).fetchone()[0] or 0
+
+
+def main(reports: int, prefixes: int, ipv6_share: float, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "reports.db")
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        started = time.perf_counter()
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {
+                        **_report(rng),
+                        "ip_address": _ip(rng, prefixes, ipv6_share),
+                        "analyzed_at": now - timedelta(seconds=reports - idx),
+                    }
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        print(f"{reports:,} reports over {prefixes:,} /24s and /48s ({ipv6_share:.0%} IPv6), "
+              f"loaded in {time.perf_counter() - started:.1f}s")
+
+        conn = sqlite3.connect(path)
+        # The index the text column used to carry, built only for comparison
+        conn.execute("CREATE INDEX bench_idx_ip_text_ts ON reports(ip_address, analyzed_ts)")
+        conn.execute("ANALYZE")
+        key_bytes = _index_bytes(conn, "idx_reports_ip_key_ts")
+        text_bytes = _index_bytes(conn, "bench_idx_ip_text_ts")
+        print(f"  index size  text (ip_address, ts) {text_bytes / 2**20:8.1f} MiB   "
+              f"packed (ip_key, ts) {key_bytes / 2**20:8.1f} MiB   {text_bytes / key_bytes:4.2f}x smaller")
+
+        v4_net = str(ipaddress.IPv4Network((_V4_BASE | prefixes // 2 << 8, 24)))
+        v6_net = str(ipaddress.IPv6Network((_V6_BASE | prefixes // 2 << 80, 48)))
+        v4_like = v4_net.rsplit(".", 1)[0] + ".%"
+        # Compressed IPv6 text has no fixed-width prefix, so LIKE on the first three groups is the best a
+        # string match can do; it still misses or over-matches addresses whose 4th group starts with '0'
+        v6_like = ":".join(v6_net.split(":")[:3]) + ":%"
+        aggregate = "SELECT COUNT(*), MAX(threat_score) FROM reports WHERE "
+        cases = [
+            (f"{v4_net:<18} LIKE", lambda: conn.execute(aggregate + "ip_address LIKE ?", (v4_like,)).fetchone()),
+            (f"{v4_net:<18} range", lambda: conn.execute(
+                aggregate + "ip_key BETWEEN ? AND ?", network_key_range(v4_net)).fetchone()),
+            (f"{v6_net:<18} LIKE", lambda: conn.execute(aggregate + "ip_address LIKE ?", (v6_like,)).fetchone()),
+            (f"{v6_net:<18} range", lambda: conn.execute(
+                aggregate + "ip_key BETWEEN ? AND ?", network_key_range(v6_net)).fetchone()),
+        ]
+        print("  per-prefix count + max score, p50:")
+        for name, fn in cases:
+            print(f"    {name:<26} {_p50(fn, repeats):9.3f} ms   {fn()[0]:>6} reports")
+
+        print("  list_reports(network=..., limit=50), p50:")
+        for net in (v4_net, v6_net):
+            ms = _p50(lambda: repo.list_reports(limit=50, network=net), repeats)
+            print(f"    {net:<26} {ms:9.3f} ms")
+
+        grouped = "SELECT COUNT(*) FROM (SELECT {column}, COUNT(*), MAX(threat_score) FROM reports GROUP BY {column})"
+        for column, index in (("ip_address", "bench_idx_ip_text_ts"), ("ip_key", "idx_reports_ip_key_ts")):
+            ms = _p50(lambda: conn.execute(grouped.format(column=column)).fetchone(), max(1, repeats // 10))
+            print(f"  per-IP aggregation GROUP BY {column:<10} {ms:9.1f} ms  (via {index})")
+        conn.close()
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--prefixes", type=int, default=4096)
+    parser.add_argument("--ipv6-share", type=float, default=0.3)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=47)
+    args = parser.parse_args()
+    main(args.reports, args.prefixes, args.ipv6_share, args.repeats, args.seed)
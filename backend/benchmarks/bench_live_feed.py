@@ -0,0 +1,112 @@
+"""Dashboard refresh cost: full polls vs ETag revalidation (304) vs pushing saves over the SSE live feed."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_repository_load import _report
+
+POLL_INTERVAL = 15.0
+FALLBACK_POLL_INTERVAL = 120.0
+
+
+def _p50(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def _fan_out(feed, rng, viewers: int, events: int) -> float:
+    """Milliseconds of event-loop time per save to deliver it to ``viewers`` open streams."""
+    feed.start()
+    received = 0
+
+    async def viewer() -> None:
+        nonlocal received
+        async for _ in feed.stream():
+            received += 1
+
+    tasks = [asyncio.create_task(viewer()) for _ in range(viewers)]
+    await asyncio.sleep(0.05)
+    received = 0
+    spent = 0.0
+    for _ in range(events):
+        started = time.perf_counter()
+        feed.publish("report", [{"report": {**_report(rng), "id": 0}, "delta": {"reports": 1}}])
+        while received < viewers:
+            await asyncio.sleep(0)
+        spent += time.perf_counter() - started
+        received = 0
+    feed.close()
+    await asyncio.gather(*tasks)
+    return spent / events * 1000
+
+
+def main(reports: int, viewers: int, writes_per_second: float, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from fastapi.testclient import TestClient
+
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+        from app.services.live_feed import LiveFeed
+
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        app_main.report_repository = repo
+        client = TestClient(app_main.app)
+
+        def poll(etags=None) -> dict:
+            tags = {}
+            for path, params in (("/api/v1/reports/recent", {"limit": 36}), ("/api/v1/reports/stats", {"hours": 24})):
+                headers = {"If-None-Match": etags[path]} if etags else {}
+                response = client.get(path, params=params, headers=headers)
+                assert response.status_code == (304 if etags else 200)
+                tags[path] = response.headers["etag"]
+            return tags
+
+        etags = poll()
+        full_ms = _p50(poll, repeats)
+        revalidate_ms = _p50(lambda: poll(etags), repeats)
+        print(f"{reports:,} reports; one dashboard refresh (recent + stats):")
+        print(f"  full poll   p50 {full_ms:7.2f} ms")
+        print(f"  304 poll    p50 {revalidate_ms:7.2f} ms")
+
+        feed = LiveFeed()
+        fan_out_ms = asyncio.run(_fan_out(feed, rng, viewers, repeats))
+        print(f"  SSE push    {fan_out_ms:7.3f} ms per save to {viewers} viewers")
+
+        polling = viewers / POLL_INTERVAL * full_ms
+        pushing = writes_per_second * fan_out_ms + viewers / FALLBACK_POLL_INTERVAL * revalidate_ms
+        print(
+            f"backend ms per second with {viewers} viewers and {writes_per_second:g} saves/s: "
+            f"polling every {POLL_INTERVAL:g}s {polling:8.1f}   "
+            f"live feed + 304 fallback every {FALLBACK_POLL_INTERVAL:g}s {pushing:8.1f}"
+        )
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--viewers", type=int, default=200)
+    parser.add_argument("--writes-per-second", type=float, default=2.0)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=37)
+    args = parser.parse_args()
+    main(args.reports, args.viewers, args.writes_per_second, args.repeats, args.seed)
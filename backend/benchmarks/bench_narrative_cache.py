@@ -0,0 +1,84 @@
+"""Narrative latency and LLM calls for repeat and look-alike botnet profiles, with and without the narrative cache."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.models import NormalizedThreatReport
+from app.services.narrative import NarrativeGenerator
+from app.services.narrative_cache import NarrativeCache
+from benchmarks.bench_feed_index import _int_to_ip
+from benchmarks.stub_upstream import start_stub
+
+CATEGORIES = (["botnet", "scanner"], ["brute_force"], ["spam"], ["malware", "c2"], ["web_attack"])
+NETWORKS = ("AS64500 Example Hosting", "AS64501 Bulletproof Ltd", "AS64502 Residential ISP")
+
+
+def _profiles(analyses: int, clusters: int, rng: random.Random):
+    """Analyses drawn from a few botnet clusters whose nodes differ only slightly."""
+    shapes = [
+        (rng.choice(CATEGORIES), rng.choice(NETWORKS), rng.choice(["NL", "RU", "US"]), rng.randint(4, 9) * 10)
+        for _ in range(clusters)
+    ]
+    for _ in range(analyses):
+        categories, asn, country, confidence = rng.choice(shapes)
+        report = NormalizedThreatReport(
+            ip_address=_int_to_ip(rng.getrandbits(32)),
+            abuse_confidence=confidence + rng.randint(0, 9),
+            malicious_sources=rng.randint(4, 7),
+            threat_categories=categories,
+            country=country,
+            asn_name=asn,
+        )
+        score = min(100, confidence + rng.randint(0, 9))
+        yield report, score, ("LOW", "MEDIUM", "HIGH", "CRITICAL")[min(score // 25, 3)]
+
+
+async def _run(label: str, narrator: NarrativeGenerator, profiles: list, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(profile) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await narrator.generate_llm(*profile)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(profile) for profile in profiles))
+    ordered = sorted(latencies)
+    print(
+        f"{label:<9} {len(profiles)} narratives in {time.perf_counter() - started:6.2f}s  "
+        f"p50 {statistics.median(ordered):8.2f} ms  p99 {ordered[int(len(ordered) * 0.99) - 1]:8.2f} ms"
+    )
+
+
+async def main(analyses: int, clusters: int, concurrency: int, llm_latency: float, seed: int) -> None:
+    profiles = list(_profiles(analyses, clusters, random.Random(seed)))
+    runner, base_url = await start_stub(llm_latency=llm_latency)
+    try:
+        await _run("no cache", NarrativeGenerator(openai_key="benchmark", base_url=f"{base_url}/v1"), profiles, concurrency)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = NarrativeCache(os.path.join(tmp_dir, "narratives.db"), cost_per_1k_tokens=0.0004)
+            narrator = NarrativeGenerator(openai_key="benchmark", base_url=f"{base_url}/v1", cache=cache)
+            await _run("cached", narrator, profiles, concurrency)
+            # Later analyses of the same population hit entries written above
+            await _run("warm", narrator, profiles, concurrency)
+            print(f"cache: {cache.stats()}")
+            cache.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--analyses", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub completion delay in seconds")
+    parser.add_argument("--seed", type=int, default=31)
+    args = parser.parse_args()
+    asyncio.run(main(args.analyses, args.clusters, args.concurrency, args.llm_latency, args.seed))
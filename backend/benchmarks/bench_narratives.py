@@ -0,0 +1,82 @@
+"""Analysis latency with a slow LLM: inline narratives vs the background narrative worker pool."""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.stub_upstream import start_stub
+
+
+def _percentiles(samples: list) -> str:
+    ordered = sorted(samples)
+    return f"p50 {statistics.median(ordered):8.1f} ms  p99 {ordered[int(len(ordered) * 0.99) - 1]:8.1f} ms"
+
+
+async def _run(app_main, mode: str, prefix: str, requests: int, concurrency: int) -> None:
+    app_main.NARRATIVE_MODE = mode
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(idx: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await app_main._analyze_and_persist(f"{prefix}.{idx // 250}.{idx % 250 + 1}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(idx) for idx in range(requests)))
+    answered = time.perf_counter() - started
+    stats = app_main.narratives.stats()
+    while stats["pending"] or stats["in_flight"]:
+        await asyncio.sleep(0.05)
+        stats = app_main.narratives.stats()
+    await app_main.persistence.flush()
+    print(
+        f"{mode:<10} {requests} analyses: {_percentiles(latencies)}  all answered {answered:5.2f}s  "
+        f"all LLM narratives stored {time.perf_counter() - started:5.2f}s"
+    )
+
+
+async def main(requests: int, concurrency: int, llm_latency: float, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "reports.db")
+        from app import main as app_main
+        from app.services.collector import ThreatIntelCollector
+        from app.services.narrative import NarrativeGenerator
+        from app.services.narrative_worker import NarrativeWorkerPool
+
+        runner, base_url = await start_stub(latency=0.002, llm_latency=llm_latency)
+        app_main.collector = ThreatIntelCollector(
+            abuseipdb_key="benchmark",
+            abuseipdb_base_url=f"{base_url}/api/v2",
+            ipapi_base_url=base_url,
+            limiters={},
+        )
+        app_main.narrator = NarrativeGenerator(openai_key="benchmark", base_url=f"{base_url}/v1", timeout=30)
+        app_main.narratives = NarrativeWorkerPool(
+            app_main._generate_narrative, app_main._store_narrative, workers=workers, timeout=30
+        )
+        await app_main.collector.start()
+        app_main.persistence.start()
+        app_main.narratives.start()
+        try:
+            await _run(app_main, "inline", "198.51", requests, concurrency)
+            await _run(app_main, "background", "203.0", requests, concurrency)
+        finally:
+            await app_main.narratives.close()
+            await app_main.persistence.close()
+            await app_main.collector.close()
+            app_main.report_repository.close()
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub completion delay in seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.llm_latency, args.workers))
@@ -0,0 +1,140 @@
+"""Database size and /reports/recent payload and latency with verbose AbuseIPDB raw_data."""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_feed_index import _int_to_ip
+
+COMMENTS = (
+    "SSH brute force attempt from this address, multiple failed logins for root",
+    "Port scan detected on 22,23,80,443,3389 within 60 seconds",
+    "Fail2Ban: [sshd] banned after 5 attempts",
+    "Web application attack: repeated requests for /wp-login.php and /xmlrpc.php",
+)
+
+
+def _verbose_report(rng: random.Random, when: datetime) -> dict:
+    return {
+        "reportedAt": when.isoformat(),
+        "comment": rng.choice(COMMENTS),
+        "categories": rng.sample([14, 15, 18, 19, 21, 22], 2),
+        "reporterId": rng.randint(1000, 99999),
+        "reporterCountryCode": rng.choice(["US", "DE", "NL", "FR"]),
+        "reporterCountryName": "Reporter Country",
+    }
+
+
+def _abuseipdb(ip: str, reports: list) -> dict:
+    data = {
+        "ipAddress": ip,
+        "isPublic": True,
+        "abuseConfidenceScore": min(100, len(reports) * 3),
+        "countryCode": "CN",
+        "usageType": "Data Center/Web Hosting/Transit",
+        "isp": "Example Hosting Ltd",
+        "domain": "example.net",
+        "hostnames": [],
+        "isTor": False,
+        "totalReports": len(reports),
+        "numDistinctUsers": len(reports) // 2,
+        "lastReportedAt": reports[-1]["reportedAt"] if reports else None,
+        "reports": list(reports),
+    }
+    return {
+        "raw": {"data": data},
+        "abuse_confidence_score": data["abuseConfidenceScore"],
+        "total_reports": data["totalReports"],
+        "num_distinct_users": data["numDistinctUsers"],
+        "country_code": "CN",
+        "isp": data["isp"],
+        "domain": data["domain"],
+        "hostnames": [],
+        "last_reported_at": data["lastReportedAt"],
+        "threat_types": ["scanner"],
+    }
+
+
+def _records(total: int, unique_ips: int, verbose_reports: int, change_rate: float, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    ips = [_int_to_ip(rng.getrandbits(32)) for _ in range(unique_ips)]
+    history = {ip: [_verbose_report(rng, now - timedelta(days=rng.random() * 90)) for _ in range(verbose_reports)] for ip in ips}
+    for idx in range(total):
+        ip = rng.choice(ips)
+        if rng.random() < change_rate:
+            # A new upstream report arrived since the last lookup of this IP
+            history[ip] = history[ip][1:] + [_verbose_report(rng, now)]
+        score = rng.randint(0, 100)
+        yield {
+            "ip_address": ip,
+            "threat_score": score,
+            "risk_level": ("LOW", "MEDIUM", "HIGH", "CRITICAL")[min(score // 25, 3)],
+            "abuse_confidence": float(score),
+            "total_reports": verbose_reports,
+            "categories": ["scanner"],
+            "triggered_rules": ["AbuseIPDB Multiple Reports"],
+            "narrative": "Synthetic report.",
+            "country": "China",
+            "asn": "AS64500 Example Hosting Ltd",
+            "raw_data": {
+                "abuseipdb": _abuseipdb(ip, history[ip]),
+                "geolocation": {"raw": {"status": "success", "country": "China", "query": ip}, "country": "China", "countryCode": "CN", "org": "AS64500", "query": ip},
+            },
+            "analyzed_at": now - timedelta(seconds=total - idx),
+        }
+
+
+def _db_bytes(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def main(total: int, unique_ips: int, verbose_reports: int, change_rate: float, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "reports.db")
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        records = list(_records(total, unique_ips, verbose_reports, change_rate, rng))
+        started = time.perf_counter()
+        for start in range(0, total, 1000):
+            repo.save_many(records[start:start + 1000])
+        print(f"stored {total:,} reports for {unique_ips:,} IPs in {time.perf_counter() - started:.1f}s")
+        print(f"database size: {_db_bytes(path) / 1e6:.1f} MB")
+
+        app_main.report_repository = repo
+        loop = asyncio.new_event_loop()
+        try:
+            for limit in (50, 200):
+                samples = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    body = loop.run_until_complete(app_main._recent_reports_body(limit=limit))
+                    samples.append((time.perf_counter() - started) * 1000)
+                print(
+                    f"/reports/recent?limit={limit}: {len(body) / 1024:8.1f} KiB  "
+                    f"p50 {statistics.median(samples):6.2f} ms"
+                )
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--total", type=int, default=20_000)
+    parser.add_argument("--unique-ips", type=int, default=2_000)
+    parser.add_argument("--verbose-reports", type=int, default=50)
+    parser.add_argument("--change-rate", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=19)
+    args = parser.parse_args()
+    main(args.total, args.unique_ips, args.verbose_reports, args.change_rate, args.repeats, args.seed)
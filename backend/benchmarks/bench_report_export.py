@@ -0,0 +1,86 @@
+"""Historical export: streamed NDJSON/CSV pages vs building the whole JSON document in memory."""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+from benchmarks.bench_repository_load import _report
+
+
+async def _drain(response) -> tuple:
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    async for chunk in response.body_iterator:
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    return first_byte, time.perf_counter() - started, size
+
+
+def main(reports: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        app_main.report_repository = repo
+        print(f"seeded {reports:,} reports")
+
+        def in_memory(limit: int) -> tuple:
+            # The shape of /analyze/export applied to history: one indented document, then BytesIO
+            started = time.perf_counter()
+            body = json.dumps({"reports": repo.list_reports(limit=limit)["reports"]}, indent=2, default=str).encode("utf-8")
+            BytesIO(body).read()
+            elapsed = time.perf_counter() - started
+            return elapsed, elapsed, len(body)
+
+        loop = asyncio.new_event_loop()
+        try:
+            cases = {
+                "in-memory json": lambda since: in_memory(reports if since is None else reports // 100),
+                "stream ndjson": lambda since: loop.run_until_complete(_drain(loop.run_until_complete(app_main.export_reports(format="ndjson", since=since)))),
+                "stream csv": lambda since: loop.run_until_complete(_drain(loop.run_until_complete(app_main.export_reports(format="csv", since=since)))),
+                "stream ndjson.gz": lambda since: loop.run_until_complete(_drain(loop.run_until_complete(app_main.export_reports(format="ndjson", gzip=True, since=since)))),
+            }
+            small_since = now - timedelta(seconds=reports // 100)
+            for name, run in cases.items():
+                first_byte, total, size = run(None)
+                peaks = []
+                for since in (small_since, None):
+                    tracemalloc.start()
+                    run(since)
+                    peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+                    tracemalloc.stop()
+                print(
+                    f"{name:<17} {reports:,} rows: first byte {first_byte * 1000:8.1f} ms  total {total:6.2f}s  "
+                    f"{reports / total:9,.0f} rows/s  {size / 1e6:7.1f} MB  "
+                    f"peak heap {peaks[0]:7.1f} MB at {reports // 100:,} rows, {peaks[1]:7.1f} MB at {reports:,}"
+                )
+        finally:
+            loop.close()
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=29)
+    args = parser.parse_args()
+    main(args.reports, args.seed)
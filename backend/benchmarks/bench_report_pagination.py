@@ -0,0 +1,102 @@
+"""Deep paging (OFFSET vs keyset cursor), indexed listing filters and fields= projection on /reports/recent."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_repository_load import _report
+
+OFFSET_PAGE = """
+SELECT r.*, s.report_count AS occurrence_count, s.first_seen_ts AS first_seen_ts
+FROM reports r LEFT JOIN ip_summary s ON s.ip_address = r.ip_address
+ORDER BY r.analyzed_ts DESC, r.id DESC
+LIMIT 50 OFFSET ?
+"""
+
+
+def _time(fn, repeats: int) -> str:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return f"p50 {statistics.median(samples):8.2f} ms"
+
+
+def main(reports: int, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository, encode_cursor
+
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        started = time.perf_counter()
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        print(f"seeded {reports:,} reports in {time.perf_counter() - started:.1f}s")
+
+        for depth in (1_000, reports // 10, reports // 2, reports - 100):
+            with repo.pool.reader() as conn:
+                row = conn.execute(
+                    "SELECT analyzed_ts, id FROM reports ORDER BY analyzed_ts DESC, id DESC LIMIT 1 OFFSET ?",
+                    (depth - 1,),
+                ).fetchone()
+            cursor = encode_cursor(row["analyzed_ts"], row["id"])
+
+            def offset_page() -> None:
+                with repo.pool.reader() as conn:
+                    conn.execute(OFFSET_PAGE, (depth,)).fetchall()
+
+            print(
+                f"page at row {depth:>9,}:  OFFSET {_time(offset_page, repeats)}   "
+                f"cursor {_time(lambda: repo.list_reports(limit=50, cursor=cursor), repeats)}"
+            )
+
+        sample = repo.list_reports(limit=1)["reports"][0]
+        filters = {
+            "ip": {"ip_address": sample["ip_address"]},
+            "risk_level": {"risk_level": "CRITICAL"},
+            "category": {"category": "botnet"},
+            "category+risk": {"category": "botnet", "risk_level": "LOW"},
+            "last hour": {"since": now - timedelta(hours=1)},
+        }
+        for name, kwargs in filters.items():
+            print(f"filter {name:<14} {_time(lambda: repo.list_reports(limit=50, **kwargs), repeats)}")
+
+        app_main.report_repository = repo
+        loop = asyncio.new_event_loop()
+        try:
+            for fields in (None, "ip_address,threat_score,risk_level"):
+                body = b""
+
+                def render() -> None:
+                    nonlocal body
+                    body = loop.run_until_complete(
+                        app_main._recent_reports_body(limit=200, fields=app_main._split_fields(fields))
+                    )
+
+                timing = _time(render, repeats)
+                print(f"/reports/recent?limit=200&fields={fields or '(all)'}: {len(body) / 1024:7.1f} KiB  {timing}")
+        finally:
+            loop.close()
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=23)
+    args = parser.parse_args()
+    main(args.reports, args.repeats, args.seed)
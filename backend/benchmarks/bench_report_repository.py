@@ -0,0 +1,150 @@
+"""Seed a report database in the pre-aggregate layout and time /reports/recent and /reports/stats on it."""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_feed_index import _int_to_ip
+
+LEGACY_SCHEMA = """
+CREATE TABLE reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ip_address TEXT NOT NULL,
+    analyzed_at TEXT NOT NULL,
+    threat_score INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    abuse_confidence REAL NOT NULL,
+    total_reports INTEGER,
+    categories TEXT NOT NULL,
+    triggered_rules TEXT NOT NULL,
+    narrative TEXT,
+    country TEXT,
+    asn TEXT,
+    raw_data TEXT NOT NULL
+);
+CREATE INDEX idx_reports_analyzed_at ON reports(analyzed_at DESC);
+CREATE INDEX idx_reports_ip ON reports(ip_address);
+"""
+
+# The statements ReportRepository ran before ip_summary and analyzed_ts existed
+LEGACY_RECENT = """
+SELECT r.*,
+       (SELECT COUNT(*) FROM reports sub WHERE sub.ip_address = r.ip_address) AS occurrence_count,
+       (SELECT MIN(datetime(sub.analyzed_at)) FROM reports sub WHERE sub.ip_address = r.ip_address) AS first_seen
+FROM reports r
+ORDER BY datetime(r.analyzed_at) DESC
+LIMIT 50
+"""
+LEGACY_STATS = [
+    """
+    SELECT ip_address, threat_score, risk_level, abuse_confidence, analyzed_at,
+           (SELECT COUNT(*) FROM reports sub WHERE sub.ip_address = reports.ip_address) AS occurrence_count
+    FROM reports ORDER BY threat_score DESC, datetime(analyzed_at) DESC LIMIT 5
+    """,
+    "SELECT risk_level, COUNT(*) FROM reports WHERE datetime(analyzed_at) >= datetime(:cutoff) GROUP BY risk_level",
+    """
+    SELECT strftime('%Y-%m-%dT%H:00:00', analyzed_at) as bucket, COUNT(*) FROM reports
+    WHERE datetime(analyzed_at) >= datetime(:cutoff) GROUP BY bucket ORDER BY bucket DESC LIMIT 24
+    """,
+    "SELECT COUNT(*) FROM reports",
+    "SELECT COUNT(DISTINCT ip_address) FROM reports",
+    "SELECT analyzed_at FROM reports ORDER BY datetime(analyzed_at) DESC LIMIT 1",
+    "SELECT categories FROM reports WHERE datetime(analyzed_at) >= datetime(:cutoff)",
+]
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+CATEGORIES = ("malware", "botnet", "phishing", "scanner", "spam", "bruteforce")
+
+
+def _seed(path: str, reports: int, unique_ips: int, days: int, rng: random.Random) -> None:
+    now = datetime.now(timezone.utc)
+    ips = [_int_to_ip(rng.getrandbits(32)) for _ in range(unique_ips)]
+    span = days * 86400
+
+    # Reports arrive in time order, so rowid order follows analyzed_at as it does in production
+    offsets = sorted((rng.random() * span for _ in range(reports)), reverse=True)
+
+    def rows():
+        for offset in offsets:
+            score = rng.randint(0, 100)
+            yield (
+                rng.choice(ips),
+                (now - timedelta(seconds=offset)).isoformat(),
+                score,
+                RISK_LEVELS[min(score // 25, 3)],
+                float(score),
+                rng.randint(0, 50),
+                json.dumps(rng.sample(CATEGORIES, rng.randint(0, 2))),
+                json.dumps(["AbuseIPDB Multiple Reports"]),
+                "",
+                "US",
+                "AS64500",
+                json.dumps({"abuseipdb": {"abuseConfidenceScore": score}}),
+            )
+
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.executemany(
+            "INSERT INTO reports (ip_address, analyzed_at, threat_score, risk_level, abuse_confidence, total_reports,"
+            " categories, triggered_rules, narrative, country, asn, raw_data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows(),
+        )
+
+
+def _time(fn, repeats: int) -> str:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return f"p50 {statistics.median(samples):9.1f} ms  max {max(samples):9.1f} ms"
+
+
+def main(reports: int, unique_ips: int, days: int, repeats: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "reports.db")
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        started = time.perf_counter()
+        _seed(path, reports, unique_ips, days, rng)
+        print(f"seeded {reports:,} reports for {unique_ips:,} IPs in {time.perf_counter() - started:.1f}s")
+
+        cutoff = {"cutoff": (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()}
+        with sqlite3.connect(path) as conn:
+            print(f"legacy  recent  {_time(lambda: conn.execute(LEGACY_RECENT).fetchall(), repeats)}")
+            print(
+                "legacy  stats   "
+                + _time(lambda: [conn.execute(sql, cutoff).fetchall() for sql in LEGACY_STATS], repeats)
+            )
+
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+
+        started = time.perf_counter()
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        print(f"migrated to the aggregate and rollup tables in {time.perf_counter() - started:.1f}s")
+        app_main.report_repository = repo
+
+        loop = asyncio.new_event_loop()
+        try:
+            print(f"current recent  {_time(lambda: loop.run_until_complete(app_main._recent_reports_body(limit=50)), repeats)}")
+            print(f"current stats   {_time(lambda: loop.run_until_complete(app_main._report_stats_body(hours=24)), repeats)}")
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--unique-ips", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.reports, args.unique_ips, args.days, args.repeats, args.seed)
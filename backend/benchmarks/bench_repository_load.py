@@ -0,0 +1,78 @@
+"""Run concurrent save_analysis and get_recent calls through asyncio.to_thread, as the API does."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.repository.report_repository import ReportRepository
+from benchmarks.bench_feed_index import _int_to_ip
+
+
+def _report(rng: random.Random) -> dict:
+    score = rng.randint(0, 100)
+    return {
+        "ip_address": _int_to_ip(rng.getrandbits(12)),
+        "threat_score": score,
+        "risk_level": ("LOW", "MEDIUM", "HIGH", "CRITICAL")[min(score // 25, 3)],
+        "abuse_confidence": float(score),
+        "total_reports": rng.randint(0, 50),
+        "categories": rng.sample(["malware", "botnet", "phishing", "scanner"], 2),
+        "triggered_rules": ["AbuseIPDB Multiple Reports"],
+        "narrative": "Synthetic load-test report.",
+        "country": "US",
+        "asn": "AS64500",
+        "raw_data": {"abuseipdb": {"abuseConfidenceScore": score, "padding": "x" * 512}},
+    }
+
+
+async def _worker(fn, latencies: list, deadline: float) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.to_thread(fn)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def _summary(name: str, latencies: list, seconds: float) -> str:
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99) - 1] if ordered else 0.0
+    return (
+        f"{name:<7} {len(ordered) / seconds:8.0f} ops/s  "
+        f"p50 {statistics.median(ordered) if ordered else 0:7.2f} ms  p99 {p99:7.2f} ms"
+    )
+
+
+async def _run(repo: ReportRepository, writers: int, readers: int, seconds: float, seed: int) -> None:
+    rng = random.Random(seed)
+    writes: list = []
+    reads: list = []
+    deadline = time.perf_counter() + seconds
+    tasks = [
+        _worker(lambda: repo.save_analysis(**_report(rng), analyzed_at=datetime.now(timezone.utc)), writes, deadline)
+        for _ in range(writers)
+    ] + [_worker(lambda: repo.get_recent(50), reads, deadline) for _ in range(readers)]
+    await asyncio.gather(*tasks)
+    print(_summary("save", writes, seconds))
+    print(_summary("recent", reads, seconds))
+
+
+def main(writers: int, readers: int, seconds: float, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=7, retention_limit=1000)
+        print(f"{writers} writer tasks, {readers} reader tasks, {seconds:.0f}s")
+        asyncio.run(_run(repo, writers, readers, seconds, seed))
+        if hasattr(repo, "pool"):
+            print(f"pool: {repo.pool.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    main(args.writers, args.readers, args.seconds, args.seed)
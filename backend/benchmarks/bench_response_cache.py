@@ -0,0 +1,84 @@
+"""/reports/recent and /reports/stats with and without the generation-invalidated response cache."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_repository_load import _report
+
+
+def _p50(loop, call, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        loop.run_until_complete(call())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(reports: int, repeats: int, reads_per_write: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+        from app.services.response_cache import ResponseCache
+
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        app_main.report_repository = repo
+        endpoints = {
+            "recent?limit=50": lambda: app_main.get_recent_reports(limit=50),
+            "recent?limit=200": lambda: app_main.get_recent_reports(limit=200),
+            "stats?hours=24": lambda: app_main.get_report_stats(hours=24),
+        }
+        loop = asyncio.new_event_loop()
+        try:
+            print(f"{reports:,} reports, p50 per request:")
+            for name, call in endpoints.items():
+                app_main.response_cache = ResponseCache(max_entries=0)
+                uncached = _p50(loop, call, repeats)
+                app_main.response_cache = ResponseCache()
+                cached = _p50(loop, call, repeats)
+                print(f"  {name:<17} uncached {uncached:8.3f} ms   cached {cached:8.3f} ms   {uncached / cached:7.1f}x")
+
+            # Dashboard-like mix: every write invalidates, reads in between are served from cache
+            app_main.response_cache = cache = ResponseCache()
+            calls = list(endpoints.values())
+            started = time.perf_counter()
+            for idx in range(repeats * reads_per_write):
+                if idx % reads_per_write == 0:
+                    repo.save_analysis(**_report(rng))
+                loop.run_until_complete(calls[idx % len(calls)]())
+            elapsed = time.perf_counter() - started
+            stats = cache.stats()
+            print(
+                f"mixed, 1 write per {reads_per_write} reads: "
+                f"{repeats * reads_per_write / elapsed:8.0f} reads/s incl. writes  "
+                f"hit ratio {stats['hit_ratio']:.3f}  served from cache {stats['hit_avg_ms']} ms  "
+                f"built {stats['miss_avg_ms']} ms"
+            )
+        finally:
+            loop.close()
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--reads-per-write", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=41)
+    args = parser.parse_args()
+    main(args.reports, args.repeats, args.reads_per_write, args.seed)
@@ -0,0 +1,72 @@
+"""Insert latency with a large retention limit, and reader latency while the compactor purges old reports."""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.repository.report_repository import ReportRepository
+from benchmarks.bench_repository_load import _report
+
+
+def _percentiles(samples: list) -> str:
+    ordered = sorted(samples)
+    return f"p50 {statistics.median(ordered):7.2f} ms  p99 {ordered[int(len(ordered) * 0.99) - 1]:7.2f} ms  max {ordered[-1]:7.2f} ms"
+
+
+def main(reports: int, inserts: int, chunk_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Keep everything while seeding, then tighten the policy so half the table expires
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        started = time.perf_counter()
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        print(f"seeded {reports:,} reports in {time.perf_counter() - started:.1f}s")
+
+        repo.retention_limit = reports
+        latencies = []
+        for _ in range(inserts):
+            started = time.perf_counter()
+            repo.save_analysis(**_report(rng))
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"save_analysis, REPORT_RETENTION_LIMIT={reports:,}:  {_percentiles(latencies)}")
+
+        if not hasattr(repo, "compact"):
+            return
+        repo.retention_limit = reports // 2
+        reads: list = []
+        done = threading.Event()
+
+        def reader() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                repo.get_recent(50)
+                reads.append((time.perf_counter() - started) * 1000)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        result = repo.compact(chunk_size=chunk_size)
+        done.set()
+        thread.join()
+        print(f"compact: {result}")
+        print(f"get_recent during compaction ({len(reads):,} calls): {_percentiles(reads)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=200_000)
+    parser.add_argument("--inserts", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    main(args.reports, args.inserts, args.chunk_size, args.seed)
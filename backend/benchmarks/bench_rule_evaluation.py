@@ -0,0 +1,75 @@
+"""Per-report evaluation cost of the compiled rule set versus the former hard-coded lambda list."""
+import argparse
+import random
+import time
+
+from app.config import SCORING_RULES_PATH
+from app.models import NormalizedThreatReport
+from app.services.rules import CompiledRuleSet
+
+LEGACY_RULES = [
+    ("AbuseIPDB High Abuse Confidence", lambda r: r.abuse_confidence >= 85, 35),
+    ("AbuseIPDB Moderate Abuse Confidence", lambda r: 75 <= r.abuse_confidence < 85, 22),
+    ("AbuseIPDB Elevated Abuse Confidence", lambda r: 60 <= r.abuse_confidence < 75, 12),
+    ("AbuseIPDB High Report Count", lambda r: r.total_reports >= 15, 25),
+    ("AbuseIPDB Moderate Report Count", lambda r: 10 <= r.total_reports < 15, 15),
+    ("AbuseIPDB Multiple Reports", lambda r: 5 <= r.total_reports < 10, 8),
+    ("High Malicious Sources", lambda r: r.malicious_sources >= 5, 30),
+    ("Moderate Malicious Sources", lambda r: 2 <= r.malicious_sources < 5, 18),
+    ("Suspicious Sources Detected", lambda r: r.suspicious_sources >= 3, 12),
+    ("Category Malware", lambda r: "malware" in r.threat_categories, 35),
+    ("Category Botnet/C2", lambda r: "botnet" in r.threat_categories or "c2" in r.threat_categories, 30),
+    ("Category Phishing", lambda r: "phishing" in r.threat_categories, 25),
+    ("High-Risk Geography", lambda r: r.country_code in {"KP", "IR", "SY", "CU"}, 15),
+    ("Local Blocklist Match", lambda r: len(r.feed_matches) >= 1, 25),
+    ("Multiple Local Blocklist Matches", lambda r: len(r.feed_matches) >= 2, 10),
+]
+
+
+def _legacy(report):
+    score = 0
+    triggered = []
+    for name, cond, pts in LEGACY_RULES:
+        try:
+            if cond(report):
+                score += pts
+                triggered.append(name)
+        except Exception:  # noqa: BLE001
+            continue
+    return max(0, min(100, score)), triggered
+
+
+def main(reports: int, rounds: int, seed: int) -> None:
+    rng = random.Random(seed)
+    sample = [
+        NormalizedThreatReport(
+            ip_address="192.0.2.1",
+            abuse_confidence=rng.uniform(0, 100),
+            total_reports=rng.randint(0, 30),
+            malicious_sources=rng.randint(0, 6),
+            suspicious_sources=rng.randint(0, 5),
+            threat_categories=rng.sample(["malware", "botnet", "c2", "phishing", "spam", "scanner"], rng.randint(0, 3)),
+            country_code=rng.choice(["US", "KP", "DE", "CN", "IR"]),
+            feed_matches=["feed"] * rng.randint(0, 2),
+        )
+        for _ in range(reports)
+    ]
+    ruleset = CompiledRuleSet.from_file(SCORING_RULES_PATH)
+
+    for label, evaluate in (("legacy lambdas", _legacy), (f"compiled {ruleset.version}", ruleset.evaluate)):
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for report in sample:
+                evaluate(report)
+            best = min(best, time.perf_counter() - started)
+        print(f"{label:<26} {best / reports * 1e9:8.0f} ns/report")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.reports, args.rounds, args.seed)
@@ -0,0 +1,85 @@
+"""Requests/sec on /reports/recent?limit=200: pydantic re-validation + stdlib JSON vs passing rows through json_codec."""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_repository_load import _report
+
+
+def _requests_per_second(client, path: str, params: dict, seconds: float) -> float:
+    client.get(path, params=params)
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        assert client.get(path, params=params).status_code == 200
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main(reports: int, limit: int, seconds: float, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["REPORT_DB_PATH"] = os.path.join(tmp_dir, "unused.db")
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app import json_codec
+        from app import main as app_main
+        from app.repository.report_repository import ReportRepository
+        from app.services.response_cache import ResponseCache
+
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"), retention_days=0, retention_limit=0)
+        for start in range(0, reports, 5000):
+            repo.save_many(
+                [
+                    {**_report(rng), "analyzed_at": now - timedelta(seconds=reports - idx)}
+                    for idx in range(start, min(reports, start + 5000))
+                ]
+            )
+        app_main.report_repository = repo
+
+        # The previous handler: parsed rows, timestamps round-tripped, StoredReport models
+        # validated again against response_model and encoded by the default JSONResponse
+        before = FastAPI()
+
+        @before.get("/api/v1/reports/recent", response_model=app_main.RecentReportsResponse,
+                    response_model_exclude_unset=True)
+        async def legacy_recent(limit: int = 50):
+            page = await asyncio.to_thread(repo.list_reports, limit=limit)
+            reports_out = [
+                app_main.StoredReport(
+                    **{**record, "analyzed_at": datetime.fromisoformat(record["analyzed_at"]).isoformat()}
+                )
+                for record in page["reports"]
+            ]
+            return app_main.RecentReportsResponse(reports=reports_out, next_cursor=page["next_cursor"])
+
+        path, params = "/api/v1/reports/recent", {"limit": limit}
+        print(f"{reports:,} reports, GET {path}?limit={limit}, {seconds:g}s each (orjson: {json_codec.ORJSON_AVAILABLE})")
+        with TestClient(before) as client:
+            print(f"  before                {_requests_per_second(client, path, params, seconds):8.0f} req/s")
+        client = TestClient(app_main.app)
+        app_main.response_cache = ResponseCache(max_entries=0)
+        print(f"  after, uncached       {_requests_per_second(client, path, params, seconds):8.0f} req/s")
+        orjson_available = json_codec.ORJSON_AVAILABLE
+        json_codec.ORJSON_AVAILABLE = False
+        print(f"  after, stdlib json    {_requests_per_second(client, path, params, seconds):8.0f} req/s")
+        json_codec.ORJSON_AVAILABLE = orjson_available
+        app_main.response_cache = ResponseCache()
+        print(f"  after, response cache {_requests_per_second(client, path, params, seconds):8.0f} req/s")
+        repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=43)
+    args = parser.parse_args()
+    main(args.reports, args.limit, args.seconds, args.seed)
@@ -0,0 +1,73 @@
+"""Compare per-request save_analysis with the write-behind queue under concurrent analyses."""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.repository.report_repository import ReportRepository
+from app.services.write_behind import WriteBehindQueue
+from benchmarks.bench_repository_load import _report
+
+
+async def _requests(persist, total: int, concurrency: int, seed: int) -> list:
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+
+    async def one() -> None:
+        async with semaphore:
+            record = _report(rng)
+            started = time.perf_counter()
+            await persist(record)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def _print(name: str, latencies: list, total_seconds: float) -> None:
+    ordered = sorted(latencies)
+    print(
+        f"{name:<13} request p50 {statistics.median(ordered):7.2f} ms  p99 {ordered[int(len(ordered) * 0.99) - 1]:7.2f} ms  "
+        f"all {len(ordered):,} durable after {total_seconds:5.2f}s ({len(ordered) / total_seconds:,.0f}/s)"
+    )
+
+
+async def _direct(repo: ReportRepository, total: int, concurrency: int, seed: int) -> None:
+    started = time.perf_counter()
+    latencies = await _requests(lambda record: asyncio.to_thread(repo.save_analysis, **record), total, concurrency, seed)
+    _print("direct", latencies, time.perf_counter() - started)
+
+
+async def _queued(repo: ReportRepository, total: int, concurrency: int, seed: int, batch_size: int) -> None:
+    queue = WriteBehindQueue(repo.save_many, batch_size=batch_size, flush_interval=0.25)
+    started = time.perf_counter()
+    latencies = await _requests(queue.submit, total, concurrency, seed)
+    await queue.close()
+    _print("write-behind", latencies, time.perf_counter() - started)
+    print(f"queue: {queue.stats()}")
+
+
+def main(total: int, concurrency: int, batch_size: int, seed: int) -> None:
+    print(f"{total:,} analyses, {concurrency} concurrent requests")
+    for name in ("direct", "queued"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repo = ReportRepository(db_path=os.path.join(tmp_dir, "reports.db"))
+            if name == "direct":
+                asyncio.run(_direct(repo, total, concurrency, seed))
+            else:
+                asyncio.run(_queued(repo, total, concurrency, seed, batch_size))
+            repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--total", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    main(args.total, args.concurrency, args.batch_size, args.seed)
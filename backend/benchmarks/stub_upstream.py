@@ -0,0 +1,86 @@
+"""Local stub of the AbuseIPDB, ip-api.com and OpenAI chat completion endpoints used by the benchmarks."""
+import asyncio
+from typing import Tuple
+
+from aiohttp import web
+
+
+def _abuseipdb_payload(ip: str) -> dict:
+    last_octet = int(ip.rsplit(".", 1)[-1]) if ip.count(".") == 3 else 0
+    return {
+        "data": {
+            "ipAddress": ip,
+            "abuseConfidenceScore": last_octet % 101,
+            "totalReports": last_octet % 20,
+            "numDistinctUsers": last_octet % 7,
+            "isWhitelisted": False,
+            "isPublic": True,
+            "usageType": "Data Center/Web Hosting/Transit",
+            "isTor": False,
+            "countryCode": "US",
+            "isp": "Stub Hosting",
+            "domain": "stub.example",
+            "hostnames": [],
+            "lastReportedAt": "2024-01-01T00:00:00+00:00",
+        }
+    }
+
+
+def _geolocation_payload(ip: str) -> dict:
+    return {
+        "status": "success",
+        "query": ip,
+        "country": "United States",
+        "countryCode": "US",
+        "as": "AS64500 Stub Hosting",
+        "org": "Stub Hosting",
+    }
+
+
+def build_app(latency: float = 0.0, llm_latency: float = 0.0) -> web.Application:
+    async def check(request: web.Request) -> web.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response(_abuseipdb_payload(request.query.get("ipAddress", "")))
+
+    async def geolocation(request: web.Request) -> web.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response(_geolocation_payload(request.match_info["ip"]))
+
+    async def chat_completion(request: web.Request) -> web.Response:
+        body = await request.json()
+        if llm_latency:
+            await asyncio.sleep(llm_latency)
+        return web.json_response(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Stub LLM narrative."},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 110, "completion_tokens": 180, "total_tokens": 290},
+            }
+        )
+
+    app = web.Application()
+    app.router.add_get("/api/v2/check", check)
+    app.router.add_get("/json/{ip}", geolocation)
+    app.router.add_post("/v1/chat/completions", chat_completion)
+    return app
+
+
+async def start_stub(latency: float = 0.0, llm_latency: float = 0.0) -> Tuple[web.AppRunner, str]:
+    """Start the stub on an ephemeral port and return ``(runner, base_url)``."""
+    runner = web.AppRunner(build_app(latency, llm_latency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
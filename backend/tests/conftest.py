@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Keep tests off the real report database and upstream APIs
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="tice-tests-")
+os.environ["REPORT_DB_PATH"] = os.path.join(_TEST_DATA_DIR, "reports.db")
+os.environ["ABUSEIPDB_API_KEY"] = ""
+os.environ["OPENAI_API_KEY"] = ""
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _save_report(repo, ip, **overrides):
+    """Store one analysis of ``ip`` with neutral defaults; ``risk_level`` follows ``threat_score`` unless given."""
+    from app.services.scorer import ThreatScoringEngine
+
+    fields = {
+        "ip_address": ip,
+        "threat_score": 50,
+        "abuse_confidence": 50,
+        "total_reports": 1,
+        "categories": ["scanner"],
+        "triggered_rules": [],
+        "narrative": "",
+        "country": "US",
+        "asn": "ASN",
+        "raw_data": {},
+        **overrides,
+    }
+    fields.setdefault("risk_level", ThreatScoringEngine.risk_level(fields["threat_score"]))
+    repo.save_analysis(**fields)
+
+
+@pytest.fixture
+def save_report():
+    return _save_report
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from aiohttp import web
+
+from app.repository.blacklist_repository import BlacklistRepository
+from app.services.collector import ThreatIntelCollector
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def load_fixture(name):
+    return json.loads((FIXTURES / name).read_text())
+
+
+async def start_stub(requests_seen):
+    async def check_block(request):
+        requests_seen.append(('check-block', dict(request.query)))
+        return web.json_response(
+            load_fixture('abuseipdb_check_block.json'),
+            headers={'X-RateLimit-Limit': '1000', 'X-RateLimit-Remaining': '998'},
+        )
+
+    async def blacklist(request):
+        requests_seen.append(('blacklist', dict(request.query)))
+        return web.json_response(load_fixture('abuseipdb_blacklist.json'))
+
+    app = web.Application()
+    app.router.add_get('/api/v2/check-block', check_block)
+    app.router.add_get('/api/v2/blacklist', blacklist)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/api/v2'
+
+
+def run_against_stub(call):
+    requests_seen = []
+
+    async def scenario():
+        runner, base_url = await start_stub(requests_seen)
+        collector = ThreatIntelCollector(abuseipdb_key='test-key', abuseipdb_base_url=base_url)
+        try:
+            return await call(collector)
+        finally:
+            await collector.close()
+            await runner.cleanup()
+
+    return asyncio.run(scenario()), requests_seen
+
+
+def test_check_block_yields_one_summary_per_reported_address():
+    summaries, seen = run_against_stub(lambda c: c.fetch_check_block('203.0.113.0/24', max_age_days=15))
+
+    assert seen == [('check-block', {'network': '203.0.113.0/24', 'maxAgeInDays': '15'})]
+    by_ip = {summary['ip_address']: summary for summary in summaries}
+    assert set(by_ip) == {'203.0.113.24', '203.0.113.57', '203.0.113.200'}
+    assert by_ip['203.0.113.24']['abuse_confidence_score'] == 100
+    assert by_ip['203.0.113.24']['total_reports'] == 42
+    assert by_ip['203.0.113.24']['reputation'] == 0
+    assert by_ip['203.0.113.57']['reputation'] == 2
+
+
+def test_check_block_summaries_score_like_single_lookups():
+    from app import main
+
+    summaries, _ = run_against_stub(lambda c: c.fetch_check_block('203.0.113.0/24'))
+    scored = {s['ip_address']: main._score_abuseipdb_summary(s['ip_address'], s) for s in summaries}
+
+    assert scored['203.0.113.24'].risk_level == 'CRITICAL'
+    assert 'malware' in scored['203.0.113.24'].threat_categories
+    assert scored['203.0.113.57'].risk_level == 'LOW'
+
+
+def test_blacklist_sync_replaces_local_table():
+    entries, seen = run_against_stub(lambda c: c.fetch_blacklist(confidence_minimum=90, limit=500))
+    assert seen == [('blacklist', {'confidenceMinimum': '90', 'limit': '500'})]
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        repo = BlacklistRepository(os.path.join(tmp_dir.name, 'reports.db'))
+        repo.replace_all([{'ipAddress': '10.0.0.1', 'abuseConfidenceScore': 50}])
+        assert repo.replace_all(entries) == 3
+
+        assert repo.get('10.0.0.1') is None
+        assert repo.get('192.0.2.44')['country_code'] == 'IR'
+        top = repo.get_entries(min_confidence=95)
+        assert [row['ip_address'] for row in top] == ['198.51.100.7', '192.0.2.44']
+        assert repo.summary()['entries'] == 3
+    finally:
+        tmp_dir.cleanup()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import AnalysisResponse
+from app.services.collector import ThreatIntelCollector
+from app.services.rate_limiter import TokenBucketLimiter
+
+
+def fake_response(ip):
+    return AnalysisResponse(
+        ip_address=ip,
+        threat_score=10,
+        risk_level='LOW',
+        threat_narrative='Test narrative',
+        country='US',
+        asn='Example ASN',
+        malicious_sources=0,
+        abuse_confidence=0,
+    )
+
+
+def test_batch_deduplicates_and_reports_errors_inline(monkeypatch):
+    analyzed = []
+
+    async def fake_perform(ip, priority=None):
+        analyzed.append(ip)
+        if ip == '5.5.5.5':
+            raise RuntimeError('upstream failed')
+        return fake_response(ip), None
+
+    async def fake_persist(response, report):
+        return None
+
+    monkeypatch.setattr(main, '_perform_analysis', fake_perform)
+    monkeypatch.setattr(main, '_persist_analysis', fake_persist)
+
+    result = asyncio.run(
+        main._analyze_batch(['1.1.1.1', '1.1.1.1', ' 5.5.5.5 ', 'not-an-ip', '2.2.2.2'])
+    )
+
+    assert result.total == 5
+    assert result.unique == 4
+    assert result.succeeded == 2
+    assert result.failed == 2
+    assert sorted(analyzed) == ['1.1.1.1', '2.2.2.2', '5.5.5.5']
+
+    by_ip = {item.ip_address: item for item in result.results}
+    assert by_ip['1.1.1.1'].result.threat_score == 10
+    assert by_ip['5.5.5.5'].error == 'upstream failed'
+    assert by_ip['not-an-ip'].error == 'Invalid IP address format'
+
+
+def exhausted(source):
+    limiter = TokenBucketLimiter(source, rate_per_second=100, burst=10)
+    limiter.observe(200, {
+        'X-RateLimit-Limit': '1000',
+        'X-RateLimit-Remaining': '0',
+        'X-RateLimit-Reset': str(time.time() + 3600),
+    })
+    return limiter
+
+
+def analyze_batch_with(monkeypatch, collector, ips):
+    persisted = []
+
+    async def fake_persist(response, report):
+        persisted.append(response.ip_address)
+
+    monkeypatch.setattr(main, 'collector', collector)
+    monkeypatch.setattr(main, '_persist_analysis', fake_persist)
+
+    async def scenario():
+        try:
+            return await main._analyze_batch(ips)
+        finally:
+            await collector.close()
+
+    return asyncio.run(scenario()), persisted
+
+
+def test_exhausted_abuseipdb_quota_fails_the_item_instead_of_scoring_it_clean(monkeypatch):
+    limiters = {'abuseipdb': exhausted('abuseipdb'), 'geolocation': exhausted('geolocation')}
+    collector = ThreatIntelCollector(abuseipdb_key='test-key', limiters=limiters)
+    result, persisted = analyze_batch_with(monkeypatch, collector, ['198.51.100.9'])
+    assert (result.succeeded, result.failed) == (0, 1)
+    assert result.results[0].status == 'error'
+    assert 'exhausted' in result.results[0].error
+    assert persisted == []
+
+
+def test_exhausted_geolocation_quota_only_degrades_geo_data(monkeypatch):
+    # No AbuseIPDB key: that leg answers without a request, so only the geo limiter is in play
+    collector = ThreatIntelCollector(abuseipdb_key='', limiters={'geolocation': exhausted('geolocation')})
+    collector.abuseipdb_key = ''
+    result, persisted = analyze_batch_with(monkeypatch, collector, ['198.51.100.10'])
+    assert result.results[0].status == 'ok'
+    assert result.results[0].result.country == 'Unknown'
+    assert persisted == ['198.51.100.10']
+
+
+def test_exhausted_quota_answers_503_from_every_analysis_endpoint(monkeypatch):
+    limiters = {'abuseipdb': exhausted('abuseipdb'), 'geolocation': exhausted('geolocation')}
+    collector = ThreatIntelCollector(abuseipdb_key='test-key', limiters=limiters)
+    monkeypatch.setattr(main, 'collector', collector)
+    client = TestClient(main.app)
+    try:
+        for path in ('/api/v1/analyze', '/api/v1/analyze/export'):
+            response = client.post(path, json={'ip_address': '198.51.100.11'})
+            assert response.status_code == 503, path
+            assert int(response.headers['retry-after']) > 3000
+            assert 'exhausted' in response.json()['detail']
+    finally:
+        asyncio.run(collector.close())
@@ -0,0 +1,38 @@
+import random
+
+from app.models import NormalizedThreatReport
+from app.services.scorer import ScoringBatch, ThreatScoringEngine
+
+CATEGORIES = ['malware', 'botnet', 'c2', 'phishing', 'spam', 'scanner', 'brute_force']
+COUNTRIES = ['US', 'DE', 'KP', 'IR', 'CN', 'Unknown']
+
+
+def random_report(rng, idx):
+    return NormalizedThreatReport(
+        ip_address=f'10.0.{idx // 256 % 256}.{idx % 256}',
+        abuse_confidence=rng.choice([0, 59.5, 60, 74, 75, 84.9, 85, 100, rng.uniform(0, 100)]),
+        total_reports=rng.choice([0, 4, 5, 9, 10, 14, 15, rng.randint(0, 50)]),
+        malicious_sources=rng.randint(0, 7),
+        suspicious_sources=rng.randint(0, 6),
+        threat_categories=rng.sample(CATEGORIES, rng.randint(0, 3)),
+        country_code=rng.choice(COUNTRIES),
+        feed_matches=[f'feed-{n}' for n in range(rng.randint(0, 2))],
+        prefix_high_risk_neighbors=rng.choice([0, 1, 2, 4, 5, rng.randint(0, 30)]),
+        prefix_neighbor_mean_score=rng.choice([0, 59.99, 60, rng.uniform(0, 100)]),
+        asn_high_risk_neighbors=rng.choice([0, 19, 20, rng.randint(0, 100)]),
+        asn_neighbor_mean_score=rng.choice([0, 60, rng.uniform(0, 100)]),
+    )
+
+
+def test_batch_scores_match_scalar_path():
+    rng = random.Random(42)
+    reports = [random_report(rng, idx) for idx in range(2000)]
+    engine = ThreatScoringEngine()
+
+    result = engine.score_batch(ScoringBatch.from_reports(reports))
+
+    for idx, report in enumerate(reports):
+        score, triggered = engine.score(report)
+        assert result['scores'][idx] == score
+        assert engine.triggered_names(result['triggered'][idx]) == triggered
+        assert result['risk_levels'][idx] == ThreatScoringEngine.risk_level(score)
@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import NormalizedThreatReport
+from app.repository.report_repository import ReportRepository
+from app.services.scorer import ThreatScoringEngine
+
+
+def snapshot(path):
+    with sqlite3.connect(path) as conn:
+        return (
+            sorted(conn.execute('SELECT * FROM correlation_groups')),
+            sorted(conn.execute('SELECT * FROM correlation_categories')),
+        )
+
+
+def test_incremental_aggregates_match_a_rebuild_after_inserts_and_retention(save_report):
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'reports.db')
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=150)
+        now = datetime.now(timezone.utc)
+        for idx in range(400):
+            ip = rng.choice([f'198.51.{rng.randint(0, 3)}.{rng.randint(0, 20)}', f'2001:db8:{rng.randint(0, 2)}::{rng.randint(1, 9)}'])
+            save_report(
+                repo, ip, threat_score=rng.randint(0, 100), asn=rng.choice(['AS1 One', 'AS2 Two', 'Unknown']),
+                categories=rng.sample(['scanner', 'botnet', 'spam'], rng.randint(0, 2)),
+                analyzed_at=now - timedelta(seconds=400 - idx),
+            )
+            if idx % 97 == 0:
+                repo.compact(chunk_size=7)
+        repo.compact(chunk_size=7)
+        incremental = snapshot(path)
+        repo.close()
+        assert incremental[0]
+
+        with sqlite3.connect(path) as conn:
+            conn.execute('DROP TABLE correlation_groups')
+        ReportRepository(db_path=path, retention_days=0, retention_limit=150).close()
+        assert snapshot(path) == incremental
+
+
+def test_features_leave_out_the_address_itself(save_report):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(
+            db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0, correlation_min_reports=3
+        )
+        for host, score in ((1, 90), (2, 80), (3, 70), (4, 10)):
+            save_report(repo, f'203.0.113.{host}', threat_score=score)
+        save_report(repo, '203.0.113.1', threat_score=95)
+        save_report(repo, '2001:db8::1', threat_score=90, asn='Unknown')
+
+        features = repo.correlation_features('203.0.113.1')
+        assert features['prefix_neighbor_ips'] == 3
+        assert features['prefix_high_risk_neighbors'] == 2
+        assert features['prefix_neighbor_mean_score'] == round((80 + 70 + 10) / 3, 2)
+        assert features['asn_neighbor_ips'] == 3
+
+        # Unseen address: the ASN it reports is used, and everything stored counts as a neighbour
+        features = repo.correlation_features('203.0.113.200', 'ASN')
+        assert (features['prefix_neighbor_ips'], features['prefix_high_risk_neighbors']) == (4, 3)
+        assert features['asn_high_risk_neighbors'] == 3
+        assert features['prefix_neighbor_mean_score'] == round((90 + 95 + 80 + 70 + 10) / 5, 2)
+
+        lone = repo.correlation_features('2001:db8::1')
+        assert set(lone.values()) == {0}
+
+        engine = ThreatScoringEngine()
+        report = NormalizedThreatReport(ip_address='203.0.113.200', **features)
+        score, triggered = engine.score(report)
+        assert triggered == ['Suspicious Subnet', 'High-Risk Subnet Average', 'High-Risk ASN Average']
+        assert score == 25
+        repo.close()
+
+
+def test_reanalysing_neighbours_never_raises_their_scores(save_report):
+    engine = ThreatScoringEngine()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(
+            db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0, correlation_min_reports=3
+        )
+        for host in range(1, 5):
+            save_report(repo, f'203.0.113.{host}', threat_score=62)
+
+        scores = {}
+        for _ in range(4):
+            for ip in ('203.0.113.10', '203.0.113.11', '203.0.113.12'):
+                report = NormalizedThreatReport(
+                    ip_address=ip, abuse_confidence=85, total_reports=10, asn_name='ASN',
+                    **repo.correlation_features(ip, 'ASN'),
+                )
+                score, base, triggered, _ = engine.score_with_base(report)
+                assert base == 50
+                save_report(repo, ip, threat_score=score, base_score=base)
+                scores.setdefault(ip, []).append(score)
+        repo.close()
+
+    # Scored on threat_score, each one's correlation points made the others "high risk" and
+    # pushed the /24 past the Hostile Subnet threshold on the next pass
+    for ip, history in scores.items():
+        assert history == sorted(history, reverse=True), (ip, history)
+    assert scores['203.0.113.10'][0] == 75
+
+
+def test_correlations_endpoint(save_report):
+    repo = main.report_repository
+    for host in range(1, 4):
+        save_report(repo, f'192.0.2.{host}', threat_score=85, asn='AS64511 Endpoint', categories=['botnet'])
+    client = TestClient(main.app)
+
+    body = client.get('/api/v1/correlations', params={'ip': '192.0.2.1'}).json()
+    groups = {group['scope']: group for group in body['groups']}
+    assert groups['prefix']['group'] == '192.0.2.0/24'
+    assert groups['asn']['group'] == 'AS64511 Endpoint'
+    assert groups['prefix']['high_risk_ips'] == 3
+    assert groups['prefix']['categories'] == {'botnet': 3}
+    assert groups['prefix']['mean_base_score'] == 85
+    assert body['features']['prefix_high_risk_neighbors'] == 2
+
+    listing = client.get('/api/v1/correlations', params={'scope': 'asn', 'limit': 5}).json()
+    assert {group['scope'] for group in listing['groups']} == {'asn'}
+    assert 'features' not in listing
+    assert client.get('/api/v1/correlations', params={'scope': 'country'}).status_code == 422
+    assert client.get('/api/v1/correlations', params={'ip': 'nope'}).status_code == 400
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+
+from app.services.feed_index import FeedIndex, FeedSource, parse_range
+from app.services.normalizer import DataNormalizer
+from app.services.scorer import ThreatScoringEngine
+
+
+def write(path, content):
+    with open(path, 'w') as handle:
+        handle.write(content)
+    return path
+
+
+def test_parse_range_masks_host_bits():
+    assert parse_range('10.0.0.7') == (167772167, 167772167)
+    assert parse_range('10.0.0.7/24') == (167772160, 167772415)
+    assert parse_range('0.0.0.0/0') == (0, 0xFFFFFFFF)
+
+
+def test_lookups_across_ip_cidr_and_csv_feeds():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        ips = write(os.path.join(tmp_dir.name, 'scanners.txt'), '# scanners\n192.0.2.10\n192.0.2.11 ; comment\nbogus\n')
+        cidrs = write(os.path.join(tmp_dir.name, 'botnet.netset'), '203.0.113.0/25\n203.0.113.64/26\n198.51.100.0/24\n')
+        table = write(os.path.join(tmp_dir.name, 'c2.csv'), 'first_seen,ip,port\n2024-01-01,198.51.100.20,443\n')
+
+        index = FeedIndex()
+        stats = index.load([
+            FeedSource('scanners', ips, 'scanner'),
+            FeedSource('botnet', cidrs, 'botnet', format='cidr'),
+            FeedSource('c2', table, 'c2'),
+        ])
+
+        assert stats['entries'] == 6
+        assert stats['skipped_entries'] == 1
+        assert {feed['name']: feed['ranges'] for feed in stats['feeds']} == {'scanners': 1, 'botnet': 2, 'c2': 1}
+
+        assert index.lookup('192.0.2.11') == [{'feed': 'scanners', 'category': 'scanner'}]
+        assert index.lookup('192.0.2.12') == []
+        assert index.lookup('203.0.113.100') == [{'feed': 'botnet', 'category': 'botnet'}]
+        assert index.lookup('203.0.113.128') == []
+        assert [m['feed'] for m in index.lookup('198.51.100.20')] == ['botnet', 'c2']
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_reload_swaps_in_new_manifest_contents():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        feed = write(os.path.join(tmp_dir.name, 'feed.txt'), '192.0.2.1\n')
+        manifest = write(
+            os.path.join(tmp_dir.name, 'feeds.json'),
+            json.dumps({'feeds': [{'name': 'local', 'path': 'feed.txt', 'category': 'malware'}]}),
+        )
+        index = FeedIndex(manifest_path=manifest)
+        index.reload()
+        assert index.lookup('192.0.2.1')
+
+        write(feed, '192.0.2.2\n')
+        index.reload()
+        assert index.lookup('192.0.2.1') == []
+        assert index.lookup('192.0.2.2')
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_feed_matches_drive_categories_and_scoring():
+    raw = {
+        'abuseipdb': {},
+        'geolocation': {},
+        'local_feeds': {'matches': [
+            {'feed': 'emerging-botnet', 'category': 'botnet'},
+            {'feed': 'firehol-level1', 'category': 'malware'},
+        ]},
+    }
+    report = DataNormalizer.normalize(raw, '203.0.113.5')
+    assert report.feed_matches == ['emerging-botnet', 'firehol-level1']
+    assert 'botnet' in report.threat_categories
+
+    score, triggered = ThreatScoringEngine().score(report)
+    assert 'Local Blocklist Match' in triggered
+    assert 'Multiple Local Blocklist Matches' in triggered
+    assert score > 0
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import tempfile
+
+from app.services.collector import ThreatIntelCollector
+from app.services.geo_db import GeoDatabase
+
+
+def write_csv(path, content):
+    with open(path, 'w') as handle:
+        handle.write(content)
+    return path
+
+
+def test_csv_is_compiled_and_memory_mapped():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = write_csv(
+            os.path.join(tmp_dir.name, 'geo.csv'),
+            'network,country,country_code,org\n'
+            '8.8.8.0/24,United States,US,AS15169 Google LLC\n'
+            '1.1.1.0/24,Australia,AU,AS13335 Cloudflare\n'
+            'not-a-network,Nowhere,XX,Broken\n',
+        )
+        db = GeoDatabase(path)
+        try:
+            assert db.lookup('8.8.8.8') == {
+                'country': 'United States', 'countryCode': 'US', 'org': 'AS15169 Google LLC',
+            }
+            assert db.lookup('1.1.1.1')['countryCode'] == 'AU'
+            assert db.lookup('9.9.9.9') is None
+            stats = db.stats()
+            assert stats['ranges'] == 2
+            assert stats['hits'] == 2 and stats['misses'] == 1
+        finally:
+            db.close()
+        assert os.path.exists(os.path.join(tmp_dir.name, 'geo.geo.bin'))
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_start_end_columns_with_integer_bounds():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = write_csv(
+            os.path.join(tmp_dir.name, 'ranges.csv'),
+            'ip_from,ip_to,country_code,country_name,as\n'
+            '3232235520,3232235775,ZZ,Private,AS0 Example\n'
+            '10.0.0.0,10.255.255.255,ZZ,Private,AS0 Example\n',
+        )
+        db = GeoDatabase(path)
+        try:
+            assert db.lookup('192.168.0.77')['org'] == 'AS0 Example'
+            assert db.lookup('10.20.30.40')['country'] == 'Private'
+            assert db.stats()['records'] == 1
+        finally:
+            db.close()
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_nested_ranges_resolve_to_the_innermost_match():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = write_csv(
+            os.path.join(tmp_dir.name, 'geo.csv'),
+            'network,country,country_code,org\n'
+            '10.0.0.0/8,Outer,OU,AS1 Outer\n'
+            '10.1.0.0/16,Inner,IN,AS2 Inner\n'
+            '10.1.2.0/24,Innermost,IM,AS3 Innermost\n',
+        )
+        db = GeoDatabase(path)
+        try:
+            assert db.lookup('10.0.0.1')['countryCode'] == 'OU'
+            assert db.lookup('10.1.0.1')['countryCode'] == 'IN'
+            assert db.lookup('10.1.2.3')['countryCode'] == 'IM'
+            assert db.lookup('10.1.3.0')['countryCode'] == 'IN'
+            assert db.lookup('10.200.0.1')['countryCode'] == 'OU'
+            assert db.lookup('10.255.255.255')['countryCode'] == 'OU'
+            assert db.lookup('11.0.0.0') is None
+            assert db.stats()['ranges'] == 5
+        finally:
+            db.close()
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_collector_answers_geolocation_locally():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = write_csv(
+            os.path.join(tmp_dir.name, 'geo.csv'),
+            'network,country,country_code,org\n203.0.113.0/24,Iran,IR,AS64500 Example\n',
+        )
+        db = GeoDatabase(path)
+        collector = ThreatIntelCollector(abuseipdb_key='', geo_db=db, ipapi_base_url='http://127.0.0.1:9')
+
+        async def scenario():
+            try:
+                return await collector.fetch_all('203.0.113.9')
+            finally:
+                await collector.close()
+
+        data = asyncio.run(scenario())
+        db.close()
+        assert data['geolocation']['countryCode'] == 'IR'
+        assert data['sources']['geolocation']['origin'] == 'local'
+    finally:
+        tmp_dir.cleanup()
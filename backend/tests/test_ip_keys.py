@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.ip_keys import ip_key, ip_prefix, network_key_range, normalize_ip
+from app.repository.report_repository import ReportRepository
+from app.services.feed_index import FeedIndex, FeedSource
+
+
+def test_keys_sort_like_addresses_and_cover_networks():
+    assert normalize_ip(' 2001:DB8:0:0::1 ') == '2001:db8::1'
+    assert normalize_ip('::ffff:192.0.2.1') == '192.0.2.1'
+    assert ip_key('::ffff:192.0.2.1') == ip_key('192.0.2.1')
+    assert len(ip_key('192.0.2.1')) == 5 and len(ip_key('2001:db8::1')) == 17
+    for bad in ('1.2.3', '256.1.1.1', 'fe80::1%eth0', 'example.com'):
+        with pytest.raises(ValueError):
+            ip_key(bad)
+
+    ordered = ['0.0.0.0', '9.255.255.255', '10.0.0.0', '255.255.255.255', '::', '2001:db8::', 'ffff::']
+    assert sorted(ordered, key=ip_key) == ordered
+
+    first, last = network_key_range('203.0.113.77/24')
+    assert (first, last) == (ip_key('203.0.113.0'), ip_key('203.0.113.255'))
+    assert first <= ip_key('203.0.113.9') <= last
+    assert not first <= ip_key('203.0.114.0') <= last
+    first, last = network_key_range('2001:db8:1::/48')
+    assert first <= ip_key('2001:db8:1:ffff::1') <= last
+    assert not first <= ip_key('2001:db8:2::') <= last
+    with pytest.raises(ValueError):
+        network_key_range('203.0.113.0/33')
+
+    assert ip_prefix('203.0.113.77') == '203.0.113.0/24'
+    assert ip_prefix('::ffff:203.0.113.77') == '203.0.113.0/24'
+    assert ip_prefix('2001:db8:1:ffff::1') == '2001:db8:1::/48'
+
+
+def test_network_filter_and_ipv6_reports(save_report):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        now = datetime.now(timezone.utc)
+        ips = ['203.0.113.5', '203.0.113.250', '203.0.114.1', '2001:db8:1::5', '2001:db8:1:ff::9', '2001:db8:2::1']
+        for offset, ip in enumerate(ips):
+            save_report(repo, ip, analyzed_at=now - timedelta(seconds=len(ips) - offset))
+        save_report(repo, '2001:db8:1::5', analyzed_at=now)
+
+        def listed(**filters):
+            return [r['ip_address'] for r in repo.list_reports(**filters)['reports']]
+
+        assert listed(network='203.0.113.0/24') == ['203.0.113.250', '203.0.113.5']
+        assert listed(network='2001:db8:1::/48') == ['2001:db8:1::5', '2001:db8:1:ff::9', '2001:db8:1::5']
+        assert listed(network='0.0.0.0/0') == ['203.0.114.1', '203.0.113.250', '203.0.113.5']
+        assert listed(ip_address='2001:DB8:1:0::5') == ['2001:db8:1::5', '2001:db8:1::5']
+        assert [r['occurrence_count'] for r in repo.list_reports(ip_address='2001:db8:1::5')['reports']] == [2, 2]
+        with pytest.raises(ValueError):
+            repo.list_reports(network='not-a-network')
+
+        with sqlite3.connect(os.path.join(tmp_dir, 'reports.db')) as conn:
+            plan = ' '.join(
+                row[3] for row in conn.execute(
+                    'EXPLAIN QUERY PLAN SELECT id FROM reports WHERE ip_key BETWEEN ? AND ? ORDER BY analyzed_ts',
+                    network_key_range('203.0.113.0/24'),
+                )
+            )
+        assert 'idx_reports_ip_key_ts' in plan
+        repo.close()
+
+
+def test_legacy_rows_are_backfilled_with_ip_keys(save_report):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'reports.db')
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        save_report(repo, '198.51.100.7')
+        repo.close()
+        with sqlite3.connect(path) as conn:
+            # Shape of a database written before the packed key existed
+            conn.execute('DROP INDEX idx_reports_ip_key_ts')
+            conn.execute('ALTER TABLE reports DROP COLUMN ip_key')
+            conn.execute('DROP TABLE ip_summary')
+            conn.execute(
+                'CREATE TABLE ip_summary (ip_address TEXT PRIMARY KEY, first_seen_ts INTEGER NOT NULL,'
+                ' last_seen_ts INTEGER NOT NULL, report_count INTEGER NOT NULL,'
+                ' max_threat_score INTEGER NOT NULL, top_report_id INTEGER NOT NULL)'
+            )
+
+        repo = ReportRepository(db_path=path, retention_days=0, retention_limit=0)
+        save_report(repo, '198.51.100.7')
+        records = repo.list_reports(network='198.51.100.0/24')['reports']
+        assert [r['occurrence_count'] for r in records] == [2, 2]
+        assert repo.get_stats()['metrics']['unique_ips'] == 1
+        repo.close()
+
+
+def test_endpoints_accept_ipv6_and_network_filter(save_report):
+    save_report(main.report_repository, '2001:db8:77::1')
+    client = TestClient(main.app)
+    body = client.get('/api/v1/reports/recent', params={'network': '2001:db8:77::/48'}).json()
+    assert [r['ip_address'] for r in body['reports']] == ['2001:db8:77::1']
+    assert client.get('/api/v1/reports/recent', params={'network': '2001:db8::/129'}).status_code == 400
+    assert client.get('/api/v1/reports/export', params={'network': 'bogus'}).status_code == 400
+    assert client.post('/api/v1/analyze', json={'ip_address': '1.2.3'}).status_code == 400
+
+
+def test_feed_index_matches_ipv6_ranges():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'mixed.netset')
+        with open(path, 'w') as handle:
+            handle.write('192.0.2.0/24\n2001:db8:bad::/48\n2001:db8:bad:1::/64\n2001:db8::1\nzz::1\n')
+        index = FeedIndex()
+        stats = index.load([FeedSource('mixed', path, 'botnet')])
+        assert stats['entries'] == 4 and stats['skipped_entries'] == 1
+        assert stats['feeds'][0]['ranges'] == 3
+        assert index.lookup('2001:db8:bad:ffff::1') == [{'feed': 'mixed', 'category': 'botnet'}]
+        assert index.lookup('2001:db8::1')
+        assert index.lookup('2001:db8::2') == []
+        assert index.lookup('::ffff:192.0.2.9') == [{'feed': 'mixed', 'category': 'botnet'}]
+        assert index.lookup('not-an-ip') == []
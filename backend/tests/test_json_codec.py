@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app import json_codec, main
+from app.json_codec import JSONFragment, dumps
+from app.repository.report_repository import ReportRepository
+
+
+# Text that must survive both the parsed and the spliced-fragment encodings
+STORED = {'categories': ['scanner', 'ünïcode'], 'triggered_rules': ['Rule "quoted"'], 'narrative': 'Fragment narrative.'}
+
+
+def test_fragments_are_spliced_with_orjson_and_stdlib(monkeypatch):
+    value = {
+        'rows': [{'a': JSONFragment('[1, 2]'), 'b': 'x'}, JSONFragment(b'{"nested":true}')],
+        'when': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        'text': '"quoted" ü',
+    }
+    expected = {
+        'rows': [{'a': [1, 2], 'b': 'x'}, {'nested': True}],
+        'when': '2024-01-02T03:04:05+00:00',
+        'text': '"quoted" ü',
+    }
+    assert json.loads(dumps(value)) == expected
+    monkeypatch.setattr(json_codec, 'ORJSON_AVAILABLE', False)
+    assert json.loads(dumps(value)) == expected
+
+
+def test_fragment_rows_encode_like_parsed_rows(save_report):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        save_report(repo, '1.2.3.4', raw_data={'abuseipdb': {'score': 80, 'note': 'ü'}, 'geolocation': {'country': 'DE'}}, **STORED)
+        parsed = repo.list_reports()
+        spliced = repo.list_reports(fragments=True)
+        assert isinstance(spliced['reports'][0]['categories'], JSONFragment)
+        assert json.loads(dumps(spliced)) == json.loads(json.dumps(parsed))
+
+        report_id = parsed['reports'][0]['id']
+        full = repo.get_report(report_id, fragments=True)
+        assert json.loads(dumps(full)) == json.loads(json.dumps(repo.get_report(report_id)))
+        repo.close()
+
+
+def test_report_endpoints_return_stored_rows(save_report):
+    save_report(main.report_repository, '7.7.7.7', raw_data={'abuseipdb': {'score': 80}}, **STORED)
+    client = TestClient(main.app)
+    listing = client.get('/api/v1/reports/recent', params={'ip': '7.7.7.7'}).json()['reports'][0]
+    assert listing['categories'] == ['scanner', 'ünïcode']
+    assert listing['triggered_rules'] == ['Rule "quoted"']
+    assert 'raw_data' not in listing
+
+    report = client.get(f"/api/v1/reports/{listing['id']}").json()
+    assert report['raw_data'] == {'abuseipdb': {'score': 80}}
+    assert report['analyzed_at'] == listing['analyzed_at']
+    assert client.get('/api/v1/reports/999999999').status_code == 404
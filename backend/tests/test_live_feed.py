@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.repository.report_repository import ReportRepository
+from app.services.live_feed import RESYNC, LiveFeed
+
+
+def parse(message):
+    fields = dict(line.split(': ', 1) for line in message.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_repository_changes_are_fanned_out_to_subscribers(save_report):
+    async def scenario(repo):
+        feed = LiveFeed()
+        feed.start()
+        repo.add_listener(feed.publish_threadsafe)
+        streams = [feed.stream(), feed.stream()]
+        for stream in streams:
+            assert (await stream.__anext__()).startswith(b'retry:')
+
+        analyzed_at = datetime.now(timezone.utc)
+        await asyncio.to_thread(
+            save_report, repo, '1.2.3.4', threat_score=70, analyzed_at=analyzed_at,
+            categories=['scanner', 'scanner', 'botnet'],
+        )
+        await asyncio.to_thread(save_report, repo, '1.2.3.4', threat_score=70)
+        await asyncio.to_thread(repo.update_narrative, '1.2.3.4', analyzed_at, 'LLM narrative.')
+        events = [[parse(await stream.__anext__()) for _ in range(3)] for stream in streams]
+
+        feed.close()
+        for stream in streams:
+            assert [message async for message in stream] == []
+        return events, feed.stats()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        events, stats = asyncio.run(scenario(repo))
+        repo.close()
+
+    assert events[0] == events[1]
+    (kind, first), (_, repeat), (narrative_kind, narrative) = events[0]
+    assert kind == 'report'
+    assert first['report']['ip_address'] == '1.2.3.4'
+    assert first['report']['is_new'] is True
+    assert first['delta']['unique_ips'] == 1
+    assert first['delta']['risk_level'] == 'HIGH'
+    assert sorted(first['delta']['categories']) == ['botnet', 'scanner']
+    assert repeat['delta']['unique_ips'] == 0
+    assert repeat['report']['occurrence_count'] == 2
+    assert narrative_kind == 'narrative'
+    assert narrative == {'id': first['report']['id'], 'narrative': 'LLM narrative.', 'narrative_pending': False}
+    assert stats['subscribers'] == 0
+    assert stats['events'] == 3
+    assert stats['deliveries'] == 6
+
+
+def test_slow_subscriber_is_told_to_resync():
+    async def scenario():
+        feed = LiveFeed(queue_size=2)
+        feed.start()
+        stream = feed.stream()
+        await stream.__anext__()
+        feed.publish('report', [{'n': n} for n in range(3)])
+        message = await stream.__anext__()
+        feed.publish('report', [{'n': 5}])
+        following = await stream.__anext__()
+        feed.close()
+        return message, following, feed.stats()
+
+    message, following, stats = asyncio.run(scenario())
+    assert message == RESYNC
+    assert parse(following) == ('report', {'n': 5})
+    assert stats['resyncs'] == 1
+
+
+def test_purge_is_published_after_compaction(save_report):
+    events = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=1, retention_limit=0)
+        repo.add_listener(lambda kind, items: events.append((kind, items)))
+        save_report(repo, '1.2.3.4', analyzed_at=datetime.now(timezone.utc) - timedelta(days=3))
+        repo.compact()
+        repo.close()
+    assert [kind for kind, _ in events] == ['report', 'purge']
+    assert events[1][1] == [{'reports_purged': 1}]
+
+
+def test_polling_endpoints_answer_304_until_reports_change(save_report):
+    client = TestClient(main.app)
+    first = client.get('/api/v1/reports/stats', params={'hours': 24})
+    etag = first.headers['etag']
+    assert first.status_code == 200
+
+    cached = client.get('/api/v1/reports/stats', params={'hours': 24}, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    other_window = client.get('/api/v1/reports/stats', params={'hours': 48}, headers={'If-None-Match': etag})
+    assert other_window.status_code == 200
+
+    recent = client.get('/api/v1/reports/recent', params={'limit': 5})
+    assert client.get(
+        '/api/v1/reports/recent', params={'limit': 5}, headers={'If-None-Match': recent.headers['etag']}
+    ).status_code == 304
+
+    save_report(main.report_repository, '9.8.7.6')
+    changed = client.get('/api/v1/reports/stats', params={'hours': 24}, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import tempfile
+
+from aiohttp import web
+
+from app.models import NormalizedThreatReport
+from app.services.narrative import NarrativeGenerator
+from app.services.narrative_cache import NarrativeCache, narrative_fingerprint
+
+
+def botnet_node(ip, confidence=92, malicious=5, categories=('botnet', 'scanner')):
+    return NormalizedThreatReport(
+        ip_address=ip,
+        abuse_confidence=confidence,
+        malicious_sources=malicious,
+        threat_categories=list(categories),
+        country='Netherlands',
+        asn_name='AS64500 Example Hosting',
+    )
+
+
+def test_fingerprint_buckets_near_identical_profiles():
+    base = narrative_fingerprint(botnet_node('1.1.1.1'), 83, 'HIGH')
+    assert narrative_fingerprint(botnet_node('2.2.2.2', confidence=98, malicious=7, categories=('scanner', 'botnet')), 87, 'HIGH') == base
+    assert narrative_fingerprint(botnet_node('1.1.1.1', malicious=8), 83, 'HIGH') != base
+    assert narrative_fingerprint(botnet_node('1.1.1.1', categories=('botnet',)), 83, 'HIGH') != base
+    assert narrative_fingerprint(botnet_node('1.1.1.1'), 93, 'CRITICAL') != base
+
+
+def test_cache_expires_evicts_lru_and_persists():
+    now = [1000.0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'narratives.db')
+        cache = NarrativeCache(path, max_entries=2, ttl=100, cost_per_1k_tokens=0.5, clock=lambda: now[0])
+        cache.put('a', 'narrative a', generation_seconds=1.5, tokens=400)
+        now[0] += 1
+        cache.put('b', 'narrative b', generation_seconds=1.0, tokens=300)
+        now[0] += 1
+        assert cache.get('a') == 'narrative a'
+        cache.put('c', 'narrative c', generation_seconds=1.0, tokens=300)
+        assert cache.get('b') is None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 1, 1, 2)
+        assert (stats['saved_seconds'], stats['saved_tokens'], stats['saved_usd']) == (1.5, 400, 0.2)
+        cache.close()
+
+        reopened = NarrativeCache(path, max_entries=2, ttl=100, clock=lambda: now[0])
+        assert reopened.get('c') == 'narrative c'
+        now[0] += 100
+        assert reopened.get('c') is None
+        assert reopened.stats()['expired'] == 1
+        reopened.close()
+
+
+async def fake_llm(reply):
+    """Serve chat completions answering each prompt with ``reply(prompt)``; returns (runner, base_url)."""
+
+    async def completions(request):
+        body = await request.json()
+        content = await reply(body['messages'][-1]['content'])
+        return web.json_response(
+            {
+                'id': 'chatcmpl-test',
+                'object': 'chat.completion',
+                'created': 0,
+                'model': body['model'],
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 90, 'completion_tokens': 30, 'total_tokens': 120},
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1'
+
+
+def test_similar_profiles_share_one_completion():
+    calls = []
+
+    async def reply(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return f"{prompt.split()[5].rstrip('.')} is a botnet node."
+
+    async def scenario(cache):
+        runner, base_url = await fake_llm(reply)
+        narrator = NarrativeGenerator(openai_key='test-key', base_url=base_url, timeout=5, cache=cache)
+        try:
+            burst = await asyncio.gather(*(narrator.generate_llm(botnet_node(f'10.0.0.{i}'), 85, 'HIGH') for i in range(5)))
+            later = await narrator.generate_llm(botnet_node('10.0.9.9', confidence=95), 88, 'HIGH')
+            peeked = await narrator.cached(botnet_node('10.0.9.8'), 81, 'HIGH')
+        finally:
+            await runner.cleanup()
+        return burst, later, peeked
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = NarrativeCache(os.path.join(tmp_dir, 'narratives.db'))
+        burst, later, peeked = asyncio.run(scenario(cache))
+        stats = cache.stats()
+        cache.close()
+
+    assert len(calls) == 1
+    assert burst == [f'10.0.0.{i} is a botnet node.' for i in range(5)]
+    assert later == '10.0.9.9 is a botnet node.'
+    assert peeked == '10.0.9.8 is a botnet node.'
+    assert (stats['hits'], stats['writes'], stats['saved_tokens']) == (2, 1, 240)
+
+
+def test_shared_narrative_quotes_bucket_ranges_not_exact_values():
+    async def reply(prompt):
+        # An LLM that repeats every figure it was given
+        return prompt.replace('Summarize the threat for', 'Threat summary for')
+
+    async def scenario(cache):
+        runner, base_url = await fake_llm(reply)
+        narrator = NarrativeGenerator(openai_key='test-key', base_url=base_url, timeout=5, cache=cache)
+        try:
+            first = await narrator.generate_llm(botnet_node('10.0.0.1', confidence=83, malicious=5), 71, 'HIGH')
+            second = await narrator.generate_llm(botnet_node('10.0.0.2', confidence=88, malicious=6), 76, 'HIGH')
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = NarrativeCache(os.path.join(tmp_dir, 'narratives.db'))
+        first, second = asyncio.run(scenario(cache))
+        hits = cache.stats()['hits']
+        cache.close()
+
+    assert hits == 1
+    assert second == first.replace('10.0.0.1', '10.0.0.2')
+    assert 'score 70-79/100' in second and 'Abuse confidence: 80-89%' in second and 'Malicious vendors: 4-7' in second
+    for exact in ('71', '76', '83', '88'):
+        assert exact not in second.replace('10.0.0.2', '')
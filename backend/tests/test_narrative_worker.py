@@ -0,0 +1,160 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from app.models import NormalizedThreatReport
+from app.repository.report_repository import ReportRepository
+from app.services.narrative import NarrativeGenerator
+from app.services.narrative_worker import NarrativeWorkerPool
+
+
+async def start_fake_llm(delay=0.0):
+    """OpenAI-compatible chat completions endpoint that echoes the prompt's first words."""
+    async def completions(request):
+        body = await request.json()
+        await asyncio.sleep(delay)
+        prompt = body['messages'][-1]['content']
+        return web.json_response(
+            {
+                'id': 'chatcmpl-test',
+                'object': 'chat.completion',
+                'created': 0,
+                'model': body['model'],
+                'choices': [
+                    {
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': f"LLM: {' '.join(prompt.split()[:6])}"},
+                        'finish_reason': 'stop',
+                    }
+                ],
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/v1'
+
+
+def save_pending(repo, ip, analyzed_at):
+    repo.save_analysis(
+        ip_address=ip,
+        threat_score=80,
+        risk_level='HIGH',
+        abuse_confidence=90,
+        total_reports=3,
+        categories=['scanner'],
+        triggered_rules=[],
+        narrative='Template narrative.',
+        country='US',
+        asn='ASN',
+        raw_data={},
+        analyzed_at=analyzed_at,
+        narrative_pending=True,
+    )
+
+
+def run_pool(delay, timeout, ips):
+    async def scenario():
+        runner, base_url = await start_fake_llm(delay)
+        narrator = NarrativeGenerator(openai_key='test-key', base_url=base_url, timeout=timeout)
+        settled = []
+
+        async def generate(job):
+            return await narrator.generate_llm(job['report'], 80, 'HIGH')
+
+        async def apply(job, narrative):
+            settled.append(narrative)
+            await asyncio.to_thread(repo.update_narrative, job['ip_address'], job['analyzed_at'], narrative)
+
+        pool = NarrativeWorkerPool(generate, apply, workers=2, timeout=timeout)
+        pool.start()
+        for ip in ips:
+            analyzed_at = datetime.now(timezone.utc)
+            save_pending(repo, ip, analyzed_at)
+            assert pool.submit({'ip_address': ip, 'analyzed_at': analyzed_at, 'report': NormalizedThreatReport(ip_address=ip)})
+        while len(settled) < len(ips):
+            await asyncio.sleep(0.01)
+        await pool.close()
+        await runner.cleanup()
+        return pool.stats()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        stats = asyncio.run(scenario())
+        reports = repo.list_reports(fields=['ip_address', 'narrative', 'narrative_pending'])['reports']
+        repo.close()
+    return stats, reports
+
+
+def test_background_narratives_are_written_back():
+    stats, reports = run_pool(delay=0.0, timeout=5.0, ips=['1.2.3.4', '5.6.7.8', '9.9.9.9'])
+    assert stats['completed'] == 3
+    assert stats['timeouts'] == 0
+    assert {r['ip_address']: r['narrative'] for r in reports}['5.6.7.8'] == 'LLM: Summarize the threat for IP 5.6.7.8.'
+    assert not any(r['narrative_pending'] for r in reports)
+
+
+def test_timed_out_narrative_keeps_template_and_clears_pending():
+    stats, reports = run_pool(delay=1.0, timeout=0.2, ips=['1.2.3.4'])
+    assert stats['timeouts'] == 1
+    assert reports[0]['narrative'] == 'Template narrative.'
+    assert reports[0]['narrative_pending'] is False
+
+
+def test_close_settles_queued_jobs_and_rejects_when_full():
+    async def scenario():
+        settled = []
+
+        async def generate(job):
+            await asyncio.sleep(10)
+
+        async def apply(job, narrative):
+            settled.append((job, narrative))
+
+        pool = NarrativeWorkerPool(generate, apply, workers=1, timeout=30, max_pending=2)
+        pool.start()
+        assert pool.submit(1) and pool.submit(2)
+        await asyncio.sleep(0.01)
+        assert pool.submit(3)
+        assert not pool.submit(4)
+        await pool.close()
+        return settled, pool.stats()
+
+    settled, stats = asyncio.run(scenario())
+    assert sorted(settled) == [(1, None), (2, None), (3, None)]
+    assert stats['rejected'] == 1
+    assert not (stats['pending'] or stats['in_flight'])
+
+
+def test_close_during_write_back_still_settles_the_job():
+    async def scenario():
+        settled = []
+        writing = asyncio.Event()
+
+        async def generate(job):
+            return 'LLM narrative'
+
+        async def apply(job, narrative):
+            if narrative is not None:
+                writing.set()
+                await asyncio.sleep(10)
+            settled.append((job, narrative))
+
+        pool = NarrativeWorkerPool(generate, apply, workers=1, timeout=30)
+        pool.start()
+        assert pool.submit(1)
+        await writing.wait()
+        await pool.close()
+        return settled, pool.stats()
+
+    settled, stats = asyncio.run(scenario())
+    assert settled == [(1, None)]
+    assert not stats['in_flight']
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import Priority, QuotaExhaustedError, TokenBucketLimiter
+
+
+def test_interactive_requests_jump_the_bulk_queue():
+    limiter = TokenBucketLimiter('abuseipdb', rate_per_second=20, burst=1)
+    order = []
+
+    async def request(label, priority):
+        await limiter.acquire(priority, max_wait=5)
+        order.append(label)
+
+    async def scenario():
+        await limiter.acquire()  # drain the single burst token
+        bulk = [asyncio.create_task(request(f'bulk-{i}', Priority.BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request('interactive', Priority.INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+
+    asyncio.run(scenario())
+    assert order[0] == 'interactive'
+    assert limiter.state()['granted'] == 5
+
+
+def test_quota_headers_pause_bulk_but_not_interactive():
+    limiter = TokenBucketLimiter('abuseipdb', rate_per_second=100, burst=10, interactive_reserve=5)
+    limiter.observe(200, {
+        'X-RateLimit-Limit': '1000',
+        'X-RateLimit-Remaining': '4',
+        'X-RateLimit-Reset': str(time.time() + 3600),
+    })
+
+    state = limiter.state()
+    assert state['quota_remaining'] == 4
+    assert state['bulk_paused'] is True
+
+    with pytest.raises(QuotaExhaustedError):
+        asyncio.run(limiter.acquire(Priority.BULK, max_wait=1))
+    asyncio.run(limiter.acquire(Priority.INTERACTIVE, max_wait=1))
+    assert limiter.state()['quota_remaining'] == 3
+
+
+def test_retry_after_blocks_all_requests():
+    limiter = TokenBucketLimiter('abuseipdb', rate_per_second=100, burst=10)
+    assert limiter.observe(429, {'Retry-After': '120'}) == 120
+    assert limiter.state()['throttled'] == 1
+
+    with pytest.raises(QuotaExhaustedError) as exc_info:
+        asyncio.run(limiter.acquire(Priority.INTERACTIVE, max_wait=1))
+    assert exc_info.value.retry_after > 100
+
+
+def test_configured_quota_holds_the_interactive_reserve_before_any_response():
+    limiter = TokenBucketLimiter('abuseipdb', rate_per_second=100, burst=10, quota_limit=3, interactive_reserve=2)
+    assert limiter.state()['quota_remaining'] == 3
+
+    asyncio.run(limiter.acquire(Priority.BULK, max_wait=1))
+    assert limiter.state()['bulk_paused'] is True
+    with pytest.raises(QuotaExhaustedError):
+        asyncio.run(limiter.acquire(Priority.BULK, max_wait=1))
+    asyncio.run(limiter.acquire(Priority.INTERACTIVE, max_wait=1))
+    assert limiter.state()['quota_remaining'] == 1
+
+
+def test_configured_quota_refills_at_the_default_reset():
+    now = [1000.0]
+    limiter = TokenBucketLimiter('abuseipdb', rate_per_second=100, burst=10, quota_limit=1,
+                                 default_reset=lambda t: t + 60, clock=lambda: now[0])
+    asyncio.run(limiter.acquire(Priority.INTERACTIVE, max_wait=0))
+    assert limiter.state()['quota_remaining'] == 0
+
+    now[0] += 61
+    assert limiter.state()['quota_remaining'] == 1
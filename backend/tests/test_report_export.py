@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from app.repository.report_repository import ReportRepository, resolve_report_fields
+from app.services.report_export import stream_reports
+
+
+def _seed(repo, count):
+    now = datetime.now(timezone.utc)
+    for idx in range(count):
+        repo.save_analysis(
+            ip_address=f'10.0.0.{idx}',
+            threat_score=idx * 10,
+            risk_level='HIGH' if idx % 2 else 'LOW',
+            abuse_confidence=idx,
+            total_reports=idx,
+            categories=['scanner', 'botnet'] if idx % 2 else ['spam'],
+            triggered_rules=['Rule A'],
+            narrative='Line one, "quoted"\nline two',
+            country='US',
+            asn='ASN',
+            raw_data={'abuseipdb': {'score': idx}},
+            analyzed_at=now - timedelta(minutes=count - idx),
+        )
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_export_streams_every_page_as_ndjson():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        _seed(repo, 7)
+        columns = resolve_report_fields(None)
+        calls = []
+
+        def fetch_page(cursor):
+            calls.append(cursor)
+            return repo.list_reports(limit=3, cursor=cursor, risk_level='HIGH', fields=columns)
+
+        chunks = asyncio.run(_collect(stream_reports(fetch_page, 'ndjson', columns)))
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        assert [row['ip_address'] for row in rows] == ['10.0.0.5', '10.0.0.3', '10.0.0.1']
+        assert rows[0]['categories'] == ['scanner', 'botnet']
+        assert 'raw_data' not in rows[0]
+        assert len(calls) == 1
+        repo.close()
+
+
+def test_export_gzip_csv_with_projection():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_days=0, retention_limit=0)
+        _seed(repo, 5)
+        columns = resolve_report_fields(['ip_address', 'categories', 'narrative'])
+        assert columns == ['id', 'ip_address', 'analyzed_at', 'categories', 'narrative']
+
+        def fetch_page(cursor):
+            return repo.list_reports(limit=2, cursor=cursor, fields=columns)
+
+        chunks = asyncio.run(_collect(stream_reports(fetch_page, 'csv', columns, gzip_output=True)))
+        # Header, three pages and the gzip trailer; every chunk is independently flushed
+        assert len(chunks) == 5
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b''.join(chunks)).decode())))
+        assert rows[0] == columns
+        assert len(rows) == 6
+        assert rows[1][1] == '10.0.0.4'
+        assert rows[2][3] == 'scanner;botnet'
+        assert rows[1][4] == 'Line one, "quoted"\nline two'
+        repo.close()
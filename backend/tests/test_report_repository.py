@@ -1,5 +1,6 @@
 import json
 import os
+import sqlite3
 import tempfile
 from datetime import datetime, timedelta, timezone
 
@@ -28,6 +29,7 @@ def test_save_and_fetch_recent_reports():
             country='US',
             asn='Example ASN',
             raw_data={'abuseipdb': {'score': 95}},
+            ruleset_version='1.0.0+abcd1234',
         )
 
         records = repo.get_recent(limit=10)
@@ -38,7 +40,10 @@ def test_save_and_fetch_recent_reports():
         assert record['risk_level'] == 'CRITICAL'
         assert record['is_new'] is True
         assert record['occurrence_count'] == 1
-        assert record['raw_data']['abuseipdb']['score'] == 95
+        assert 'raw_data' not in record
+        assert record['ruleset_version'] == '1.0.0+abcd1234'
+        assert repo.get_report(record['id'])['raw_data']['abuseipdb']['score'] == 95
+        assert repo.get_report(record['id'] + 1) is None
     finally:
         tmp_dir.cleanup()
 
@@ -61,8 +66,12 @@ def test_retention_limit_applies():
                 raw_data={'index': idx},
                 analyzed_at=datetime.now(timezone.utc) - timedelta(minutes=idx),
             )
+        assert len(repo.get_recent(limit=20)) == 10
+        result = repo.compact(chunk_size=2)
+        assert result['reports_purged'] == 5
+        assert result['chunks'] == 3
         records = repo.get_recent(limit=20)
-        assert len(records) == 5
+        assert [r['ip_address'] for r in records] == [f'4.4.4.{idx}' for idx in range(5)]
     finally:
         tmp_dir.cleanup()
 
@@ -108,3 +117,228 @@ def test_stats_generation():
         assert isinstance(stats['report_volume'], list)
     finally:
         tmp_dir.cleanup()
+
+
+def test_repeat_sightings_and_top_risks_use_ip_summary(save_report):
+    repo, tmp_dir = create_repo()
+    try:
+        now = datetime.now(timezone.utc)
+        save_report(repo, '1.1.1.1', threat_score=40, analyzed_at=now - timedelta(minutes=30))
+        save_report(repo, '1.1.1.1', threat_score=90, analyzed_at=now - timedelta(minutes=20))
+        save_report(repo, '1.1.1.1', threat_score=10, analyzed_at=now - timedelta(minutes=10))
+        save_report(repo, '2.2.2.2', threat_score=60, analyzed_at=now)
+
+        records = repo.get_recent(limit=10)
+        assert [r['ip_address'] for r in records] == ['2.2.2.2', '1.1.1.1', '1.1.1.1', '1.1.1.1']
+        assert records[0]['is_new'] is True
+        assert all(r['occurrence_count'] == 3 and r['is_new'] is False for r in records[1:])
+
+        stats = repo.get_stats(hours=24)
+        assert [(r['ip_address'], r['threat_score']) for r in stats['top_risks']] == [('1.1.1.1', 90), ('2.2.2.2', 60)]
+        assert stats['top_risks'][0]['risk_level'] == 'CRITICAL'
+        assert stats['top_risks'][0]['occurrence_count'] == 3
+        assert stats['metrics']['total_reports'] == 4
+        assert stats['metrics']['unique_ips'] == 2
+        assert stats['category_counts'] == {'scanner': 4}
+        assert sum(bucket['count'] for bucket in stats['report_volume']) == 4
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_retention_keeps_ip_summary_in_step(save_report):
+    repo, tmp_dir = create_repo(retention_limit=2)
+    try:
+        now = datetime.now(timezone.utc)
+        save_report(repo, '1.1.1.1', threat_score=95, analyzed_at=now - timedelta(minutes=3))
+        save_report(repo, '1.1.1.1', threat_score=30, analyzed_at=now - timedelta(minutes=2))
+        save_report(repo, '3.3.3.3', threat_score=50, analyzed_at=now - timedelta(minutes=1))
+        repo.compact()
+
+        stats = repo.get_stats(hours=24)
+        assert stats['metrics'] == {
+            'total_reports': 2,
+            'unique_ips': 2,
+            'last_analysis_at': (now - timedelta(minutes=1)).isoformat(),
+        }
+        assert [(r['ip_address'], r['threat_score']) for r in stats['top_risks']] == [('3.3.3.3', 50), ('1.1.1.1', 30)]
+        record = next(r for r in repo.get_recent(limit=10) if r['ip_address'] == '1.1.1.1')
+        assert record['occurrence_count'] == 1
+        assert record['is_new'] is True
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_legacy_database_is_migrated():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = os.path.join(tmp_dir.name, 'reports.db')
+        now = datetime.now(timezone.utc)
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, ip_address TEXT NOT NULL, analyzed_at TEXT NOT NULL,
+                    threat_score INTEGER NOT NULL, risk_level TEXT NOT NULL, abuse_confidence REAL NOT NULL,
+                    total_reports INTEGER, categories TEXT NOT NULL, triggered_rules TEXT NOT NULL, narrative TEXT,
+                    country TEXT, asn TEXT, raw_data TEXT NOT NULL
+                )
+                """
+            )
+            for minutes, ip in ((5, '5.5.5.5'), (3, '5.5.5.5'), (1, '6.6.6.6')):
+                conn.execute(
+                    "INSERT INTO reports (ip_address, analyzed_at, threat_score, risk_level, abuse_confidence,"
+                    " total_reports, categories, triggered_rules, narrative, country, asn, raw_data)"
+                    " VALUES (?, ?, 70, 'HIGH', 70, 1, '[\"malware\"]', '[]', '', 'US', 'ASN', ?)",
+                    (ip, (now - timedelta(minutes=minutes)).isoformat(), json.dumps({'geolocation': {'ip': ip}})),
+                )
+
+        repo = ReportRepository(db_path=path)
+        records = repo.get_recent(limit=10)
+        assert [r['ip_address'] for r in records] == ['6.6.6.6', '5.5.5.5', '5.5.5.5']
+        assert [r['occurrence_count'] for r in records] == [1, 2, 2]
+        assert records[0]['ruleset_version'] is None
+        stats = repo.get_stats()
+        assert stats['metrics']['unique_ips'] == 2
+        assert stats['risk_counts'] == {'HIGH': 3}
+        assert stats['category_counts'] == {'malware': 3}
+        assert repo.get_report(records[0]['id'])['raw_data'] == {'geolocation': {'ip': '6.6.6.6'}}
+        with sqlite3.connect(path) as conn:
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(reports)')}
+            assert 'raw_data' not in columns
+            assert conn.execute('SELECT COUNT(*), SUM(refs) FROM raw_blobs').fetchone() == (2, 3)
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_stats_rollups_outlive_report_retention(save_report):
+    repo, tmp_dir = create_repo(retention_limit=1, retention_days=0)
+    try:
+        now = datetime.now(timezone.utc)
+        save_report(repo, '7.7.7.7', threat_score=80, analyzed_at=now - timedelta(days=20))
+        save_report(repo, '7.7.7.8', threat_score=20, analyzed_at=now - timedelta(days=3))
+        save_report(repo, '7.7.7.9', threat_score=90, analyzed_at=now)
+        repo.compact()
+
+        assert len(repo.get_recent(limit=10)) == 1
+        assert repo.get_stats(hours=24)['risk_counts'] == {'CRITICAL': 1}
+
+        month = repo.get_stats(hours=24 * 30)
+        assert month['risk_counts'] == {'LOW': 1, 'CRITICAL': 2}
+        assert month['category_counts'] == {'scanner': 3}
+        buckets = [datetime.fromisoformat(bucket['bucket']) for bucket in month['report_volume']]
+        assert len(buckets) == 3
+        assert all(bucket.hour == 0 for bucket in buckets)
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_compact_applies_age_and_count_together(save_report):
+    repo, tmp_dir = create_repo(retention_limit=3, retention_days=1)
+    try:
+        now = datetime.now(timezone.utc)
+        save_report(repo, '5.5.5.1', threat_score=10, analyzed_at=now - timedelta(days=3))
+        save_report(repo, '5.5.5.2', threat_score=10, analyzed_at=now - timedelta(days=2))
+        for minutes in range(4):
+            save_report(repo, '5.5.5.3', threat_score=10, analyzed_at=now - timedelta(minutes=minutes))
+
+        stopped = repo.compact(chunk_size=1, should_stop=lambda: True)
+        assert stopped['reports_purged'] == 0
+
+        result = repo.compact(chunk_size=10)
+        assert result['reports_purged'] == 3
+        assert result['pages_freed'] >= 0
+        assert [r['occurrence_count'] for r in repo.get_recent(limit=10)] == [3, 3, 3]
+        assert repo.compact()['reports_purged'] == 0
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_raw_payloads_are_deduplicated_and_released_by_compaction():
+    repo, tmp_dir = create_repo(retention_limit=2, retention_days=0)
+    try:
+        now = datetime.now(timezone.utc)
+        verbose = {'data': {'reports': [{'comment': 'ssh brute force ' * 20}] * 50}}
+        for minutes, score in ((3, 10), (2, 20), (1, 30)):
+            repo.save_analysis(
+                ip_address='8.8.4.4',
+                threat_score=score,
+                risk_level='LOW',
+                abuse_confidence=score,
+                total_reports=50,
+                categories=[],
+                triggered_rules=[],
+                narrative='',
+                country='US',
+                asn='ASN',
+                raw_data={'abuseipdb': {'raw': verbose, 'score': score}, 'geolocation': {'country': 'US'}},
+                analyzed_at=now - timedelta(minutes=minutes),
+            )
+
+        def blobs():
+            with repo.pool.reader() as conn:
+                return conn.execute('SELECT COUNT(*), SUM(refs), SUM(LENGTH(data)), SUM(raw_size) FROM raw_blobs').fetchone()
+
+        count, refs, stored, raw = blobs()
+        assert (count, refs) == (4, 6)
+        assert stored * 10 < raw
+
+        repo.compact()
+        assert tuple(blobs())[:2] == (3, 4)
+        newest = repo.get_recent(limit=1)[0]
+        assert repo.get_report(newest['id'])['raw_data']['abuseipdb']['score'] == 30
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_list_reports_pages_filters_and_projects():
+    repo, tmp_dir = create_repo(retention_limit=0, retention_days=0)
+    try:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for idx in range(7):
+            repo.save_analysis(
+                ip_address='9.9.9.9' if idx % 2 else '9.9.9.8',
+                threat_score=80 if idx < 4 else 20,
+                risk_level='HIGH' if idx < 4 else 'LOW',
+                abuse_confidence=50,
+                total_reports=idx,
+                categories=['scanner'] if idx % 3 == 0 else ['malware'],
+                triggered_rules=[],
+                narrative='Long narrative',
+                country='US',
+                asn='ASN',
+                raw_data={},
+                # Two reports share each timestamp, so paging has to break ties on id
+                analyzed_at=now - timedelta(minutes=10 - idx // 2),
+            )
+
+        seen, cursor = [], None
+        while True:
+            page = repo.list_reports(limit=3, cursor=cursor)
+            seen.extend(record['total_reports'] for record in page['reports'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == [6, 5, 4, 3, 2, 1, 0]
+
+        first = repo.list_reports(limit=1, ip_address='9.9.9.9', risk_level='HIGH')
+        assert [r['total_reports'] for r in first['reports']] == [3]
+        second = repo.list_reports(limit=1, ip_address='9.9.9.9', risk_level='HIGH', cursor=first['next_cursor'])
+        assert [r['total_reports'] for r in second['reports']] == [1]
+        assert second['next_cursor'] is None
+
+        scanners = repo.list_reports(category='scanner', since=now - timedelta(minutes=9), until=now - timedelta(minutes=7))
+        assert [r['total_reports'] for r in scanners['reports']] == [3]
+
+        projected = repo.list_reports(limit=1, fields=['ip_address', 'is_new'])['reports'][0]
+        assert set(projected) == {'id', 'analyzed_at', 'ip_address', 'is_new'}
+        assert projected['is_new'] is False
+
+        for bad in ({'cursor': 'not-a-cursor'}, {'fields': ['raw_data']}):
+            try:
+                repo.list_reports(**bad)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f'{bad} should be rejected')
+    finally:
+        tmp_dir.cleanup()
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.response_cache import ResponseCache
+
+
+def test_entries_expire_with_the_generation_and_by_lru():
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 1, b'A')
+    cache.put('b', 1, b'B')
+    assert cache.get('a', 1) == b'A'
+    cache.put('c', 1, b'C')
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 2) is None
+    assert cache.get('c', 1) == b'C'
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['invalidated'] == 1
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 1
+
+    disabled = ResponseCache(max_entries=0)
+    disabled.put('a', 1, b'A')
+    assert disabled.get('a', 1) is None
+
+
+def test_recent_and_stats_are_served_from_cache_until_a_write(monkeypatch, save_report):
+    client = TestClient(main.app)
+    cache = ResponseCache()
+    monkeypatch.setattr(main, 'response_cache', cache)
+    save_report(main.report_repository, '4.4.4.4')
+    first = client.get('/api/v1/reports/recent', params={'limit': 5, 'fields': 'ip_address'})
+    second = client.get('/api/v1/reports/recent', params={'limit': 5, 'fields': 'ip_address'})
+    assert first.content == second.content
+    assert second.headers['content-type'] == 'application/json'
+    newest = first.json()['reports'][0]
+    assert set(newest) == {'id', 'ip_address', 'analyzed_at'}
+    assert newest['ip_address'] == '4.4.4.4'
+    client.get('/api/v1/reports/stats', params={'hours': 24})
+    client.get('/api/v1/reports/stats', params={'hours': 24})
+    assert cache.stats()['hits'] == 2
+
+    save_report(main.report_repository, '5.5.5.5')
+    third = client.get('/api/v1/reports/recent', params={'limit': 5, 'fields': 'ip_address'})
+    assert third.json()['reports'][0]['ip_address'] == '5.5.5.5'
+
+    # Retention runs invalidate too
+    save_report(main.report_repository, '6.6.6.6', analyzed_at=datetime.now(timezone.utc) - timedelta(days=3650))
+    client.get('/api/v1/reports/stats', params={'hours': 24})
+    invalidated = cache.stats()['invalidated']
+    assert main.report_repository.compact()['reports_purged'] >= 1
+    client.get('/api/v1/reports/stats', params={'hours': 24})
+    assert cache.stats()['invalidated'] == invalidated + 1
+
+    assert client.get('/api/v1/reports/recent', params={'cursor': 'not-a-cursor'}).status_code == 400
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['hit_avg_ms'] is not None
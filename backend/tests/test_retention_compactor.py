@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+from app.services.compactor import RetentionCompactor
+
+
+def test_compactor_runs_immediately_and_stops_between_chunks():
+    calls = []
+    release = threading.Event()
+
+    def compact(should_stop):
+        calls.append(should_stop())
+        release.wait(5)
+        return {'reports_purged': 4, 'chunks': 1, 'seconds': 0.01, 'stopping': should_stop()}
+
+    async def scenario():
+        compactor = RetentionCompactor(compact, interval=60)
+        compactor.start()
+        await asyncio.sleep(0.05)
+        closing = asyncio.create_task(compactor.close())
+        await asyncio.sleep(0.05)
+        release.set()
+        await closing
+        return compactor.stats()
+
+    stats = asyncio.run(scenario())
+    assert calls == [False]
+    assert stats['runs'] == 1
+    assert stats['reports_purged'] == 4
+    assert stats['last_run']['stopping'] is True
+
+
+def test_compactor_survives_failures():
+    attempts = []
+
+    def compact(should_stop):
+        attempts.append(1)
+        raise OSError('database is locked')
+
+    async def scenario():
+        compactor = RetentionCompactor(compact, interval=0.01)
+        compactor.start()
+        await asyncio.sleep(0.1)
+        await compactor.close()
+        return compactor.stats()
+
+    stats = asyncio.run(scenario())
+    assert len(attempts) >= 2
+    assert stats['failures'] == len(attempts)
+    assert stats['runs'] == 0
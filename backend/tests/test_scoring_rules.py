@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import tempfile
+
+import pytest
+
+from app.config import SCORING_RULES_PATH
+from app.models import NormalizedThreatReport
+from app.services.rules import CompiledRuleSet, RuleSetError
+from app.services.scorer import ThreatScoringEngine
+
+# The hard-coded rules the declarative default rule file replaced
+LEGACY_RULES = [
+    ("AbuseIPDB High Abuse Confidence", lambda r: r.abuse_confidence >= 85, 35),
+    ("AbuseIPDB Moderate Abuse Confidence", lambda r: 75 <= r.abuse_confidence < 85, 22),
+    ("AbuseIPDB Elevated Abuse Confidence", lambda r: 60 <= r.abuse_confidence < 75, 12),
+    ("AbuseIPDB High Report Count", lambda r: r.total_reports >= 15, 25),
+    ("AbuseIPDB Moderate Report Count", lambda r: 10 <= r.total_reports < 15, 15),
+    ("AbuseIPDB Multiple Reports", lambda r: 5 <= r.total_reports < 10, 8),
+    ("High Malicious Sources", lambda r: r.malicious_sources >= 5, 30),
+    ("Moderate Malicious Sources", lambda r: 2 <= r.malicious_sources < 5, 18),
+    ("Suspicious Sources Detected", lambda r: r.suspicious_sources >= 3, 12),
+    ("Category Malware", lambda r: "malware" in r.threat_categories, 35),
+    ("Category Botnet/C2", lambda r: "botnet" in r.threat_categories or "c2" in r.threat_categories, 30),
+    ("Category Phishing", lambda r: "phishing" in r.threat_categories, 25),
+    ("High-Risk Geography", lambda r: r.country_code in {"KP", "IR", "SY", "CU"}, 15),
+    ("Local Blocklist Match", lambda r: len(r.feed_matches) >= 1, 25),
+    ("Multiple Local Blocklist Matches", lambda r: len(r.feed_matches) >= 2, 10),
+]
+
+
+def legacy_score(report):
+    triggered = [name for name, cond, _ in LEGACY_RULES if cond(report)]
+    score = sum(pts for name, _, pts in LEGACY_RULES if name in triggered)
+    return max(0, min(100, score)), triggered
+
+
+def write_rules(path, rules, version='test'):
+    with open(path, 'w') as handle:
+        json.dump({'version': version, 'rules': rules}, handle)
+
+
+def test_default_rule_file_matches_legacy_rules():
+    rng = random.Random(3)
+    ruleset = CompiledRuleSet.from_file(SCORING_RULES_PATH)
+    for _ in range(3000):
+        report = NormalizedThreatReport(
+            ip_address='192.0.2.1',
+            abuse_confidence=rng.choice([0, 59.9, 60, 74.99, 75, 84, 85, 100, rng.uniform(0, 100)]),
+            total_reports=rng.randint(0, 30),
+            malicious_sources=rng.randint(0, 6),
+            suspicious_sources=rng.randint(0, 5),
+            threat_categories=rng.sample(['malware', 'botnet', 'c2', 'phishing', 'spam'], rng.randint(0, 3)),
+            country_code=rng.choice(['US', 'KP', 'IR', 'SY', 'CU', 'DE']),
+            feed_matches=['feed'] * rng.randint(0, 2),
+        )
+        assert ruleset.evaluate(report) == legacy_score(report)
+
+
+def test_invalid_rules_are_rejected():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = os.path.join(tmp_dir.name, 'rules.json')
+        write_rules(path, [{'name': 'Bad', 'field': 'no_such_field', 'op': '>=', 'value': 1, 'points': 5}])
+        with pytest.raises(RuleSetError):
+            CompiledRuleSet.from_file(path)
+        write_rules(path, [{'name': 'Bad', 'field': 'country_code', 'op': 'in', 'value': '@missing', 'points': 5}])
+        with pytest.raises(RuleSetError):
+            CompiledRuleSet.from_file(path)
+        # Non-finite thresholds would compile to the unresolvable name "inf"/"nan"
+        for value in (1e999, '1e999', 'nan', [0, float('inf')], 'lots'):
+            op = 'between' if isinstance(value, list) else '>='
+            write_rules(path, [{'name': 'Bad', 'field': 'total_reports', 'op': op, 'value': value, 'points': 5}])
+            with pytest.raises(RuleSetError):
+                CompiledRuleSet.from_file(path)
+    finally:
+        tmp_dir.cleanup()
+
+
+def test_engine_hot_reloads_and_keeps_last_good_rules():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = os.path.join(tmp_dir.name, 'rules.json')
+        write_rules(path, [{'name': 'Any Reports', 'field': 'total_reports', 'op': '>=', 'value': 1, 'points': 40}], 'v1')
+        engine = ThreatScoringEngine(rules_path=path, reload_interval=0)
+        report = NormalizedThreatReport(ip_address='192.0.2.1', total_reports=3, country_code='IR')
+
+        assert engine.score_versioned(report)[:2] == (40, ['Any Reports'])
+        first_version = engine.version
+        assert first_version.startswith('v1+')
+
+        write_rules(path, [{'name': 'Risky Country', 'field': 'country_code', 'op': 'in', 'value': '@high_risk_countries', 'points': 15}], 'v2')
+        engine.reload()
+        score, triggered, version = engine.score_versioned(report)
+        assert (score, triggered) == (15, ['Risky Country'])
+        assert version.startswith('v2+')
+
+        with open(path, 'w') as handle:
+            handle.write('{not json')
+        with pytest.raises(ValueError):
+            engine.reload()
+        assert engine.version == version
+        assert engine.reload_error
+    finally:
+        tmp_dir.cleanup()
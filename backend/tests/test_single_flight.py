@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.services.rate_limiter import Priority
+from app.services.utils import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return {'key': key}
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flights.do('1.2.3.4', work, '1.2.3.4') for _ in range(20)),
+            flights.do('5.6.7.8', work, '5.6.7.8'),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert sorted(runs) == ['1.2.3.4', '5.6.7.8']
+    assert all(result is results[0] for result in results[:20])
+    assert flights.stats() == {'calls': 21, 'coalesced': 19, 'in_flight': 0}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flights = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise RuntimeError('upstream down')
+
+    async def scenario():
+        return await asyncio.gather(
+            flights.do('ip', failing), flights.do('ip', failing), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(flights.do('ip', failing))
+    assert len(attempts) == 2
+
+
+def test_interactive_analysis_never_waits_on_a_bulk_run(monkeypatch):
+    runs = []
+
+    async def fake_pipeline(ip, priority):
+        runs.append((ip, priority))
+        await asyncio.sleep(0.05 if priority == Priority.BULK else 0.01)
+        return priority
+
+    monkeypatch.setattr(main, '_run_pipeline', fake_pipeline)
+    monkeypatch.setattr(main, 'analysis_flights', SingleFlight())
+
+    async def scenario():
+        bulk = asyncio.create_task(main._analyze_and_persist('198.51.100.1', Priority.BULK))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(main._analyze_and_persist('198.51.100.1'))
+        await asyncio.sleep(0)
+        # A bulk caller arriving now rides the interactive run instead of the slower bulk one
+        late_bulk = asyncio.create_task(main._analyze_and_persist('198.51.100.1', Priority.BULK))
+        return await asyncio.gather(bulk, interactive, late_bulk)
+
+    assert asyncio.run(scenario()) == [Priority.BULK, Priority.INTERACTIVE, Priority.INTERACTIVE]
+    assert runs == [('198.51.100.1', Priority.BULK), ('198.51.100.1', Priority.INTERACTIVE)]
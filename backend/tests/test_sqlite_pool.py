@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from app.repository.report_repository import ReportRepository
+from app.repository.sqlite_pool import SQLitePool
+
+
+def test_readers_are_not_blocked_by_open_write():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = SQLitePool(os.path.join(tmp_dir, 'pool.db'), size=2)
+        with pool.writer() as conn:
+            conn.execute('CREATE TABLE items (value INTEGER)')
+            conn.execute('INSERT INTO items VALUES (1)')
+
+        writing = threading.Event()
+        release = threading.Event()
+
+        def slow_write():
+            with pool.writer() as conn:
+                conn.execute('INSERT INTO items VALUES (2)')
+                writing.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=slow_write)
+        writer.start()
+        try:
+            assert writing.wait(5)
+            with pool.reader() as conn:
+                assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 1
+        finally:
+            release.set()
+            writer.join()
+
+        with pool.reader() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 2
+        pool.close()
+
+
+def test_writer_rolls_back_on_error_and_connections_are_reused():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = SQLitePool(os.path.join(tmp_dir, 'pool.db'), size=1)
+        with pool.writer() as conn:
+            conn.execute('CREATE TABLE items (value INTEGER)')
+        try:
+            with pool.writer() as conn:
+                conn.execute('INSERT INTO items VALUES (1)')
+                raise RuntimeError('boom')
+        except RuntimeError:
+            pass
+
+        for _ in range(5):
+            with pool.reader() as conn:
+                assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+        assert pool.stats()['connections'] == 2
+        pool.close()
+
+
+def test_concurrent_saves_and_reads():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'), retention_limit=0, pool_size=4)
+
+        def save(idx):
+            repo.save_analysis(
+                ip_address=f'10.0.0.{idx % 20}',
+                threat_score=idx % 100,
+                risk_level='MEDIUM',
+                abuse_confidence=10,
+                total_reports=1,
+                categories=['scanner'],
+                triggered_rules=[],
+                narrative='',
+                country='US',
+                asn='ASN',
+                raw_data={'idx': idx},
+                analyzed_at=datetime.now(timezone.utc),
+            )
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            saves = [executor.submit(save, idx) for idx in range(200)]
+            reads = [executor.submit(repo.get_recent, 20) for _ in range(100)]
+            for future in saves + reads:
+                future.result()
+
+        stats = repo.get_stats()
+        assert stats['metrics']['total_reports'] == 200
+        assert stats['metrics']['unique_ips'] == 20
+        assert repo.pool.stats()['connections'] <= 5
+        repo.close()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from app.services.cache import ThreatIntelCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_source_ttl_expires_entries():
+    clock = FakeClock()
+    cache = ThreatIntelCache(ttls={'abuseipdb': 60, 'geolocation': 3600}, clock=clock)
+    cache.set('abuseipdb', '1.2.3.4', {'abuse_confidence_score': 90})
+    cache.set('geolocation', '1.2.3.4', {'country': 'US'})
+
+    clock.now += 30
+    entry = cache.get('abuseipdb', '1.2.3.4')
+    assert entry.value['abuse_confidence_score'] == 90
+    assert entry.age(clock.now) == 30
+
+    clock.now += 60
+    assert cache.get('abuseipdb', '1.2.3.4') is None
+    assert cache.get('geolocation', '1.2.3.4').value['country'] == 'US'
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['expired'] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ThreatIntelCache(ttls={'abuseipdb': 60}, max_entries=2)
+    cache.set('abuseipdb', 'a', {'v': 1})
+    cache.set('abuseipdb', 'b', {'v': 2})
+    cache.get('abuseipdb', 'a')
+    cache.set('abuseipdb', 'c', {'v': 3})
+
+    assert cache.get('abuseipdb', 'b') is None
+    assert cache.get('abuseipdb', 'a') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_persistent_tier_survives_restart():
+    tmp_dir = tempfile.TemporaryDirectory()
+    try:
+        path = os.path.join(tmp_dir.name, 'cache.db')
+        clock = FakeClock()
+        first = ThreatIntelCache(ttls={'geolocation': 3600}, db_path=path, clock=clock)
+        first.set('geolocation', '8.8.8.8', {'country': 'United States'})
+
+        clock.now += 10
+        second = ThreatIntelCache(ttls={'geolocation': 3600}, db_path=path, clock=clock)
+        entry = second.get('geolocation', '8.8.8.8')
+        assert entry.tier == 'persistent'
+        assert entry.value['country'] == 'United States'
+        assert second.get('geolocation', '8.8.8.8').tier == 'memory'
+    finally:
+        tmp_dir.cleanup()
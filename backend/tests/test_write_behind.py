@@ -0,0 +1,128 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from app.repository.report_repository import ReportRepository
+from app.services.write_behind import WriteBehindQueue
+
+
+def test_batches_by_size_and_by_interval():
+    batches = []
+
+    async def scenario():
+        queue = WriteBehindQueue(lambda batch: batches.append(list(batch)), batch_size=3, flush_interval=0.05)
+        for idx in range(7):
+            await queue.submit(idx)
+        await asyncio.sleep(0.2)
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        await queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert sum(batches, []) == list(range(7))
+    assert stats['written'] == 7
+    assert stats['batches'] == 3
+
+
+def test_backpressure_and_drain_on_close():
+    gate = threading.Event()
+    written = []
+
+    def slow_flush(batch):
+        gate.wait(5)
+        written.extend(batch)
+
+    async def scenario():
+        queue = WriteBehindQueue(slow_flush, batch_size=2, flush_interval=0.01, max_pending=2)
+        for idx in range(4):
+            await queue.submit(idx)
+        await asyncio.sleep(0.05)
+        blocked = asyncio.create_task(queue.submit(4))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        gate.set()
+        await blocked
+        await queue.submit(5)
+        await queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert written == [0, 1, 2, 3, 4, 5]
+    assert stats['backpressure_waits'] >= 1
+    assert stats['pending'] == 0
+
+
+def test_failed_batches_are_counted_and_do_not_stop_the_writer():
+    calls = []
+
+    def flaky(batch):
+        calls.append(list(batch))
+        if batch[0] == 'bad':
+            raise OSError('disk full')
+
+    async def scenario():
+        queue = WriteBehindQueue(flaky, batch_size=1, flush_interval=0.01)
+        await queue.submit('bad')
+        await queue.submit('good')
+        await queue.close()
+        return queue.stats()
+
+    started = time.perf_counter()
+    stats = asyncio.run(scenario())
+    assert time.perf_counter() - started < 10
+    assert calls.count(['bad']) == 4
+    assert calls[-1] == ['good']
+    assert stats['dropped'] == 1
+    assert stats['written'] == 1
+
+
+def test_one_poison_item_does_not_drop_the_rest_of_its_batch():
+    written = []
+
+    def all_or_nothing(batch):
+        if 'poison' in batch:
+            raise ValueError('constraint failed')
+        written.extend(batch)
+
+    async def scenario():
+        queue = WriteBehindQueue(all_or_nothing, batch_size=8, flush_interval=0.01)
+        for item in [0, 1, 2, 3, 4, 'poison', 6, 7]:
+            await queue.submit(item)
+        await queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+    assert written == [0, 1, 2, 3, 4, 6, 7]
+    assert (stats['written'], stats['dropped'], stats['failed_batches']) == (7, 1, 1)
+
+
+def test_flush_persists_batch_through_repository():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repo = ReportRepository(db_path=os.path.join(tmp_dir, 'reports.db'))
+
+        async def scenario():
+            queue = WriteBehindQueue(repo.save_many, batch_size=50, flush_interval=10)
+            for idx in range(5):
+                await queue.submit(
+                    {
+                        'ip_address': f'10.1.0.{idx}',
+                        'threat_score': 10 * idx,
+                        'risk_level': 'LOW',
+                        'abuse_confidence': 0,
+                        'total_reports': 0,
+                        'categories': [],
+                        'triggered_rules': [],
+                        'narrative': '',
+                        'country': 'US',
+                        'asn': 'ASN',
+                        'raw_data': {},
+                    }
+                )
+            await queue.flush()
+            assert len(repo.get_recent(limit=10)) == 5
+            await queue.close()
+
+        asyncio.run(scenario())
+        repo.close()
@@ -82,7 +82,7 @@ const IPAnalyzer = () => {
                 type="text"
                 value={ipAddress}
                 onChange={(e) => setIpAddress(e.target.value)}
-                placeholder="Enter IPv4 address (e.g., 1.2.3.4)"
+                placeholder="Enter IPv4 or IPv6 address (e.g., 1.2.3.4)"
                 disabled={loading}
                 className="ip-input"
               />
@@ -1,11 +1,14 @@
 import { useEffect, useMemo, useState } from 'react'
-import { fetchRecentReports, fetchReportStats } from '../services/api'
+import { fetchRecentReports, fetchReportStats, subscribeToLiveFeed } from '../services/api'
 import ThreatCard from './ThreatCard'
 import TrendSparkline from './TrendSparkline'
 import './ThreatDashboard.css'
 
-const REFRESH_INTERVAL_MS = 15000
+// Updates arrive over the live feed; this slow poll only catches anything it
+// missed, and is answered with 304 Not Modified when nothing changed
+const REFRESH_INTERVAL_MS = 120000
 const RECENT_LIMIT = 36
+const TOP_RISK_LIMIT = 5
 
 const formatter = new Intl.DateTimeFormat(undefined, {
   dateStyle: 'medium',
@@ -34,6 +37,51 @@ const relativeTime = (value) => {
   return `${days} day${days > 1 ? 's' : ''} ago`
 }
 
+// Fold one live "report" event into the 24 hour stats without refetching them
+const applyReportDelta = (stats, report, delta) => {
+  if (!stats) return stats
+  const riskCounts = { ...stats.risk_counts }
+  riskCounts[delta.risk_level] = (riskCounts[delta.risk_level] ?? 0) + delta.reports
+  const categoryCounts = { ...stats.category_counts }
+  for (const category of delta.categories) {
+    categoryCounts[category] = (categoryCounts[category] ?? 0) + 1
+  }
+  const volume = [...(stats.report_volume || [])]
+  const bucket = volume.findIndex((item) => item.bucket === delta.hour)
+  if (bucket >= 0) {
+    volume[bucket] = { ...volume[bucket], count: volume[bucket].count + delta.reports }
+  } else {
+    volume.push({ bucket: delta.hour, count: delta.reports })
+  }
+  const previous = (stats.top_risks || []).find((item) => item.ip_address === report.ip_address)
+  const strongest = !previous || report.threat_score > previous.threat_score
+  const topRisk = {
+    ...previous,
+    ip_address: report.ip_address,
+    threat_score: strongest ? report.threat_score : previous.threat_score,
+    risk_level: strongest ? report.risk_level : previous.risk_level,
+    abuse_confidence: strongest ? report.abuse_confidence : previous.abuse_confidence,
+    last_seen: report.analyzed_at,
+    occurrence_count: report.occurrence_count,
+  }
+  const topRisks = [topRisk, ...(stats.top_risks || []).filter((item) => item.ip_address !== report.ip_address)]
+    .sort((a, b) => b.threat_score - a.threat_score || new Date(b.last_seen) - new Date(a.last_seen))
+    .slice(0, TOP_RISK_LIMIT)
+  return {
+    ...stats,
+    risk_counts: riskCounts,
+    category_counts: categoryCounts,
+    report_volume: volume,
+    top_risks: topRisks,
+    metrics: {
+      ...stats.metrics,
+      total_reports: (stats.metrics?.total_reports ?? 0) + delta.reports,
+      unique_ips: (stats.metrics?.unique_ips ?? 0) + delta.unique_ips,
+      last_analysis_at: report.analyzed_at,
+    },
+  }
+}
+
 const riskPalette = {
   LOW: '#10b981',
   MEDIUM: '#f59e0b',
@@ -72,8 +120,24 @@ function ThreatDashboard() {
 
   useEffect(() => {
     loadData()
-    const interval = setInterval(() => loadData(false), REFRESH_INTERVAL_MS)
-    return () => clearInterval(interval)
+    const reload = () => loadData(false)
+    const closeFeed = subscribeToLiveFeed({
+      report: ({ report, delta }) => {
+        setReports((current) => [report, ...current.filter((item) => item.id !== report.id)].slice(0, RECENT_LIMIT))
+        setStats((current) => applyReportDelta(current, report, delta))
+      },
+      narrative: (update) => {
+        setReports((current) => current.map((item) => (item.id === update.id ? { ...item, ...update } : item)))
+      },
+      purge: reload,
+      resync: reload,
+      reconnect: reload,
+    })
+    const interval = setInterval(reload, REFRESH_INTERVAL_MS)
+    return () => {
+      closeFeed()
+      clearInterval(interval)
+    }
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [])
 
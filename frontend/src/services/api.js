@@ -75,5 +75,27 @@ export const fetchReportStats = async (hours = 24) => {
   }
 }
 
+// Server-Sent Events from /api/v1/reports/live. `handlers` maps event names
+// ("report", "narrative", "purge", "resync") to callbacks taking the parsed
+// payload, plus an optional `reconnect` called when the browser re-opens a
+// dropped stream (events sent meanwhile are lost). Returns a function that
+// closes the stream.
+export const subscribeToLiveFeed = (handlers) => {
+  const source = new EventSource(`${API_BASE_URL}/api/v1/reports/live`)
+  for (const event of ['report', 'narrative', 'purge', 'resync']) {
+    if (handlers[event]) {
+      source.addEventListener(event, (message) => handlers[event](JSON.parse(message.data)))
+    }
+  }
+  let opened = false
+  source.onopen = () => {
+    if (opened && handlers.reconnect) {
+      handlers.reconnect()
+    }
+    opened = true
+  }
+  return () => source.close()
+}
+
 export default api
 